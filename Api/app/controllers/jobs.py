@@ -0,0 +1,71 @@
+import typing
+if typing.TYPE_CHECKING:
+	from models.jobs import Jobs as th_m_Jobs
+	from core.request import Request as th_Request
+	from services.auth import Auth as th_s_Auth
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm.exc import NoResultFound
+
+from models import orm
+from core import responses, validation, pagination
+from core.auth.action import Action
+
+
+class Jobs:
+	""" Background jobs' progress and retry state, for admins """
+
+	def __init__(self, m_jobs: 'th_m_Jobs', s_auth: 'th_s_Auth', page_size_max: int, strict_requests: bool):
+		self._m_jobs = m_jobs
+		self._s_auth = s_auth
+		self._page_size_max = page_size_max
+		self._strict_requests = strict_requests
+
+		# Validators, built once
+		self._get_validator = validation.Dict({
+			"job_id": validation.Integer(),
+		}, allow_undefined_keys=not self._strict_requests)
+		self._get_all_validator = validation.Dict({
+			"status": validation.Choice(orm.Jobs.STATUSES, allow_none=True),
+			"kind": validation.Choice(orm.Jobs.KINDS, allow_none=True),
+			"limit": validation.Integer(allow_none=True, minimum=1, maximum=self._page_size_max),
+			"after": validation.String(allow_none=True),
+			"stream": validation.Choice(pagination.STREAM_FORMATS, allow_none=True),
+		}, allow_none=True, allow_empty=True, allow_all_defined_keys_missing=True, allow_undefined_keys=not self._strict_requests)
+
+	def get(self, request: 'th_Request') -> responses.Response:
+		try:
+			# Validation
+			try: self._get_validator.validate(request.body)
+			except validation.Error as ve: return responses.Unprocessable(ve.errors)
+
+			# Authorization
+			auth_response = self._s_auth.authorize(Action.JOBS_ACCESS, request.user)
+			if not isinstance(auth_response, responses.OKEmpty): return auth_response
+
+			try: return responses.OK(self._m_jobs.get(request.body["job_id"]))
+			except NoResultFound: return responses.NotFoundByID("job_id")
+		except SQLAlchemyError as sqlae:
+			return responses.DatabaseException(sqlae)
+
+	def get_all(self, request: 'th_Request') -> responses.Response:
+		try:
+			# Validation
+			try: self._get_all_validator.validate(request.body)
+			except validation.Error as ve: return responses.Unprocessable(ve.errors)
+
+			# Filters
+			status_filter = None if request.body is None else request.body.get("status")
+			kind_filter = None if request.body is None else request.body.get("kind")
+
+			# Pagination
+			try: page = pagination.Page.from_body(request.body, self._page_size_max).make_conditional(request)
+			except ValueError: return responses.BadRequestCursor()
+
+			# Authorization
+			auth_response = self._s_auth.authorize(Action.JOBS_ACCESS, request.user)
+			if not isinstance(auth_response, responses.OKEmpty): return auth_response
+
+			return page.to_response(self._m_jobs.get_all(status_filter, kind_filter, page))
+		except SQLAlchemyError as sqlae:
+			return responses.DatabaseException(sqlae)
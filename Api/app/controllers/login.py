@@ -4,8 +4,8 @@ if typing.TYPE_CHECKING:
 	from models.users_bans import UsersBans as th_m_UsersBans
 	from core.request import Request as th_Request
 	from services.auth import Auth as th_s_Auth
-	from argon2 import PasswordHasher as th_PasswordHasher
-	from cryptography.hazmat.primitives.asymmetric.rsa import RSAPrivateKey as th_RSAPrivateKey
+	from services.passwords import Passwords as th_s_Passwords
+	from core.auth.jwt import Keys as th_Keys
 
 import logging
 
@@ -17,26 +17,34 @@ from core import responses
 from core import validation
 from core.auth import jwt
 from core.auth.action import Action
+from core.auth.user import Registered
+from services.passwords import Busy
 
 
 class Login:
 	def __init__(self, m_users: 'th_m_Users', m_users_bans: 'th_m_UsersBans', s_auth: 'th_s_Auth',
-					password_hasher: 'th_PasswordHasher', private_key: 'th_RSAPrivateKey', strict_requests: bool):
+					s_passwords: 'th_s_Passwords', token_keys: 'th_Keys', stateless_tokens: bool, strict_requests: bool):
 		self._m_users = m_users
 		self._m_users_bans = m_users_bans
 		self._s_auth = s_auth
-		self._password_hasher = password_hasher
-		self._private_key = private_key
+		self._s_passwords = s_passwords
+		self._token_keys = token_keys
+		self._stateless_tokens = stateless_tokens
 		self._strict_requests = strict_requests
 
-	def login(self, request: 'th_Request') -> responses.Response:
-		validator = validation.Dict({
+		# Validators, built once
+		self._login_validator = validation.Dict({
 			"login": validation.String(),
 			"password": validation.String()
 		}, allow_undefined_keys=not self._strict_requests)
+		self._ticket_validator = validation.Dict({
+			"path": validation.String()
+		}, allow_undefined_keys=not self._strict_requests)
+
+	def login(self, request: 'th_Request') -> responses.Response:
 		try:
 			# Validation
-			try: validator.validate(request.body)
+			try: self._login_validator.validate(request.body)
 			except validation.Error as ve: return responses.Unprocessable(ve.errors)
 
 			# Authorization
@@ -57,23 +65,51 @@ class Login:
 
 			# Verify password
 			try:
-				self._password_hasher.verify(user.passhash, request.body["password"])
+				self._s_passwords.verify(user.passhash, request.body["password"])
+			except Busy:
+				return responses.ServiceUnavailableBusy()
 			except VerifyMismatchError:
 				return responses.Unauthorized({"all": ["Invalid login or password"]})
 			except (VerificationError, InvalidHash) as argonerr:
 				return responses.InternalException(argonerr, {"password": ["Hashing error"]})
 
 			# Check rehash
-			if self._password_hasher.check_needs_rehash(user.passhash):
+			if self._s_passwords.check_needs_rehash(user.passhash):
 				try:
-					passhash_new = self._password_hasher.hash(request.body["password"])
+					passhash_new = self._s_passwords.hash(request.body["password"])
 					self._m_users.update(user.id, passhash=passhash_new)
-				except (HashingError, SQLAlchemyError, NoResultFound, MultipleResultsFound) as err:
+				except (Busy, HashingError, SQLAlchemyError, NoResultFound, MultipleResultsFound) as err:
 					# Not crucial
 					logging.exception(err)
 
 			# Generate and return token
-			token = jwt.Token.generate(jwt.Claims(user.id), self._private_key, user.passhash)
+			if self._stateless_tokens:
+				token = jwt.Token.generate(jwt.Claims(user.id, user.role, user.cred_version), self._token_keys)
+			else:
+				token = jwt.Token.generate(jwt.Claims(user.id), self._token_keys, user.passhash)
 			return responses.OK({"token": token.to_string()})
 		except SQLAlchemyError as sqlae:
 			return responses.DatabaseException(sqlae)
+
+	def ticket(self, request: 'th_Request') -> responses.Response:
+		"""
+		A short lived token of the user, only valid for requests to path, verified by services.users.Users.from_ticket_string
+		EventSource can't send headers, its URL carries a ticket instead of the token, URLs end up in logs and histories
+		"""
+		try:
+			# Validation
+			try: self._ticket_validator.validate(request.body)
+			except validation.Error as ve: return responses.Unprocessable(ve.errors)
+
+			# Authorization, of the path's request once the ticket is used
+			if not isinstance(request.user, Registered): return responses.UnauthorizedNotLoggedIn()
+
+			# Query
+			try: user = self._m_users.get(request.user.user_id)
+			except NoResultFound: return responses.UnauthorizedNotLoggedIn()
+
+			# Tickets are stateless, whichever kind the tokens are
+			ticket = jwt.Token.generate(jwt.Claims(user.id, user.role, user.cred_version, request.body["path"]), self._token_keys)
+			return responses.OK({"ticket": ticket.to_string()})
+		except SQLAlchemyError as sqlae:
+			return responses.DatabaseException(sqlae)
@@ -6,70 +6,158 @@ if typing.TYPE_CHECKING:
 	from models.rooms_bans import RoomsBans as th_m_RoomsBans
 	from core.request import Request as th_Request
 	from services.auth import Auth as th_s_Auth
+	from services.post_events import PostEvents as th_s_PostEvents, Subscription as th_Subscription
 
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 from sqlalchemy.orm.exc import NoResultFound
 
 from models import orm
-from core import responses, validation
+from core import responses, validation, pagination, projection, context
+from core.request import BODY_ITEMS
 from core.auth.action import Action
 from core.auth.user import Registered
+from services.post_events import Full
 
 
 class Posts:
-	def __init__(self, m_posts: 'th_m_Posts', m_rooms: 'th_m_Rooms', m_rooms_users: 'th_m_RoomsUsers', m_rooms_bans: 'th_m_RoomsBans', s_auth: 'th_s_Auth', strict_requests: bool = None):
+	def __init__(
+			self, m_posts: 'th_m_Posts', m_rooms: 'th_m_Rooms', m_rooms_users: 'th_m_RoomsUsers', m_rooms_bans: 'th_m_RoomsBans',
+			s_auth: 'th_s_Auth', s_post_events: 'th_s_PostEvents', page_size_max: int, bulk_size_max: int, events_keepalive: float,
+			strict_requests: bool = None
+	):
+		"""
+		Parameters
+		----------
+		bulk_size_max Max amount of posts created by one request
+		events_keepalive Seconds between keepalives of an idle event stream, the user's access is checked again on each
+		"""
 		self._m_posts = m_posts
 		self._m_rooms = m_rooms
 		self._m_rooms_users = m_rooms_users
 		self._m_rooms_bans = m_rooms_bans
 		self._s_auth = s_auth
+		self._s_post_events = s_post_events
+		self._page_size_max = page_size_max
+		self._bulk_size_max = bulk_size_max
+		self._events_keepalive = events_keepalive
 		self._strict_requests = strict_requests
 
-	def create(self, request: 'th_Request') -> responses.Response:
-		validator = validation.Dict({
+		# Validators, built once
+		self._create_validator = validation.Dict({
 			"room_id": validation.Integer(),
 			"content": validation.String(length_min=orm.Posts.CONTENT_LEN_MIN, length_max=orm.Posts.CONTENT_LEN_MAX)
 		}, allow_undefined_keys=not self._strict_requests)
+		self._create_bulk_validator = validation.Dict({
+			"room_id": validation.Integer(),
+			BODY_ITEMS: validation.List(length_min=1, length_max=self._bulk_size_max)
+		}, allow_undefined_keys=not self._strict_requests)
+		self._create_bulk_item_validator = validation.Dict({
+			"content": validation.String(length_min=orm.Posts.CONTENT_LEN_MIN, length_max=orm.Posts.CONTENT_LEN_MAX)
+		}, allow_undefined_keys=not self._strict_requests)
+		self._get_validator = validation.Dict({
+			"post_id": validation.Integer(),
+		}, allow_undefined_keys=not self._strict_requests)
+		self._get_all_validator = validation.Dict({
+			"user_id": validation.Integer(allow_none=True),
+			"room_id": validation.Integer(allow_none=True),
+			"limit": validation.Integer(allow_none=True, minimum=1, maximum=self._page_size_max),
+			"after": validation.String(allow_none=True),
+			"stream": validation.Choice(pagination.STREAM_FORMATS, allow_none=True),
+			"fields": validation.Fields(projection.names_of(orm.Posts), allow_none=True),
+		}, allow_none=True, allow_empty=True, allow_all_defined_keys_missing=True, allow_undefined_keys=not self._strict_requests)
+		self._update_validator = validation.Dict({
+			"post_id": validation.Integer(),
+			"content": validation.String(length_min=orm.Posts.CONTENT_LEN_MIN, length_max=orm.Posts.CONTENT_LEN_MAX)
+		}, allow_undefined_keys=not self._strict_requests)
+		self._delete_validator = validation.Dict({
+			"post_id": validation.Integer(),
+		}, allow_undefined_keys=not self._strict_requests)
+		self._stream_validator = validation.Dict({
+			"room_id": validation.Integer(),
+		}, allow_undefined_keys=not self._strict_requests)
+
+	def create(self, request: 'th_Request') -> responses.Response:
 		try:
 			print(request.body)
 			# Validation
-			try: validator.validate(request.body)
+			try: self._create_validator.validate(request.body)
 			except validation.Error as ve: return responses.Unprocessable(ve.errors)
 
 			room_id = request.body["room_id"]
 
-			# Queries for authorization
-			try: orm_room = self._m_rooms.get(room_id)
+			# Get the user's ID from request (Which gets it's user info from a token)
+			user_id = request.user.user_id if isinstance(request.user, Registered) else None
+
+			# Query for authorization
+			try: room_access = self._m_rooms.get_access(room_id, user_id)
 			except NoResultFound: return responses.NotFoundByID("room_id")
-			orm_room_users = self._m_rooms_users.get_all_by_room(orm_room.id)
 
-			# Get the user's ID from request (Which gets it's user info from a token)
-			if not isinstance(request.user, Registered): return responses.UnauthorizedNotLoggedIn()
-			user: Registered = request.user
+			if user_id is None: return responses.UnauthorizedNotLoggedIn()
 
 			# Authorize
-			if orm_room.is_public:
+			if room_access.room.is_public:
 				auth_response = self._s_auth.authorize(Action.POSTS_CREATE_PUBLIC, request.user)
 			else:
-				allowed_ids = [orm_room.user_id] + [orm_ru.user_id for orm_ru in orm_room_users]
-				auth_response = self._s_auth.authorize(Action.POSTS_CREATE, request.user, allowed_ids)
+				auth_response = self._s_auth.authorize(Action.POSTS_CREATE, request.user, room_access.allowed_ids)
 			if not isinstance(auth_response, responses.OKEmpty): return auth_response
 
 			# Query
 			try:
-				self._m_posts.create(room_id, user.user_id, request.body["content"])
+				self._m_posts.create(room_id, user_id, request.body["content"])
 				return responses.Created()
 			except IntegrityError: return responses.NotFoundByID("user_id")
 		except SQLAlchemyError as sqlae:
 			return responses.DatabaseException(sqlae)
 
+	def create_bulk(self, request: 'th_Request') -> responses.Response:
+		"""
+		Posts sent as a JSON array or as NDJSON, the room's access is authorized once for all of them
+		Each item's result is at its position, {"post_id": ...} if it was created, {"errors": ...} if it was invalid
+		"""
+		try:
+			# Validation
+			try: self._create_bulk_validator.validate(request.body)
+			except validation.Error as ve: return responses.Unprocessable(ve.errors)
+
+			room_id = request.body["room_id"]
+			user_id = request.user.user_id if isinstance(request.user, Registered) else None
+
+			# Query for authorization
+			try: room_access = self._m_rooms.get_access(room_id, user_id)
+			except NoResultFound: return responses.NotFoundByID("room_id")
+
+			if user_id is None: return responses.UnauthorizedNotLoggedIn()
+
+			# Authorize, same as creating one post
+			if room_access.room.is_public:
+				auth_response = self._s_auth.authorize(Action.POSTS_CREATE_PUBLIC, request.user)
+			else:
+				auth_response = self._s_auth.authorize(Action.POSTS_CREATE, request.user, room_access.allowed_ids)
+			if not isinstance(auth_response, responses.OKEmpty): return auth_response
+
+			# Validation of each item, invalid ones are reported rather than failing the others
+			results: typing.List[typing.Optional[dict]] = []
+			contents = []
+			is_valid = self._create_bulk_item_validator.is_valid
+			for item in request.body[BODY_ITEMS]:
+				if is_valid(item):
+					contents.append(item["content"])
+					results.append(None)
+					continue
+				try: self._create_bulk_item_validator.validate(item)
+				except validation.Error as ve: results.append({"errors": ve.errors})
+
+			# Query
+			try: post_ids = iter(self._m_posts.create_all(room_id, user_id, contents))
+			except IntegrityError: return responses.NotFoundByID("user_id")
+			return responses.OK([{"post_id": next(post_ids)} if result is None else result for result in results])
+		except SQLAlchemyError as sqlae:
+			return responses.DatabaseException(sqlae)
+
 	def get(self, request: 'th_Request') -> responses.Response:
-		validator = validation.Dict({
-			"post_id": validation.Integer(),
-		}, allow_undefined_keys=not self._strict_requests)
 		try:
 			# Validation
-			try: validator.validate(request.body)
+			try: self._get_validator.validate(request.body)
 			except validation.Error as ve: return responses.Unprocessable(ve.errors)
 
 			post_id = request.body["post_id"]
@@ -77,43 +165,30 @@ class Posts:
 			# Queries for authorization
 			try: orm_post = self._m_posts.get(post_id)
 			except NoResultFound: return responses.NotFoundByID("post_id")
-			try: orm_room = self._m_rooms.get(orm_post.room_id)
+			try: room_access = self._m_rooms.get_access(orm_post.room_id, request.user.user_id if isinstance(request.user, Registered) else None)
 			except NoResultFound: return responses.NotFoundByID("room_id")
-			orm_room_users = self._m_rooms_users.get_all_by_room(orm_room.id)
-			orm_room_ban = None
-			try: orm_room_ban = self._m_rooms_bans.get(orm_post.room_id)
-			except NoResultFound: pass # Room is not banned
 
 			# Authorization
-			if orm_room_ban is not None:
-				# can the user access the banned room?
-				auth_response = self._s_auth.authorize(Action.ROOMS_ACCESS_BANNED, request.user, orm_room.user_id)
-				if not isinstance(auth_response, responses.OKEmpty): return auth_response
-				# yes
-			# TODO check this out
-			auth_response = self._s_auth.authorize(
-				Action.ROOMS_ACCESS_PUBLIC if orm_room.is_public else Action.ROOMS_ACCESS_PRIVATE,
-				request.user,
-				[orm_room.user_id] + [orm_room_user.user_id for orm_room_user in orm_room_users]
-			)
+			auth_response = self._s_auth.authorize_room_access(request.user, room_access)
 			if not isinstance(auth_response, responses.OKEmpty): return auth_response
 			return responses.OK(orm_post)
 		except SQLAlchemyError as sqlae:
 			return responses.DatabaseException(sqlae)
 
 	def get_all(self, request: 'th_Request') -> responses.Response:
-		validator = validation.Dict({
-			"user_id": validation.Integer(allow_none=True),
-			"room_id": validation.Integer(allow_none=True)
-		}, allow_none=True, allow_empty=True, allow_all_defined_keys_missing=True, allow_undefined_keys=not self._strict_requests)
 		try:
 			# Validation
-			try: validator.validate(request.body)
+			try: self._get_all_validator.validate(request.body)
 			except validation.Error as ve: return responses.Unprocessable(ve.errors)
 			# Filters
 			user_id_filter = None if request.body is None else request.body.get("user_id")
 			room_id_filter = None if request.body is None else request.body.get("room_id")
 
+			# Pagination and projection
+			try: page = pagination.Page.from_body(request.body, self._page_size_max).make_conditional(request)
+			except ValueError: return responses.BadRequestCursor()
+			fields = projection.Fields.from_body(request.body)
+
 			# Get user's ID if registered
 			user_id = None
 			if isinstance(request.user, Registered):
@@ -122,35 +197,26 @@ class Posts:
 			# Authorization
 			auth_response = self._s_auth.authorize(Action.ROOMS_POSTS_ACCESS, request.user)
 			if isinstance(auth_response, responses.OKEmpty):
-				result = self._m_posts.get_all(False, False, False, user_id, room_id_filter, user_id_filter)
-				return responses.OK(result)
+				result = self._m_posts.get_all(False, False, False, user_id, room_id_filter, user_id_filter, page, fields)
+				return page.to_response(result)
 			else:
 				# Filters by authorization
-				auth_response = self._s_auth.authorize(Action.ROOMS_ACCESS_PUBLIC, request.user)
-				exclude_public = not isinstance(auth_response, responses.OKEmpty)
-
-				auth_response = self._s_auth.authorize(Action.ROOMS_ACCESS_PRIVATE, request.user)
-				exclude_private = not isinstance(auth_response, responses.OKEmpty)
-
-				auth_response = self._s_auth.authorize(Action.ROOMS_ACCESS_BANNED, request.user)
-				exclude_banned = not isinstance(auth_response, responses.OKEmpty)
+				exclude_public, exclude_private, exclude_banned = self._s_auth.exclusions(request.user, [
+					Action.ROOMS_ACCESS_PUBLIC, Action.ROOMS_ACCESS_PRIVATE, Action.ROOMS_ACCESS_BANNED
+				])
 
 				result = self._m_posts.get_all(
 					exclude_banned, exclude_public, exclude_private,
-					user_id, room_id_filter, user_id_filter
+					user_id, room_id_filter, user_id_filter, page, fields
 				)
-				return responses.OK(result)
+				return page.to_response(result)
 		except SQLAlchemyError as sqlae:
 			return responses.DatabaseException(sqlae)
 
 	def update(self, request: 'th_Request') -> responses.Response:
-		validator = validation.Dict({
-			"post_id": validation.Integer(),
-			"content": validation.String(length_min=orm.Posts.CONTENT_LEN_MIN, length_max=orm.Posts.CONTENT_LEN_MAX)
-		}, allow_undefined_keys=not self._strict_requests)
 		try:
 			# Validation
-			try: validator.validate(request.body)
+			try: self._update_validator.validate(request.body)
 			except validation.Error as ve: return responses.Unprocessable(ve.errors)
 
 			post_id = request.body["post_id"]
@@ -175,12 +241,9 @@ class Posts:
 			return responses.DatabaseException(sqlae)
 
 	def delete(self, request: 'th_Request') -> responses.Response:
-		validator = validation.Dict({
-			"post_id": validation.Integer(),
-		}, allow_undefined_keys=not self._strict_requests)
 		try:
 			# Validation
-			try: validator.validate(request.body)
+			try: self._delete_validator.validate(request.body)
 			except validation.Error as ve: return responses.Unprocessable(ve.errors)
 
 			post_id = request.body["post_id"]
@@ -202,3 +265,55 @@ class Posts:
 			except NoResultFound: return responses.NotFoundByID("post_id")
 		except SQLAlchemyError as sqlae:
 			return responses.DatabaseException(sqlae)
+
+	def stream(self, request: 'th_Request') -> responses.Response:
+		""" The room's created, updated and deleted posts, as Server-Sent Events """
+		try:
+			# Validation
+			try: self._stream_validator.validate(request.body)
+			except validation.Error as ve: return responses.Unprocessable(ve.errors)
+
+			room_id = request.body["room_id"]
+
+			# Same authorization as getting one of the room's posts
+			auth_response = self._authorize_stream(request, room_id)
+			if not isinstance(auth_response, responses.OKEmpty): return auth_response
+
+			try: subscription = self._s_post_events.subscribe(room_id)
+			except Full: return responses.ServiceUnavailableBusy()
+			return responses.OKEvents(
+				self._events(request, subscription),
+				lambda: self._s_post_events.unsubscribe(subscription)
+			)
+		except SQLAlchemyError as sqlae:
+			return responses.DatabaseException(sqlae)
+
+	# region Internal
+	def _authorize_stream(self, request: 'th_Request', room_id: int) -> responses.Response:
+		"""
+		Raises
+		-------
+		sqlalchemy.exc.SQLAlchemyError
+		"""
+		try: room_access = self._m_rooms.get_access(room_id, request.user.user_id if isinstance(request.user, Registered) else None)
+		except NoResultFound: return responses.NotFoundByID("room_id")
+		return self._s_auth.authorize_room_access(request.user, room_access)
+
+	def _events(self, request: 'th_Request', subscription: 'th_Subscription') -> typing.Iterator[bytes]:
+		# Sends the headers right away, and sets the client's reconnection delay in milliseconds
+		yield b"retry: 3000\n\n"
+		while True:
+			event = subscription.get(self._events_keepalive)
+			if event is not None:
+				yield event
+				continue
+			if subscription.closed:
+				return
+			# A user who has been removed from or banned in the room stops getting its posts
+			context.forget("rooms_access")
+			try: auth_response = self._authorize_stream(request, subscription.room_id)
+			# The stream can only be ended, the client reconnects
+			except SQLAlchemyError: return
+			if not isinstance(auth_response, responses.OKEmpty): return
+			yield b": keepalive\n\n"
+	# endregion Internal
@@ -10,27 +10,47 @@ from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 from sqlalchemy.orm.exc import NoResultFound
 
 from models import orm
-from core import responses, validation
+from core import responses, validation, pagination, projection
 from core.auth.action import Action
 from core.auth.user import Registered
 
 
 class Rooms:
-	def __init__(self, m_rooms: 'th_m_Rooms', m_rooms_bans: 'th_m_RoomsBans', m_rooms_users: 'th_m_RoomsUsers', s_auth: 'th_s_Auth', strict_requests: bool):
+	def __init__(self, m_rooms: 'th_m_Rooms', m_rooms_bans: 'th_m_RoomsBans', m_rooms_users: 'th_m_RoomsUsers', s_auth: 'th_s_Auth', page_size_max: int, strict_requests: bool):
 		self._m_rooms = m_rooms
 		self._m_rooms_bans = m_rooms_bans
 		self._m_rooms_users = m_rooms_users
 		self._s_auth = s_auth
+		self._page_size_max = page_size_max
 		self._strict_requests = strict_requests
 
-	def create(self, request: 'th_Request') -> responses.Response:
-		validator = validation.Dict({
+		# Validators, built once
+		self._create_validator = validation.Dict({
 			"title": validation.String(length_min=orm.Rooms.TITLE_LEN_MIN, length_max=orm.Rooms.TITLE_LEN_MAX),
 			"is_public": validation.Boolean()
 		})
+		self._get_validator = validation.Dict({
+			"room_id": validation.Integer()
+		}, allow_undefined_keys=not self._strict_requests)
+		self._get_all_validator = validation.Dict({
+			"user_id": validation.Integer(allow_none=True),
+			"limit": validation.Integer(allow_none=True, minimum=1, maximum=self._page_size_max),
+			"after": validation.String(allow_none=True),
+			"stream": validation.Choice(pagination.STREAM_FORMATS, allow_none=True),
+			"fields": validation.Fields(projection.names_of(orm.Rooms), allow_none=True),
+		}, allow_none=True, allow_empty=True, allow_all_defined_keys_missing=True, allow_undefined_keys=not self._strict_requests)
+		self._update_validator = validation.Dict({
+			"room_id": validation.Integer(),
+			"title": validation.String(length_min=orm.Rooms.TITLE_LEN_MIN, length_max=orm.Rooms.TITLE_LEN_MAX),
+		})
+		self._delete_validator = validation.Dict({
+			"room_id": validation.Integer()
+		}, allow_undefined_keys=not self._strict_requests)
+
+	def create(self, request: 'th_Request') -> responses.Response:
 		try:
 			# Validation
-			try: validator.validate(request.body)
+			try: self._create_validator.validate(request.body)
 			except validation.Error as ve: return responses.Unprocessable(ve.errors)
 
 			# Authorization
@@ -50,84 +70,59 @@ class Rooms:
 			return responses.DatabaseException(sqlae)
 
 	def get(self, request: 'th_Request') -> responses.Response:
-		validator = validation.Dict({
-			"room_id": validation.Integer()
-		}, allow_undefined_keys=not self._strict_requests)
 		try:
 			# Validation
-			try: validator.validate(request.body)
+			try: self._get_validator.validate(request.body)
 			except validation.Error as ve: return responses.Unprocessable(ve.errors)
 
 			room_id = request.body["room_id"]
 
-			# Queries for authorization
-			try: orm_room = self._m_rooms.get(room_id)
+			# Query for authorization
+			try: room_access = self._m_rooms.get_access(room_id, request.user.user_id if isinstance(request.user, Registered) else None)
 			except NoResultFound: return responses.NotFoundByID("room_id")
-			orm_room_users = self._m_rooms_users.get_all_by_room(orm_room.id)
-
-			orm_room_ban = None
-			try: orm_room_ban = self._m_rooms_bans.get(room_id)
-			except NoResultFound: pass # Room is not banned
 
 			# Authorization
-			if orm_room_ban is not None:
-				# Can the user view banned room
-				auth_response = self._s_auth.authorize(Action.ROOMS_ACCESS_BANNED, request.user, orm_room.user_id)
-				if not isinstance(auth_response, responses.OKEmpty): return auth_response
-				# The user can view banned room
-			# Can the user view this room based on it's publicity and whatever is below?
-			auth_response = self._s_auth.authorize(
-				Action.ROOMS_ACCESS_PUBLIC if orm_room.is_public else Action.ROOMS_ACCESS_PRIVATE,
-				request.user,
-				[orm_room.user_id] + [orm_room_user.user_id for orm_room_user in orm_room_users]
-			)
+			auth_response = self._s_auth.authorize_room_access(request.user, room_access)
 			if not isinstance(auth_response, responses.OKEmpty): return auth_response
 
-			return responses.OK(orm_room)
+			return responses.OK(room_access.room)
 		except SQLAlchemyError as sqlae:
 			return responses.DatabaseException(sqlae)
 
 	def get_all(self, request: 'th_Request') -> responses.Response:
-		validator = validation.Dict({
-			"user_id": validation.Integer(allow_none=True)
-		}, allow_none=True, allow_empty=True, allow_all_defined_keys_missing=True, allow_undefined_keys=not self._strict_requests)
 		try:
 			# Validation
-			try: validator.validate(request.body)
+			try: self._get_all_validator.validate(request.body)
 			except validation.Error as ve: return responses.Unprocessable(ve.errors)
 			# Filters
 			user_id_filter = None if request.body is None else request.body.get("user_id")
 
+			# Pagination and projection
+			try: page = pagination.Page.from_body(request.body, self._page_size_max).make_conditional(request)
+			except ValueError: return responses.BadRequestCursor()
+			fields = projection.Fields.from_body(request.body)
+
 			# Filters by authorization
 			user_id = None
 			if isinstance(request.user, Registered):
 				user_id = request.user.user_id
 
-			auth_response = self._s_auth.authorize(Action.ROOMS_ACCESS_PUBLIC, request.user)
-			exclude_public = not isinstance(auth_response, responses.OKEmpty)
-
-			auth_response = self._s_auth.authorize(Action.ROOMS_ACCESS_PRIVATE, request.user)
-			exclude_private = not isinstance(auth_response, responses.OKEmpty)
-
-			auth_response = self._s_auth.authorize(Action.ROOMS_ACCESS_BANNED, request.user)
-			exclude_banned = not isinstance(auth_response, responses.OKEmpty)
+			exclude_public, exclude_private, exclude_banned = self._s_auth.exclusions(request.user, [
+				Action.ROOMS_ACCESS_PUBLIC, Action.ROOMS_ACCESS_PRIVATE, Action.ROOMS_ACCESS_BANNED
+			])
 
 			result = self._m_rooms.get_all(
 				exclude_banned, exclude_public, exclude_private,
-				user_id, user_id_filter
+				user_id, user_id_filter, page, fields
 			)
-			return responses.OK(result)
+			return page.to_response(result)
 		except SQLAlchemyError as sqlae:
 			return responses.DatabaseException(sqlae)
 
 	def update(self, request: 'th_Request') -> responses.Response:
-		validator = validation.Dict({
-			"room_id": validation.Integer(),
-			"title": validation.String(length_min=orm.Rooms.TITLE_LEN_MIN, length_max=orm.Rooms.TITLE_LEN_MAX),
-		})
 		try:
 			# Validation
-			try: validator.validate(request.body)
+			try: self._update_validator.validate(request.body)
 			except validation.Error as ve: return responses.Unprocessable(ve.errors)
 
 			room_id = request.body["room_id"]
@@ -148,12 +143,9 @@ class Rooms:
 			return responses.DatabaseException(sqlae)
 
 	def delete(self, request: 'th_Request') -> responses.Response:
-		validator = validation.Dict({
-			"room_id": validation.Integer()
-		}, allow_undefined_keys=not self._strict_requests)
 		try:
 			# Validation
-			try: validator.validate(request.body)
+			try: self._delete_validator.validate(request.body)
 			except validation.Error as ve: return responses.Unprocessable(ve.errors)
 
 			room_id = request.body["room_id"]
@@ -166,9 +158,8 @@ class Rooms:
 			auth_response = self._s_auth.authorize(Action.ROOMS_DELETE, request.user, orm_room.user_id)
 			if not isinstance(auth_response, responses.OKEmpty): return auth_response
 
-			try:
-				self._m_rooms.delete(room_id)
-				return responses.OKEmpty()
+			# The room's rows are purged in the background
+			try: return responses.Accepted(self._m_rooms.delete(room_id))
 			except NoResultFound: return responses.NotFoundByID("room_id")
 		except SQLAlchemyError as sqlae:
 			return responses.DatabaseException(sqlae)
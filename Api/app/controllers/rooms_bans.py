@@ -10,27 +10,47 @@ from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 from sqlalchemy.orm.exc import NoResultFound
 
 from models import orm
-from core import responses, validation
+from core import responses, validation, pagination
 from core.auth.action import Action
 from core.auth.user import Registered
 
 
 class RoomsBans:
-	def __init__(self, m_rooms_bans: 'th_m_RoomsBans', m_rooms: 'th_m_Rooms', m_rooms_users: 'th_m_RoomsUsers', s_auth: 'th_s_Auth', strict_requests: bool):
+	def __init__(self, m_rooms_bans: 'th_m_RoomsBans', m_rooms: 'th_m_Rooms', m_rooms_users: 'th_m_RoomsUsers', s_auth: 'th_s_Auth', page_size_max: int, strict_requests: bool):
 		self._m_rooms_bans = m_rooms_bans
 		self._m_rooms = m_rooms
 		self._m_rooms_users = m_rooms_users
 		self._s_auth = s_auth
+		self._page_size_max = page_size_max
 		self._strict_requests = strict_requests
 
-	def create(self, request: 'th_Request') -> responses.Response:
-		validator = validation.Dict({
+		# Validators, built once
+		self._create_validator = validation.Dict({
 			"room_id": validation.Integer(),
 			"reason": validation.String(length_min=orm.RoomsBans.REASON_LEN_MIN, length_max=orm.RoomsBans.REASON_LEN_MAX)
 		}, allow_undefined_keys=not self._strict_requests)
+		self._get_validator = validation.Dict({
+			"room_id": validation.Integer()
+		}, allow_undefined_keys=not self._strict_requests)
+		self._get_all_validator = validation.Dict({
+			"room_id": validation.Integer(allow_none=True),
+			"banner_id": validation.Integer(allow_none=True),
+			"limit": validation.Integer(allow_none=True, minimum=1, maximum=self._page_size_max),
+			"after": validation.String(allow_none=True),
+			"stream": validation.Choice(pagination.STREAM_FORMATS, allow_none=True),
+		}, allow_none=True, allow_empty=True, allow_all_defined_keys_missing=True, allow_undefined_keys=not self._strict_requests)
+		self._update_validator = validation.Dict({
+			"room_id": validation.Integer(),
+			"reason": validation.String(length_min=orm.UsersBans.REASON_LEN_MIN, length_max=orm.UsersBans.REASON_LEN_MAX)
+		}, allow_undefined_keys=not self._strict_requests)
+		self._delete_validator = validation.Dict({
+			"room_id": validation.Integer()
+		}, allow_undefined_keys=not self._strict_requests)
+
+	def create(self, request: 'th_Request') -> responses.Response:
 		try:
 			# Validation
-			try: validator.validate(request.body)
+			try: self._create_validator.validate(request.body)
 			except validation.Error as ve: return responses.Unprocessable(ve.errors)
 
 			# Authorization
@@ -51,12 +71,9 @@ class RoomsBans:
 			return responses.DatabaseException(sqlae)
 
 	def get(self, request: 'th_Request') -> responses.Response:
-		validator = validation.Dict({
-			"room_id": validation.Integer()
-		}, allow_undefined_keys=not self._strict_requests)
 		try:
 			# Validation
-			try: validator.validate(request.body)
+			try: self._get_validator.validate(request.body)
 			except validation.Error as ve: return responses.Unprocessable(ve.errors)
 
 			room_id = request.body["room_id"]
@@ -76,53 +93,47 @@ class RoomsBans:
 			return responses.DatabaseException(sqlae)
 
 	def get_all(self, request: 'th_Request') -> responses.Response:
-		validator = validation.Dict({
-			"room_id": validation.Integer(allow_none=True),
-			"banner_id": validation.Integer(allow_none=True),
-		}, allow_none=True, allow_empty=True, allow_all_defined_keys_missing=True, allow_undefined_keys=not self._strict_requests)
 		try:
 			# Validation
-			try: validator.validate(request.body)
+			try: self._get_all_validator.validate(request.body)
 			except validation.Error as ve: return responses.Unprocessable(ve.errors)
 
 			# Filters
 			room_id_filter = None if request.body is None else request.body.get("room_id")
 			banner_id_filter = None if request.body is None else request.body.get("banner_id")
 
+			# Pagination
+			try: page = pagination.Page.from_body(request.body, self._page_size_max)
+			except ValueError: return responses.BadRequestCursor()
+
 			# Authorization
 			# TODO check whatever is going on here
 			auth_response = self._s_auth.authorize(Action.ROOMS_BANS_ACCESS, request.user)
 			if isinstance(auth_response, responses.OKEmpty):
-				result = self._m_rooms_bans.get_all(False, False, None, room_id_filter, banner_id_filter)
-				return responses.OK(result)
+				result = self._m_rooms_bans.get_all(False, False, None, room_id_filter, banner_id_filter, page)
+				return page.to_response(result)
 			else:
 				# Filters by authorization
 				user_id = None
 				if isinstance(request.user, Registered):
 					user_id = request.user.user_id
 
-				auth_response = self._s_auth.authorize(Action.ROOMS_ACCESS_PUBLIC, request.user)
-				exclude_public = not isinstance(auth_response, responses.OKEmpty)
-
-				auth_response = self._s_auth.authorize(Action.ROOMS_ACCESS_PRIVATE, request.user)
-				exclude_private = not isinstance(auth_response, responses.OKEmpty)
+				exclude_public, exclude_private = self._s_auth.exclusions(request.user, [
+					Action.ROOMS_ACCESS_PUBLIC, Action.ROOMS_ACCESS_PRIVATE
+				])
 
 				result = self._m_rooms_bans.get_all(
 					exclude_public, exclude_private,
-					user_id, room_id_filter, banner_id_filter
+					user_id, room_id_filter, banner_id_filter, page
 				)
-				return responses.OK(result)
+				return page.to_response(result)
 		except SQLAlchemyError as sqlae:
 			return responses.DatabaseException(sqlae)
 
 	def update(self, request: 'th_Request') -> responses.Response:
-		validator = validation.Dict({
-			"room_id": validation.Integer(),
-			"reason": validation.String(length_min=orm.UsersBans.REASON_LEN_MIN, length_max=orm.UsersBans.REASON_LEN_MAX)
-		}, allow_undefined_keys=not self._strict_requests)
 		try:
 			# Validation
-			try: validator.validate(request.body)
+			try: self._update_validator.validate(request.body)
 			except validation.Error as ve: return responses.Unprocessable(ve.errors)
 
 			room_id = request.body["room_id"]
@@ -144,12 +155,9 @@ class RoomsBans:
 			return responses.DatabaseException(sqlae)
 
 	def delete(self, request: 'th_Request') -> responses.Response:
-		validator = validation.Dict({
-			"room_id": validation.Integer()
-		}, allow_undefined_keys=not self._strict_requests)
 		try:
 			# Validation
-			try: validator.validate(request.body)
+			try: self._delete_validator.validate(request.body)
 			except validation.Error as ve: responses.Unprocessable(ve.errors)
 
 			room_id = request.body["room_id"]
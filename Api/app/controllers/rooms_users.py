@@ -9,27 +9,45 @@ if typing.TYPE_CHECKING:
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 from sqlalchemy.orm.exc import NoResultFound
 
-from core import responses, validation
+from core import responses, validation, pagination
 from core.auth.user import Registered
 from core.auth.action import Action
 
 
 class RoomsUsers:
-	def __init__(self, m_rooms_users: 'th_m_RoomsUsers', m_rooms: 'th_m_Rooms', m_rooms_bans: 'th_m_RoomsBans', s_auth: 'th_s_Auth', strict_requests: bool = None):
+	def __init__(self, m_rooms_users: 'th_m_RoomsUsers', m_rooms: 'th_m_Rooms', m_rooms_bans: 'th_m_RoomsBans', s_auth: 'th_s_Auth', page_size_max: int, strict_requests: bool = None):
 		self._m_rooms_users = m_rooms_users
 		self._m_rooms = m_rooms
 		self._m_rooms_bans = m_rooms_bans
 		self._s_auth = s_auth
+		self._page_size_max = page_size_max
 		self._strict_requests = strict_requests
 
-	def create(self, request: 'th_Request') -> responses.Response:
-		validator = validation.Dict({
+		# Validators, built once
+		self._create_validator = validation.Dict({
+			"room_id": validation.Integer(),
+			"user_id": validation.Integer()
+		}, allow_undefined_keys=not self._strict_requests)
+		self._get_validator = validation.Dict({
+			"room_id": validation.Integer(),
+			"user_id": validation.Integer()
+		}, allow_undefined_keys=not self._strict_requests)
+		self._get_all_validator = validation.Dict({
+			"user_id": validation.Integer(allow_none=True),
+			"room_id": validation.Integer(allow_none=True),
+			"limit": validation.Integer(allow_none=True, minimum=1, maximum=self._page_size_max),
+			"after": validation.String(allow_none=True),
+			"stream": validation.Choice(pagination.STREAM_FORMATS, allow_none=True),
+		}, allow_none=True, allow_empty=True, allow_all_defined_keys_missing=True, allow_undefined_keys=not self._strict_requests)
+		self._delete_validator = validation.Dict({
 			"room_id": validation.Integer(),
 			"user_id": validation.Integer()
 		}, allow_undefined_keys=not self._strict_requests)
+
+	def create(self, request: 'th_Request') -> responses.Response:
 		try:
 			# Validation
-			try: validator.validate(request.body)
+			try: self._create_validator.validate(request.body)
 			except validation.Error as ve: return responses.Unprocessable(ve.errors)
 
 			room_id = request.body["room_id"]
@@ -52,40 +70,20 @@ class RoomsUsers:
 			return responses.DatabaseException(sqlae)
 
 	def get(self, request: 'th_Request') -> responses.Response:
-		validator = validation.Dict({
-			"room_id": validation.Integer(),
-			"user_id": validation.Integer()
-		}, allow_undefined_keys=not self._strict_requests)
 		try:
 			# Validation
-			try: validator.validate(request.body)
+			try: self._get_validator.validate(request.body)
 			except validation.Error as ve: return responses.Unprocessable(ve.errors)
 
 			room_id = request.body["room_id"]
 			user_id = request.body["user_id"]
 
-			# Queries for authorization
-			try: orm_room = self._m_rooms.get(room_id)
+			# Query for authorization
+			try: room_access = self._m_rooms.get_access(room_id, request.user.user_id if isinstance(request.user, Registered) else None)
 			except NoResultFound: return responses.NotFoundByID("room_id")
 
-			orm_room_users = self._m_rooms_users.get_all_by_room(room_id)
-
-			orm_room_ban = None
-			try: orm_room_ban = self._m_rooms_bans.get(room_id)
-			except NoResultFound: pass # Room isn't banned
-
 			# Authorization
-			if orm_room_ban is not None:
-				# If room is banned
-				auth_response = self._s_auth.authorize(Action.ROOMS_ACCESS_BANNED, request.user, orm_room.user_id)
-				if not isinstance(auth_response, responses.OKEmpty): return auth_response
-			# room is not banned
-			auth_response = self._s_auth.authorize(
-				Action.ROOMS_ACCESS_PUBLIC if orm_room.is_public else Action.ROOMS_ACCESS_PRIVATE,
-				request.user,
-				# Room's creator   + users added to the room
-				[orm_room.user_id] + [orm_room_user.user_id for orm_room_user in orm_room_users]
-			)
+			auth_response = self._s_auth.authorize_room_access(request.user, room_access)
 			if not isinstance(auth_response, responses.OKEmpty): return auth_response
 
 			try:
@@ -95,27 +93,27 @@ class RoomsUsers:
 			return responses.DatabaseException(sqlae)
 
 	def get_all(self, request: 'th_Request'):
-		validator = validation.Dict({
-			"user_id": validation.Integer(allow_none=True),
-			"room_id": validation.Integer(allow_none=True),
-		}, allow_none=True, allow_empty=True, allow_all_defined_keys_missing=True, allow_undefined_keys=not self._strict_requests)
 		try:
 			# Validation
-			try: validator.validate(request.body)
+			try: self._get_all_validator.validate(request.body)
 			except validation.Error as ve: return responses.Unprocessable(ve.errors)
 
 			# Filters
 			room_id_filter = None if request.body is None else request.body.get("room_id")
 			user_id_filter = None if request.body is None else request.body.get("user_id")
 
+			# Pagination
+			try: page = pagination.Page.from_body(request.body, self._page_size_max)
+			except ValueError: return responses.BadRequestCursor()
+
 			# Authorization
 			# TODO check whatever is going on here
 			# Can user access all rooms users?
 			auth_response = self._s_auth.authorize(Action.ROOMS_USERS_ACCESS, request.user)
 			if isinstance(auth_response, responses.OKEmpty):
 				# yes
-				result = self._m_rooms_users.get_all(False, False, False, room_id_filter, user_id_filter)
-				return responses.OK(result)
+				result = self._m_rooms_users.get_all(False, False, False, None, room_id_filter, user_id_filter, page)
+				return page.to_response(result)
 			else:
 				# Only return visible
 				# Filters by authorization
@@ -123,20 +121,15 @@ class RoomsUsers:
 				if isinstance(request.user, Registered):
 					user_id = request.user.user_id
 
-				auth_response = self._s_auth.authorize(Action.ROOMS_ACCESS_PUBLIC, request.user)
-				exclude_public = not isinstance(auth_response, responses.OKEmpty)
-
-				auth_response = self._s_auth.authorize(Action.ROOMS_ACCESS_PRIVATE, request.user)
-				exclude_private = not isinstance(auth_response, responses.OKEmpty)
-
-				auth_response = self._s_auth.authorize(Action.ROOMS_ACCESS_BANNED, request.user)
-				exclude_banned = not isinstance(auth_response, responses.OKEmpty)
+				exclude_public, exclude_private, exclude_banned = self._s_auth.exclusions(request.user, [
+					Action.ROOMS_ACCESS_PUBLIC, Action.ROOMS_ACCESS_PRIVATE, Action.ROOMS_ACCESS_BANNED
+				])
 
 				result = self._m_rooms_users.get_all(
 					exclude_banned, exclude_public, exclude_private,
-					user_id, room_id_filter, user_id_filter
+					user_id, room_id_filter, user_id_filter, page
 				)
-				return responses.OK(result)
+				return page.to_response(result)
 		except SQLAlchemyError as sqlae:
 			return responses.DatabaseException(sqlae)
 
@@ -144,13 +137,9 @@ class RoomsUsers:
 	# def update(self, request: 'th_Request', user_id: int) -> responses.Response:
 
 	def delete(self, request: 'th_Request') -> responses.Response:
-		validator = validation.Dict({
-			"room_id": validation.Integer(),
-			"user_id": validation.Integer()
-		}, allow_undefined_keys=not self._strict_requests)
 		try:
 			# Validation
-			try: validator.validate(request.body)
+			try: self._delete_validator.validate(request.body)
 			except validation.Error as ve: return responses.Unprocessable(ve.errors)
 
 			room_id = request.body["room_id"]
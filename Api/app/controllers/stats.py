@@ -0,0 +1,34 @@
+import typing
+if typing.TYPE_CHECKING:
+	from core.request import Request as th_Request
+	from services.auth import Auth as th_s_Auth
+
+from core import responses, validation
+from core.auth.action import Action
+
+
+class Stats:
+	# Stats are collected from the worker process which handles the request
+	def __init__(self, sources: typing.Dict[str, typing.Callable[[], dict]], s_auth: 'th_s_Auth', strict_requests: bool):
+		"""
+		Parameters
+		----------
+		sources Stats name and a function that collects them
+		"""
+		self._sources = sources
+		self._s_auth = s_auth
+		self._strict_requests = strict_requests
+
+		# Validators, built once
+		self._get_validator = validation.Dict({}, allow_none=True, allow_empty=True, allow_all_defined_keys_missing=True, allow_undefined_keys=not self._strict_requests)
+
+	def get(self, request: 'th_Request') -> responses.Response:
+		# Validation
+		try: self._get_validator.validate(request.body)
+		except validation.Error as ve: return responses.Unprocessable(ve.errors)
+
+		# Authorization
+		auth_response = self._s_auth.authorize(Action.STATS_ACCESS, request.user)
+		if not isinstance(auth_response, responses.OKEmpty): return auth_response
+
+		return responses.OK({name: source() for name, source in self._sources.items()})
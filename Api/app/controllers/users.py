@@ -4,44 +4,70 @@ if typing.TYPE_CHECKING:
 	from models.users_bans import UsersBans as th_m_UsersBans
 	from core.request import Request as th_Request
 	from services.auth import Auth as th_s_Auth
-	from argon2 import PasswordHasher as th_PasswordHasher
+	from services.passwords import Passwords as th_s_Passwords
 
 from argon2.exceptions import HashingError
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 from sqlalchemy.orm.exc import NoResultFound
 
 from models import orm
-from core import responses, validation
+from core import responses, validation, pagination, projection
 from core.auth.roles import Roles
 from core.auth.action import Action
 from core.auth.user import Registered
+from services.passwords import Busy
 
 
 class Users:
-	def __init__(self, m_users: 'th_m_Users', m_users_bans: 'th_m_UsersBans', s_auth: 'th_s_Auth', password_hasher: 'th_PasswordHasher', strict_requests: bool):
+	def __init__(self, m_users: 'th_m_Users', m_users_bans: 'th_m_UsersBans', s_auth: 'th_s_Auth', s_passwords: 'th_s_Passwords', page_size_max: int, strict_requests: bool):
 		self._m_users = m_users
 		self._m_users_bans = m_users_bans
 		self._s_auth = s_auth
-		self._password_hasher = password_hasher
+		self._s_passwords = s_passwords
+		self._page_size_max = page_size_max
 		self._strict_requests = strict_requests
 
-	def create(self, request: 'th_Request') -> responses.Response:
-		validator = validation.Dict({
+		# Validators, built once
+		self._create_validator = validation.Dict({
 			"name": validation.String(length_min=orm.Users.NAME_LEN_MIN, length_max=orm.Users.NAME_LEN_MAX),
 			"login": validation.String(length_min=orm.Users.LOGIN_LEN_MIN, length_max=orm.Users.LOGIN_LEN_MAX),
 			"password": validation.String(length_min=orm.Users.PASSWORD_LEN_MIN, length_max=orm.Users.PASSWORD_LEN_MAX)
 		}, allow_undefined_keys=not self._strict_requests)
+		self._get_validator = validation.Dict({
+			"user_id": validation.Integer()
+		}, allow_undefined_keys=not self._strict_requests)
+		# No filter keys since there's nothing to filter by (login is 'secret')
+		self._get_all_validator = validation.Dict({
+			"limit": validation.Integer(allow_none=True, minimum=1, maximum=self._page_size_max),
+			"after": validation.String(allow_none=True),
+			"stream": validation.Choice(pagination.STREAM_FORMATS, allow_none=True),
+			"fields": validation.Fields(projection.names_of(orm.Users), allow_none=True),
+		}, allow_none=True, allow_empty=True, allow_all_defined_keys_missing=True, allow_undefined_keys=not self._strict_requests)
+		self._update_validator = validation.Dict({
+			"user_id": validation.Integer(),
+			"role": validation.Integer(allow_none=True),
+			"login": validation.String(allow_none=True, length_min=orm.Users.LOGIN_LEN_MIN, length_max=orm.Users.LOGIN_LEN_MAX),
+			"name":  validation.String(allow_none=True, length_min=orm.Users.NAME_LEN_MIN, length_max=orm.Users.NAME_LEN_MAX),
+			"password": validation.String(allow_none=True, length_min=orm.Users.PASSWORD_LEN_MIN, length_max=orm.Users.PASSWORD_LEN_MAX)
+		}, allow_undefined_keys=not self._strict_requests)
+		self._delete_validator = validation.Dict({
+			"user_id": validation.Integer()
+		}, allow_undefined_keys=not self._strict_requests)
+		self._delete_self_validator = validation.Dict({}, allow_none=True, allow_empty=True, allow_all_defined_keys_missing=True, allow_undefined_keys=not self._strict_requests)
+
+	def create(self, request: 'th_Request') -> responses.Response:
 		try:
 			# Authorization
 			auth_response = self._s_auth.authorize(Action.USERS_CREATE, request.user)
 			if not isinstance(auth_response, responses.OKEmpty): return auth_response
 
 			# Validation
-			try: validator.validate(request.body)
+			try: self._create_validator.validate(request.body)
 			except validation.Error as ve: return responses.Unprocessable(ve.errors)
 
 			# Hash password
-			try: passhash = self._password_hasher.hash(request.body["password"])
+			try: passhash = self._s_passwords.hash(request.body["password"])
+			except Busy: return responses.ServiceUnavailableBusy()
 			except HashingError as he: return responses.InternalException(he, {"password": ["Could not be hashed"]})
 
 			# Query
@@ -54,12 +80,9 @@ class Users:
 			return responses.DatabaseException(sqlae)
 
 	def get(self, request: 'th_Request') -> responses.Response:
-		validator = validation.Dict({
-			"user_id": validation.Integer()
-		}, allow_undefined_keys=not self._strict_requests)
 		try:
 			# Validation
-			try: validator.validate(request.body)
+			try: self._get_validator.validate(request.body)
 			except validation.Error as ve: return responses.Unprocessable(ve.errors)
 
 			user_id = request.body["user_id"]
@@ -82,46 +105,42 @@ class Users:
 			return responses.DatabaseException(sqlae)
 
 	def get_all(self, request: 'th_Request') -> responses.Response:
-		validator = validation.Dict({}, allow_none=True, allow_empty=True, allow_all_defined_keys_missing=True, allow_undefined_keys=not self._strict_requests)
-		# No keys since there's nothing to filter by (login is 'secret')
 		try:
 			# Validation
-			try: validator.validate(request.body)
+			try: self._get_all_validator.validate(request.body)
 			except validation.Error as ve: return responses.Unprocessable(ve.errors)
 
+			# Pagination and projection
+			try: page = pagination.Page.from_body(request.body, self._page_size_max).make_conditional(request)
+			except ValueError: return responses.BadRequestCursor()
+			fields = projection.Fields.from_body(request.body)
+
 			auth_response = self._s_auth.authorize([Action.USERS_ACCESS_NOTBANNED, Action.USERS_ACCESS_BANNED], request.user)
 			if isinstance(auth_response, responses.OKEmpty):
 				# Can access all
-				result = self._m_users.get_all()
-				return responses.OK(result)
+				result = self._m_users.get_all(page=page, fields=fields)
+				return page.to_response(result)
 
 			auth_response = self._s_auth.authorize(Action.USERS_ACCESS_NOTBANNED, request.user)
 			if isinstance(auth_response, responses.OKEmpty):
 				# Can only access unbanned
-				result = self._m_users.get_all_unbanned()
-				return responses.OK(result)
+				result = self._m_users.get_all_unbanned(page=page, fields=fields)
+				return page.to_response(result)
 
 			auth_response = self._s_auth.authorize(Action.USERS_ACCESS_BANNED, request.user)
 			if isinstance(auth_response, responses.OKEmpty):
 				# Can only access banned
-				result = self._m_users.get_all_banned()
-				return responses.OK(result)
+				result = self._m_users.get_all_banned(page=page, fields=fields)
+				return page.to_response(result)
 
 			return auth_response
 		except SQLAlchemyError as sqlae:
 			return responses.DatabaseException(sqlae)
 
 	def update(self, request: 'th_Request') -> responses.Response:
-		validator = validation.Dict({
-			"user_id": validation.Integer(),
-			"role": validation.Integer(allow_none=True),
-			"login": validation.String(allow_none=True, length_min=orm.Users.LOGIN_LEN_MIN, length_max=orm.Users.LOGIN_LEN_MAX),
-			"name":  validation.String(allow_none=True, length_min=orm.Users.NAME_LEN_MIN, length_max=orm.Users.NAME_LEN_MAX),
-			"password": validation.String(allow_none=True, length_min=orm.Users.PASSWORD_LEN_MIN, length_max=orm.Users.PASSWORD_LEN_MAX)
-		}, allow_undefined_keys=not self._strict_requests)
 		try:
 			# Validation
-			try: validator.validate(request.body)
+			try: self._update_validator.validate(request.body)
 			except validation.Error as ve: return responses.Unprocessable(ve.errors)
 
 			user_id = request.body["user_id"]
@@ -145,7 +164,9 @@ class Users:
 
 			# Hash password
 			try:
-				passhash = None if "password" not in request.body else self._password_hasher.hash(request.body["password"])
+				passhash = None if "password" not in request.body else self._s_passwords.hash(request.body["password"])
+			except Busy:
+				return responses.ServiceUnavailableBusy()
 			except HashingError as he:
 				return responses.InternalException(he, {"password": ["Could not be hashed"]})
 
@@ -159,12 +180,9 @@ class Users:
 			return responses.DatabaseException(sqlae)
 
 	def delete(self, request: 'th_Request') -> responses.Response:
-		validator = validation.Dict({
-			"user_id": validation.Integer()
-		}, allow_undefined_keys=not self._strict_requests)
 		try:
 			# Validation
-			try: validator.validate(request.body)
+			try: self._delete_validator.validate(request.body)
 			except validation.Error as ve: return responses.Unprocessable(ve.errors)
 
 			user_id = request.body["user_id"]
@@ -173,19 +191,16 @@ class Users:
 			auth_response = self._s_auth.authorize(Action.USERS_DELETE, request.user, user_id)
 			if not isinstance(auth_response, responses.OKEmpty): return auth_response
 
-			# Query
-			try:
-				self._m_users.delete(user_id)
-				return responses.OKEmpty()
+			# Query, the user's rows are purged in the background
+			try: return responses.Accepted(self._m_users.delete(user_id))
 			except NoResultFound: return responses.NotFoundByID("user_id")
 		except SQLAlchemyError as sqlae:
 			return responses.DatabaseException(sqlae)
 
 	def delete_self(self, request: 'th_Request'):
-		validator = validation.Dict({}, allow_none=True, allow_empty=True, allow_all_defined_keys_missing=True, allow_undefined_keys=not self._strict_requests)
 		try:
 			# Validation
-			try: validator.validate(request.body)
+			try: self._delete_self_validator.validate(request.body)
 			except validation.Error as ve: return responses.Unprocessable(ve.errors)
 
 			# Authorization
@@ -196,10 +211,8 @@ class Users:
 			if not isinstance(request.user, Registered): return responses.UnauthorizedNotLoggedIn()
 			user: Registered = request.user
 
-			# Query
-			try:
-				self._m_users.delete(user.user_id)
-				return responses.OKEmpty()
+			# Query, the user's rows are purged in the background
+			try: return responses.Accepted(self._m_users.delete(user.user_id))
 			except NoResultFound: return responses.NotFoundByID("user_id")
 		except SQLAlchemyError as sqlae:
 			return responses.DatabaseException(sqlae)
@@ -8,25 +8,45 @@ from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 from sqlalchemy.orm.exc import NoResultFound
 
 from models import orm
-from core import responses, validation
+from core import responses, validation, pagination
 from core.auth.user import Registered
 from core.auth.action import Action
 
 
 class UsersBans:
-	def __init__(self, m_users_bans: 'th_m_UsersBans', s_auth: 'th_s_Auth', strict_requests: bool):
+	def __init__(self, m_users_bans: 'th_m_UsersBans', s_auth: 'th_s_Auth', page_size_max: int, strict_requests: bool):
 		self._m_users_bans = m_users_bans
 		self._s_auth = s_auth
+		self._page_size_max = page_size_max
 		self._strict_requests = strict_requests
 
-	def create(self, request: 'th_Request') -> responses.Response:
-		validator = validation.Dict({
+		# Validators, built once
+		self._create_validator = validation.Dict({
+			"user_id": validation.Integer(),
+			"reason": validation.String(length_min=orm.UsersBans.REASON_LEN_MIN, length_max=orm.UsersBans.REASON_LEN_MAX)
+		}, allow_undefined_keys=not self._strict_requests)
+		self._get_validator = validation.Dict({
+			"user_id": validation.Integer()
+		}, allow_undefined_keys=not self._strict_requests)
+		self._get_all_validator = validation.Dict({
+			"user_id": validation.Integer(allow_none=True),
+			"banner_id": validation.Integer(allow_none=True),
+			"limit": validation.Integer(allow_none=True, minimum=1, maximum=self._page_size_max),
+			"after": validation.String(allow_none=True),
+			"stream": validation.Choice(pagination.STREAM_FORMATS, allow_none=True),
+		}, allow_none=True, allow_empty=True, allow_all_defined_keys_missing=True, allow_undefined_keys=not self._strict_requests)
+		self._update_validator = validation.Dict({
 			"user_id": validation.Integer(),
 			"reason": validation.String(length_min=orm.UsersBans.REASON_LEN_MIN, length_max=orm.UsersBans.REASON_LEN_MAX)
 		}, allow_undefined_keys=not self._strict_requests)
+		self._delete_validator = validation.Dict({
+			"user_id": validation.Integer()
+		}, allow_undefined_keys=not self._strict_requests)
+
+	def create(self, request: 'th_Request') -> responses.Response:
 		try:
 			# Validation
-			try: validator.validate(request.body)
+			try: self._create_validator.validate(request.body)
 			except validation.Error as ve: return responses.Unprocessable(ve.errors)
 
 			# Authorization
@@ -46,12 +66,9 @@ class UsersBans:
 			return responses.DatabaseException(sqlae)
 
 	def get(self, request: 'th_Request') -> responses.Response:
-		validator = validation.Dict({
-			"user_id": validation.Integer()
-		}, allow_undefined_keys=not self._strict_requests)
 		try:
 			# Validation
-			try: validator.validate(request.body)
+			try: self._get_validator.validate(request.body)
 			except validation.Error as ve: return responses.Unprocessable(ve.errors)
 
 			user_id = request.body["user_id"]
@@ -69,45 +86,41 @@ class UsersBans:
 			return responses.DatabaseException(sqlae)
 
 	def get_all(self, request: 'th_Request') -> responses.Response:
-		validator = validation.Dict({
-			"user_id": validation.Integer(allow_none=True),
-			"banner_id": validation.Integer(allow_none=True),
-		}, allow_none=True, allow_empty=True, allow_all_defined_keys_missing=True, allow_undefined_keys=not self._strict_requests)
 		try:
 			# Validation
-			try: validator.validate(request.body)
+			try: self._get_all_validator.validate(request.body)
 			except validation.Error as ve: return responses.Unprocessable(ve.errors)
 
 			# Filters
 			user_id_filter = None if request.body is None else request.body.get("user_id")
 			banner_id_filter = None if request.body is None else request.body.get("banner_id")
 
+			# Pagination
+			try: page = pagination.Page.from_body(request.body, self._page_size_max)
+			except ValueError: return responses.BadRequestCursor()
+
 			# Authorization
 			# TODO check whatever is going on here
 			auth_response = self._s_auth.authorize(Action.USERS_ACCESS_BANNED, request.user)
 			if isinstance(auth_response, responses.OKEmpty):
 				# Can access all bans
-				result = self._m_users_bans.get_all(user_id_filter, banner_id_filter)
-				return responses.OK(result)
+				result = self._m_users_bans.get_all(user_id_filter, banner_id_filter, page)
+				return page.to_response(result)
 			else:
 				# Can only access visible bans
 				if isinstance(request.user, Registered):
-					result = self._m_users_bans.get_all_visible(request.user.user_id, user_id_filter, banner_id_filter)
-					return responses.OK(result)
+					result = self._m_users_bans.get_all_visible(request.user.user_id, user_id_filter, banner_id_filter, page)
+					return page.to_response(result)
 				else:
 					# An unregsitered user cannot get banned nor create bans
-					return responses.OK([])
+					return page.to_response([])
 		except SQLAlchemyError as sqlae:
 			return responses.DatabaseException(sqlae)
 
 	def update(self, request: 'th_Request') -> responses.Response:
-		validator = validation.Dict({
-			"user_id": validation.Integer(),
-			"reason": validation.String(length_min=orm.UsersBans.REASON_LEN_MIN, length_max=orm.UsersBans.REASON_LEN_MAX)
-		}, allow_undefined_keys=not self._strict_requests)
 		try:
 			# Validation
-			try: validator.validate(request.body)
+			try: self._update_validator.validate(request.body)
 			except validation.Error as ve: return responses.Unprocessable(ve.errors)
 
 			user_id = request.body["user_id"]
@@ -129,12 +142,9 @@ class UsersBans:
 			return responses.DatabaseException(sqlae)
 
 	def delete(self, request: 'th_Request') -> responses.Response:
-		validator = validation.Dict({
-			"user_id": validation.Integer()
-		}, allow_undefined_keys=not self._strict_requests)
 		try:
 			# Validation
-			try: validator.validate(request.body)
+			try: self._delete_validator.validate(request.body)
 			except validation.Error as ve: return responses.Unprocessable(ve.errors)
 
 			user_id = request.body["user_id"]
@@ -1,3 +1,4 @@
+import typing
 from enum import Enum, auto
 
 
@@ -43,3 +44,20 @@ class Action(Enum):
 	ROOMS_BANS_ACCESS = auto()
 	ROOMS_USERS_ACCESS = auto()
 	ROOMS_POSTS_ACCESS = auto()
+
+	STATS_ACCESS = auto()
+	JOBS_ACCESS = auto()
+
+	@property
+	def bit(self) -> int:
+		return _BITS[self]
+
+
+_BITS: typing.Dict[Action, int] = {action: 1 << index for index, action in enumerate(Action)}
+
+
+def to_mask(actions: typing.Iterable[Action]) -> int:
+	mask = 0
+	for action in actions:
+		mask |= _BITS[action]
+	return mask
@@ -3,8 +3,10 @@ import typing
 if typing.TYPE_CHECKING:
 	from core.responses import TH_ERRORS
 
+import hmac
 import json
 import base64
+import hashlib
 import pathlib
 import datetime
 import dataclasses
@@ -15,6 +17,7 @@ from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.asymmetric import padding
 from cryptography.hazmat.primitives.serialization import load_pem_private_key, load_pem_public_key
 from cryptography.hazmat.primitives.asymmetric.rsa import RSAPrivateKey, RSAPublicKey
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey, Ed25519PublicKey
 
 _STRING_ENCODING = "utf-8"
 
@@ -30,6 +33,11 @@ class Error(Exception):
 @dataclasses.dataclass
 class Claims:
 	user_id: int
+	# Stateless tokens only, see Token.stateless
+	role: typing.Optional[int] = None
+	cred_version: typing.Optional[int] = None
+	# Tickets only, the request path the ticket is valid for, see services.users.Users.from_ticket_string
+	scope: typing.Optional[str] = None
 
 
 @dataclasses.dataclass
@@ -40,7 +48,10 @@ class _Payload:
 
 	def to_dict(self) -> dict:
 		""" Would raise TypeError, if payload wasn't a dataclass instance """
-		return dataclasses.asdict(self)
+		payload_dict = dataclasses.asdict(self)
+		# Unset claims are left out, keeps older tokens' signatures valid
+		payload_dict["claims"] = {key: value for key, value in payload_dict["claims"].items() if value is not None}
+		return payload_dict
 
 
 class Token:
@@ -56,33 +67,63 @@ class Token:
 	def claims(self) -> Claims:
 		return self._payload.claims
 
+	@property
+	def stateless(self) -> bool:
+		"""
+		Stateless tokens carry the user's role and credentials version and aren't signed with the passhash,
+		so they can be verified without loading the user
+		"""
+		return self._payload.claims.cred_version is not None
+
+	@property
+	def issued_at(self) -> datetime.datetime:
+		"""
+		Raises
+		-------
+		ValueError
+		"""
+		return datetime.datetime.fromisoformat(self._payload.issued_at)
+
 	@staticmethod
-	def generate(claims: Claims, private_key: RSAPrivateKey, passhash: str) -> 'Token':
-		header = {"alg": "RS256"}
+	def generate(claims: Claims, keys: 'Keys', passhash: str = None) -> 'Token':
+		"""
+		Parameters
+		----------
+		passhash None for stateless tokens
+		"""
+		header = {"alg": keys.signing.NAME, "kid": keys.signing_kid}
 		payload = _Payload(
 			claims,
 			datetime.datetime.utcnow().isoformat()
 		)
 		payload_dict = payload.to_dict()
-		payload_dict["passhash"] = passhash
-		signature = _sign_bytes(private_key, _encode_dict(payload_dict))
+		if passhash is not None:
+			payload_dict["passhash"] = passhash
+		signature = keys.signing.sign(_encode_dict(payload_dict))
 		return Token(header, payload, signature)
 
-	def verify(self, public_key: RSAPublicKey, passhash: str, token_lifetime: datetime.timedelta) -> None:
+	def verify(self, keys: 'Keys', passhash: typing.Optional[str], token_lifetime: datetime.timedelta) -> None:
 		"""
+		Parameters
+		----------
+		passhash None for stateless tokens
+
 		Raises
 		------
 		jwt.Error
 		"""
+		algorithm = keys.get(self._header.get("kid"), self._header.get("alg"))
+
 		payload_dict = self._payload.to_dict()
-		payload_dict["passhash"] = passhash
+		if passhash is not None:
+			payload_dict["passhash"] = passhash
 
 		try:
-			_verify_bytes(public_key, self._signature, _encode_dict(payload_dict))
+			algorithm.verify(self._signature, _encode_dict(payload_dict))
 		except InvalidSignature:
 			raise Error("Invalid signature")
 
-		issued_at = datetime.datetime.fromisoformat(self._payload.issued_at)
+		issued_at = self.issued_at
 
 		if issued_at > datetime.datetime.utcnow():
 			raise Error("Invalid issue time")
@@ -110,6 +151,8 @@ class Token:
 		errors = []
 		try:
 			header = _decode_dict(header_str.encode(_STRING_ENCODING))
+			if not isinstance(header, dict):
+				errors.append("Header is not a dict")
 		except json.JSONDecodeError:
 			errors.append("Header is not a dict")
 		except (binascii.Error, UnicodeError):
@@ -141,69 +184,175 @@ class Token:
 		return f"{header_str}.{payload_str}.{signature_str}"
 
 
-def read_private_key(private_key_path: str, private_key_password: str = None) -> RSAPrivateKey:
+# region Algorithms
+class Algorithm:
+	NAME: str = None
+
+	def sign(self, data: bytes) -> bytes:
+		"""
+		Raises
+		-------
+		ValueError
+			The algorithm has no private key, can only verify
+		"""
+		raise NotImplementedError()
+
+	def verify(self, signature: bytes, data: bytes) -> None:
+		"""
+		Raises
+		-------
+		cryptography.exceptions.InvalidSignature
+		"""
+		raise NotImplementedError()
+
+
+class RS256(Algorithm):
+	""" RSA PSS with SHA-256 """
+	NAME = "RS256"
+
+	def __init__(self, private_key: RSAPrivateKey = None, public_key: RSAPublicKey = None):
+		self._private_key = private_key
+		self._public_key = public_key if public_key is not None else private_key.public_key()
+
+	def sign(self, data: bytes) -> bytes:
+		if self._private_key is None:
+			raise ValueError("No private key")
+		return self._private_key.sign(data, self._padding(), hashes.SHA256())
+
+	def verify(self, signature: bytes, data: bytes) -> None:
+		self._public_key.verify(signature, data, self._padding(), hashes.SHA256())
+
+	@staticmethod
+	def _padding() -> padding.PSS:
+		return padding.PSS(
+			mgf=padding.MGF1(hashes.SHA256()),
+			salt_length=padding.PSS.MAX_LENGTH
+		)
+
+
+class HS256(Algorithm):
+	""" HMAC with SHA-256, the same secret signs and verifies """
+	NAME = "HS256"
+	SECRET_LEN_MIN = 32
+
+	def __init__(self, secret: bytes):
+		if len(secret) < HS256.SECRET_LEN_MIN:
+			raise ValueError(f"Secret is shorter than {HS256.SECRET_LEN_MIN} bytes")
+		self._secret = secret
+
+	def sign(self, data: bytes) -> bytes:
+		return hmac.new(self._secret, data, hashlib.sha256).digest()
+
+	def verify(self, signature: bytes, data: bytes) -> None:
+		if not hmac.compare_digest(self.sign(data), signature):
+			raise InvalidSignature()
+
+
+class EdDSA(Algorithm):
+	""" Ed25519 """
+	NAME = "EdDSA"
+
+	def __init__(self, private_key: Ed25519PrivateKey = None, public_key: Ed25519PublicKey = None):
+		self._private_key = private_key
+		self._public_key = public_key if public_key is not None else private_key.public_key()
+
+	def sign(self, data: bytes) -> bytes:
+		if self._private_key is None:
+			raise ValueError("No private key")
+		return self._private_key.sign(data)
+
+	def verify(self, signature: bytes, data: bytes) -> None:
+		self._public_key.verify(signature, data)
+
+
+ALGORITHMS: typing.Dict[str, typing.Type[Algorithm]] = {
+	RS256.NAME: RS256,
+	HS256.NAME: HS256,
+	EdDSA.NAME: EdDSA,
+}
+
+
+class Keys:
 	"""
-	Raises
-	-------
-	ValueError
+	Tokens are signed with the signing key and verified with the key matching their header's kid
+	Retired keys can be added to keep their tokens valid after a rotation
 	"""
-	private_key = pathlib.Path(private_key_path)
-
-	if not private_key.exists():
-		raise ValueError("Provided private key file does not exist")
-	else:
-		private_key_loaded = load_pem_private_key(private_key.read_bytes(), private_key_password, default_backend())
-		if not isinstance(private_key_loaded, RSAPrivateKey):
-			raise ValueError("Provided private key is not a valid RSA public key.")
-		else:
-			return private_key_loaded
 
+	def __init__(self, signing_kid: str, signing: Algorithm):
+		self.signing_kid = signing_kid
+		self.signing = signing
+		self._keys: typing.Dict[str, Algorithm] = {signing_kid: signing}
+
+	def add(self, kid: str, algorithm: Algorithm) -> None:
+		self._keys[kid] = algorithm
+
+	def get(self, kid: typing.Optional[str], alg: typing.Optional[str]) -> Algorithm:
+		"""
+		Tokens without a kid are verified with the signing key
 
-def read_public_key(public_key_path: str) -> RSAPublicKey:
+		Raises
+		-------
+		jwt.Error
+		"""
+		algorithm = self._keys.get(self.signing_kid if kid is None else kid)
+		if algorithm is None:
+			raise Error("Unknown key")
+		# The key decides the algorithm, the header has to agree with it
+		if algorithm.NAME != alg:
+			raise Error("Wrong algorithm")
+		return algorithm
+
+
+def load_algorithm(name: str, private_key_path: str = None, private_key_password: bytes = None, public_key_path: str = None) -> Algorithm:
 	"""
+	Parameters
+	----------
+	name Algorithm's NAME
+	private_key_path PEM private key, or the secret for HS256. Without it the algorithm can only verify
+	public_key_path PEM public key, derived from the private key if missing. Unused by HS256
+
 	Raises
 	-------
 	ValueError
 	"""
-	public_key = pathlib.Path(public_key_path)
-
-	if not public_key.exists():
-		raise ValueError("Provided public key file does not exist")
-	else:
-		public_key_key_loaded = load_pem_public_key(public_key.read_bytes(), default_backend())
-		if not isinstance(public_key_key_loaded, RSAPublicKey):
-			raise ValueError("Provided public key is not a valid RSA public key.")
-		else:
-			return public_key_key_loaded
+	if name not in ALGORITHMS:
+		raise ValueError(f"Unknown token algorithm: {name}")
+	if name == HS256.NAME:
+		if private_key_path is None:
+			raise ValueError("HS256 requires a secret")
+		return HS256(_read_file(private_key_path))
+
+	key_types = {
+		RS256.NAME: (RSAPrivateKey, RSAPublicKey),
+		EdDSA.NAME: (Ed25519PrivateKey, Ed25519PublicKey),
+	}[name]
+	private_key = None
+	public_key = None
+	if private_key_path is not None:
+		private_key = load_pem_private_key(_read_file(private_key_path), private_key_password, default_backend())
+		if not isinstance(private_key, key_types[0]):
+			raise ValueError(f"Provided private key is not a valid {name} private key.")
+	if public_key_path is not None:
+		public_key = load_pem_public_key(_read_file(public_key_path), default_backend())
+		if not isinstance(public_key, key_types[1]):
+			raise ValueError(f"Provided public key is not a valid {name} public key.")
+	if private_key is None and public_key is None:
+		raise ValueError(f"{name} requires a private or a public key")
+	return ALGORITHMS[name](private_key, public_key)
+# endregion Algorithms
 
 
 # region Internal
-def _sign_bytes(private_key: RSAPrivateKey, data: bytes) -> bytes:
-	return private_key.sign(
-		data,
-		padding.PSS(
-			mgf=padding.MGF1(hashes.SHA256()),
-			salt_length=padding.PSS.MAX_LENGTH
-		),
-		hashes.SHA256()
-	)
-
-
-def _verify_bytes(public_key: RSAPublicKey, signature: bytes, data: bytes) -> None:
+def _read_file(path: str) -> bytes:
 	"""
 	Raises
 	-------
-	cryptography.exceptions.InvalidSignature
+	ValueError
 	"""
-	public_key.verify(
-		signature,
-		data,
-		padding.PSS(
-			mgf=padding.MGF1(hashes.SHA256()),
-			salt_length=padding.PSS.MAX_LENGTH
-		),
-		hashes.SHA256()
-	)
+	file = pathlib.Path(path)
+	if not file.exists():
+		raise ValueError(f"Provided key file does not exist: {path}")
+	return file.read_bytes()
 
 
 def _encode_bytes(data: bytes) -> bytes:
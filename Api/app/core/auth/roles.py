@@ -1,14 +1,21 @@
 import typing
-from core.auth.action import Action
+from core.auth.action import Action, to_mask
 
 
 class Role:
-	def __init__(self, actions: typing.List[Action]):
-		self.actions = actions
+	""" Immutable, the actions are precompiled to a bitmask """
+	__slots__ = ("actions", "mask", "id_")
 
-	@property
-	def id_(self):
-		return Roles.role_to_id(self)
+	def __init__(self, actions: typing.Iterable[Action]):
+		self.actions: typing.FrozenSet[Action] = frozenset(actions)
+		self.mask = to_mask(self.actions)
+		# Assigned by Roles
+		self.id_: int = None
+
+	def allows(self, actions: typing.Union[Action, typing.Iterable[Action]]) -> bool:
+		""" Whether the role has all of the actions """
+		mask = actions.bit if isinstance(actions, Action) else to_mask(actions)
+		return self.mask & mask == mask
 
 
 class Roles:
@@ -22,14 +29,14 @@ class Roles:
 		Action.ROOMS_ACCESS_PUBLIC,
 	])
 
-	USER = Role(actions=GUEST.actions + [
+	USER = Role(actions=GUEST.actions | {
 		Action.ROOMS_CREATE,
 		Action.POSTS_CREATE_PUBLIC,
 		Action.USERS_ACCESS_NOTBANNED,
 		Action.USERS_DELETE_SELF
-	])
+	})
 
-	ADMIN = Role(actions=USER.actions + [
+	ADMIN = Role(actions=USER.actions | {
 		Action.USERS_UPDATE_NAME,
 		Action.USERS_UPDATE_ROLE,
 		Action.USERS_BANS_CREATE,
@@ -42,7 +49,10 @@ class Roles:
 		Action.USERS_ACCESS_BANNED,
 		Action.ROOMS_ACCESS_PRIVATE,
 		Action.ROOMS_ACCESS_BANNED,
-	])
+
+		Action.STATS_ACCESS,
+		Action.JOBS_ACCESS,
+	})
 
 	# region Internal
 
@@ -64,6 +74,14 @@ class Roles:
 		-------
 		ValueError
 		"""
-		return Roles._ROLE_ORDER.index(role)
+		if role.id_ is None:
+			raise ValueError("Not a role of Roles")
+		return role.id_
 
 	# endregion Internal
+
+
+# Ids are stored, not looked up
+for _id, _role in enumerate(Roles._ROLE_ORDER):
+	_role.id_ = _id
+del _id, _role
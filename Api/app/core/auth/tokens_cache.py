@@ -0,0 +1,111 @@
+import typing
+if typing.TYPE_CHECKING:
+	from core.auth.user import Registered as th_Registered
+
+import time
+import datetime
+import threading
+import collections
+
+
+class _Entry:
+	__slots__ = ("user", "deadline")
+
+	def __init__(self, user: 'th_Registered', deadline: float):
+		self.user = user
+		self.deadline = deadline
+
+
+class TokensCache:
+	"""
+	Bounded LRU cache of verified token strings and the users they resolved to
+	An entry lives for at most ttl seconds and never past its token's expiry
+	Invalidation only reaches the current process, other workers catch up after ttl seconds
+	A token verified while its user was being invalidated isn't cached, see generation
+	"""
+
+	def __init__(self, max_size: int, ttl: float):
+		"""
+		Parameters
+		----------
+		max_size Max amount of cached tokens, 0 disables the cache
+		ttl Seconds a verified token is trusted without being verified again
+		"""
+		self._max_size = max_size
+		self._ttl = ttl
+		self._entries: typing.OrderedDict[str, _Entry] = collections.OrderedDict()
+		self._user_tokens: typing.Dict[int, typing.Set[str]] = {}
+		# Invalidations per user, only users who have been invalidated are in it
+		self._generations: typing.Dict[int, int] = {}
+		self._lock = threading.Lock()
+		self.hits = 0
+		self.misses = 0
+
+	def get(self, token: str) -> typing.Optional['th_Registered']:
+		with self._lock:
+			entry = self._entries.get(token)
+			if entry is None:
+				self.misses += 1
+				return None
+			if entry.deadline < time.monotonic():
+				self._remove(token)
+				self.misses += 1
+				return None
+			self._entries.move_to_end(token)
+			self.hits += 1
+			return entry.user
+
+	def generation(self, user_id: int) -> int:
+		""" Read before loading what a token is verified against, and passed to put """
+		with self._lock:
+			return self._generations.get(user_id, 0)
+
+	def put(self, token: str, user: 'th_Registered', expires_at: datetime.datetime, generation: int = None) -> None:
+		"""
+		Parameters
+		----------
+		expires_at The token's expiry, in UTC
+		generation The user's generation from before the token was verified, it isn't cached if the user has been invalidated since
+		"""
+		if self._max_size < 1:
+			return
+		lifetime = min(self._ttl, (expires_at - datetime.datetime.utcnow()).total_seconds())
+		if lifetime <= 0:
+			return
+		with self._lock:
+			if generation is not None and generation != self._generations.get(user.user_id, 0):
+				return
+			self._remove(token)
+			self._entries[token] = _Entry(user, time.monotonic() + lifetime)
+			self._user_tokens.setdefault(user.user_id, set()).add(token)
+			while len(self._entries) > self._max_size:
+				self._remove(next(iter(self._entries)))
+
+	def invalidate_user(self, user_id: int) -> None:
+		""" Forgets every cached token of the user """
+		with self._lock:
+			self._generations[user_id] = self._generations.get(user_id, 0) + 1
+			for token in list(self._user_tokens.get(user_id, ())):
+				self._remove(token)
+
+	def stats(self) -> dict:
+		with self._lock:
+			return {
+				"size": len(self._entries),
+				"max_size": self._max_size,
+				"hits": self.hits,
+				"misses": self.misses,
+			}
+
+	# region Internal
+	def _remove(self, token: str) -> None:
+		""" Lock must be held """
+		entry = self._entries.pop(token, None)
+		if entry is None:
+			return
+		tokens = self._user_tokens.get(entry.user.user_id)
+		if tokens is not None:
+			tokens.discard(token)
+			if not tokens:
+				del self._user_tokens[entry.user.user_id]
+	# endregion Internal
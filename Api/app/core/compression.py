@@ -0,0 +1,118 @@
+import typing
+
+import gzip
+import hashlib
+import threading
+import collections
+
+import flask
+
+try:
+	import brotli
+except ImportError:
+	brotli = None
+
+GZIP = "gzip"
+BROTLI = "br"
+
+
+class Compression:
+	"""
+	Compresses response bodies, with brotli when it's installed and accepted, gzip otherwise
+	Compressed bodies of responses with an ETag are cached by the body's digest, a repeated response isn't compressed again
+	"""
+
+	def __init__(self, min_size: int, level: int, cache_size: int):
+		"""
+		Parameters
+		----------
+		min_size Smaller bodies are sent as they are, compressing them costs more than it saves
+		level 1 (fastest) to 9 (smallest), used as brotli's quality too
+		cache_size Max amount of cached compressed bodies, 0 disables the cache
+		"""
+		self._min_size = min_size
+		self._level = level
+		self._cache_size = cache_size
+		self._cache: typing.OrderedDict[typing.Tuple[str, bytes], bytes] = collections.OrderedDict()
+		self._lock = threading.Lock()
+		self.compressed = 0
+		self.hits = 0
+		self.bytes_in = 0
+		self.bytes_out = 0
+
+	def after_request(self, response: flask.Response) -> flask.Response:
+		""" Registered as a flask after_request hook """
+		if response.status_code != 200 or response.direct_passthrough or response.is_streamed:
+			return response
+		if "Content-Encoding" in response.headers:
+			return response
+		response.vary.add("Accept-Encoding")
+		encoding = self._encoding(flask.request.accept_encodings)
+		if encoding is None:
+			return response
+		body = response.get_data()
+		if len(body) < self._min_size:
+			return response
+
+		etag = response.headers.get("ETag")
+		compressed = self._compress(encoding, body, etag)
+		response.set_data(compressed)
+		response.headers["Content-Encoding"] = encoding
+		if etag is not None and not etag.startswith("W/"):
+			# Same content in another encoding, a strong ETag would promise the same bytes
+			response.headers["ETag"] = f"W/{etag}"
+		return response
+
+	def stats(self) -> dict:
+		with self._lock:
+			return {
+				"cache_size": len(self._cache),
+				"cache_max_size": self._cache_size,
+				"compressed": self.compressed,
+				"cache_hits": self.hits,
+				"bytes_in": self.bytes_in,
+				"bytes_out": self.bytes_out,
+			}
+
+	# region Internal
+	@staticmethod
+	def _encoding(accepted: typing.Any) -> typing.Optional[str]:
+		""" Accepted is werkzeug's Accept-Encoding """
+		if brotli is not None and accepted[BROTLI] > 0:
+			return BROTLI
+		if accepted[GZIP] > 0:
+			return GZIP
+		return None
+
+	def _compress(self, encoding: str, body: bytes, etag: typing.Optional[str]) -> bytes:
+		# Only responses with an ETag are likely to be repeated, they're keyed by their body though
+		# ETags are scoped to a user and a request's filters, not its path, and may outlive their body
+		key = None if etag is None or self._cache_size < 1 else (encoding, hashlib.sha1(body).digest())
+		if key is not None:
+			with self._lock:
+				compressed = self._cache.get(key)
+				if compressed is not None:
+					self._cache.move_to_end(key)
+					self.hits += 1
+					self._count(body, compressed)
+					return compressed
+
+		if encoding == BROTLI:
+			compressed = brotli.compress(body, quality=self._level)
+		else:
+			compressed = gzip.compress(body, compresslevel=self._level)
+
+		with self._lock:
+			self.compressed += 1
+			self._count(body, compressed)
+			if key is not None:
+				self._cache[key] = compressed
+				while len(self._cache) > self._cache_size:
+					self._cache.popitem(last=False)
+		return compressed
+
+	def _count(self, body: bytes, compressed: bytes) -> None:
+		""" Lock must be held """
+		self.bytes_in += len(body)
+		self.bytes_out += len(compressed)
+	# endregion Internal
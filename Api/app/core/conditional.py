@@ -0,0 +1,133 @@
+"""
+ETags of listings, for conditional GETs
+A listing's ETag is computed from its rows' count, ids and latest modification, and the versions of their rooms or users
+Ids and versions are digested in order, so a row leaving a listing while another one enters it changes the ETag
+Versions are bumped by database triggers on writes which the rows' own dates don't show, see Database.psql
+A matching If-None-Match is answered after one aggregate query, without loading the rows
+"""
+import typing
+if typing.TYPE_CHECKING:
+	from sqlalchemy.orm.query import Query as th_Query
+	from sqlalchemy.orm.attributes import InstrumentedAttribute as th_Column
+	from core.request import Request as th_Request
+
+import json
+import hashlib
+import datetime
+
+from sqlalchemy import func, select, cast, literal, Text
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+
+
+class Columns:
+	""" The columns a listing's version is aggregated from """
+
+	def __init__(self, id_column: 'th_Column', *modified_columns: 'th_Column', version: 'th_Column' = None, version_key: str = None):
+		"""
+		Parameters
+		----------
+		modified_columns The first one which isn't null is the row's modification date
+		version Version column of the rows' rooms or users, digested with their ids
+		version_key The rows' key of the versioned table's id, the rows' own id by default
+		"""
+		self.id_key = id_column.key
+		self.modified_keys = [column.key for column in modified_columns]
+		self.version = version
+		self.version_key = self.id_key if version_key is None else version_key
+
+	def digest_versions(self, ids: typing.Any) -> typing.Any:
+		""" Of the ids' rows, the ids are a subquery or a collection """
+		id_column = self.version.table.c.id
+		pair = cast(id_column, Text) + ":" + cast(self.version, Text)
+		return select([_digest(pair, id_column)]).where(id_column.in_(ids)).as_scalar()
+
+
+class Conditional:
+	def __init__(self, request: 'th_Request'):
+		self._if_none_match = _parse_etags(request.if_none_match)
+		# Listings differ between users and between requests' filters
+		self._scope = json.dumps(
+			[getattr(request.user, "user_id", None), request.user.role.id_, request.body],
+			sort_keys=True, default=str
+		)
+		self.etag: typing.Optional[str] = None
+		self.last_modified: typing.Optional[datetime.datetime] = None
+		self.not_modified = False
+
+	def fetch(self, query: 'th_Query', columns: Columns) -> typing.List[typing.Any]:
+		"""
+		Sets the ETag, the rows aren't fetched if it's one of If-None-Match
+
+		Raises
+		-------
+		sqlalchemy.exc.SQLAlchemyError
+		"""
+		if self._if_none_match is not None:
+			rows = query.subquery()
+			id_column = rows.c[columns.id_key]
+			count, ids, modified, version = query.session.query(
+				func.count(),
+				_digest(cast(id_column, Text), id_column),
+				func.max(func.coalesce(*(rows.c[key] for key in columns.modified_keys))),
+				None if columns.version is None else columns.digest_versions(select([rows.c[columns.version_key]]))
+			).select_from(rows).one()
+			self._set_version(count, ids, modified, version)
+			if self._if_none_match == ["*"] or _weak(self.etag) in self._if_none_match:
+				self.not_modified = True
+				return []
+
+		# The ETag is computed from the fetched rows, they may have changed since the aggregate
+		result = query.all()
+		modified = [_modified(row, columns.modified_keys) for row in result]
+		modified = [date for date in modified if date is not None]
+		version = None
+		if columns.version is not None and len(result) > 0:
+			version = query.session.query(columns.digest_versions({_value(row, columns.version_key) for row in result})).scalar()
+		self._set_version(len(result), _digest_ids(_value(row, columns.id_key) for row in result), max(modified, default=None), version)
+		return result
+
+	# region Internal
+	def _set_version(self, count: int, ids: typing.Optional[str], modified: typing.Optional[datetime.datetime], version: typing.Optional[str]) -> None:
+		key = json.dumps([self._scope, count, ids, None if modified is None else modified.isoformat(), version])
+		self.etag = f'W/"{hashlib.sha1(key.encode("utf-8")).hexdigest()}"'
+		self.last_modified = modified
+	# endregion Internal
+
+
+# region Internal
+def _digest(value: typing.Any, order_by: typing.Any) -> typing.Any:
+	""" md5 of the values joined by commas in order, null without rows """
+	return func.md5(func.string_agg(value, aggregate_order_by(literal(","), order_by)))
+
+
+def _digest_ids(ids: typing.Iterable[int]) -> typing.Optional[str]:
+	""" Same as the database's _digest of the ids """
+	ids = sorted(ids)
+	if len(ids) == 0:
+		return None
+	return hashlib.md5(",".join(str(id_) for id_ in ids).encode("utf-8")).hexdigest()
+
+
+def _parse_etags(header: typing.Optional[str]) -> typing.Optional[typing.List[str]]:
+	if header is None:
+		return None
+	return [_weak(etag.strip()) for etag in header.split(",")]
+
+
+def _weak(etag: str) -> str:
+	""" Listings' JSON isn't byte for byte stable between serializers, ETags are compared weakly """
+	return etag[2:] if etag.startswith("W/") else etag
+
+
+def _value(row: typing.Any, key: str) -> typing.Any:
+	# Projected rows are dicts
+	return row[key] if isinstance(row, dict) else getattr(row, key)
+
+
+def _modified(row: typing.Any, keys: typing.List[str]) -> typing.Optional[datetime.datetime]:
+	for key in keys:
+		value = _value(row, key)
+		if value is not None:
+			return value
+	return None
+# endregion Internal
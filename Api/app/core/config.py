@@ -17,15 +17,54 @@ class Config:
 	APP_PORT = _Setting("App", "port", int, 4200)
 	APP_DEBUG = _Setting("App", "debug", bool, False)
 	APP_STRICT_REQUESTS = _Setting("App", "strict_requests", bool, True)
+	APP_PAGE_SIZE_MAX = _Setting("App", "page_size_max", int, 100)
+	APP_BULK_SIZE_MAX = _Setting("App", "bulk_size_max", int, 10000)
+	APP_BATCH_SIZE_MAX = _Setting("App", "batch_size_max", int, 20)
+	APP_BATCH_THREADS = _Setting("App", "batch_threads", int, 4)
+	APP_JSON_BACKEND = _Setting("App", "json_backend", str, "auto")
+	APP_COMPRESSION_MIN_SIZE = _Setting("App", "compression_min_size", int, 1024)
+	APP_COMPRESSION_LEVEL = _Setting("App", "compression_level", int, 6)
+	APP_COMPRESSION_CACHE_SIZE = _Setting("App", "compression_cache_size", int, 256)
+	APP_HOST = _Setting("App", "host", str, "127.0.0.1")
+	APP_WORKERS = _Setting("App", "workers", int, 0)
+	APP_THREADS = _Setting("App", "threads", int, 4)
+	TOKENS_ALGORITHM = _Setting("Tokens", "algorithm", str, "RS256")
+	TOKENS_KEY_ID = _Setting("Tokens", "key_id", str, "default")
+	TOKENS_RETIRED_KEYS = _Setting("Tokens", "retired_keys", str, "")
 	TOKENS_PRIVATE_KEY_PATH = _Setting("Tokens", "private_key_path", str, "./private.key")
 	TOKENS_PRIVATE_KEY_PROTECETD = _Setting("Tokens", "private_key_protected", bool, False)
 	TOKENS_PUBLIC_KEY_PATH = _Setting("Tokens", "public_key_path", str, "./public.pem")
 	TOKENS_LIFETIME = _Setting("Tokens", "lifetime", str, "PT1H")
+	TOKENS_TICKETS_LIFETIME = _Setting("Tokens", "tickets_lifetime", str, "PT30S")
+	TOKENS_STATELESS = _Setting("Tokens", "stateless", bool, False)
+	TOKENS_REVOCATIONS_REFRESH = _Setting("Tokens", "revocations_refresh", int, 10)
+	TOKENS_CACHE_SIZE = _Setting("Tokens", "cache_size", int, 10000)
+	TOKENS_CACHE_TTL = _Setting("Tokens", "cache_ttl", int, 60)
+	PASSWORDS_WORKERS = _Setting("Passwords", "workers", int, 1)
+	PASSWORDS_QUEUE_LIMIT = _Setting("Passwords", "queue_limit", int, 8)
+	PASSWORDS_TIMEOUT = _Setting("Passwords", "timeout", float, 10.0)
+	EVENTS_SUBSCRIPTIONS_MAX = _Setting("Events", "subscriptions_max", int, 2)
+	EVENTS_QUEUE_SIZE = _Setting("Events", "queue_size", int, 64)
+	EVENTS_KEEPALIVE = _Setting("Events", "keepalive", float, 15.0)
+	JOBS_WORKERS = _Setting("Jobs", "workers", int, 1)
+	JOBS_BATCH_SIZE = _Setting("Jobs", "batch_size", int, 1000)
+	JOBS_LEASE = _Setting("Jobs", "lease", float, 60.0)
+	JOBS_ATTEMPTS_MAX = _Setting("Jobs", "attempts_max", int, 5)
+	JOBS_RETRY_DELAY = _Setting("Jobs", "retry_delay", float, 10.0)
+	JOBS_POLL_INTERVAL = _Setting("Jobs", "poll_interval", float, 1.0)
+	JOBS_BATCH_PAUSE = _Setting("Jobs", "batch_pause", float, 0.0)
+	JOBS_POSTS_RETENTION = _Setting("Jobs", "posts_retention", float, 604800.0)
+	JOBS_POSTS_PURGE_HOURS = _Setting("Jobs", "posts_purge_hours", str, "2-5")
 	DB_HOST = _Setting("Database", "host", str, "localhost")
 	DB_PORT = _Setting("Database", "port", int, 5432)
 	DB_NAME = _Setting("Database", "name", str, "postgres")
 	DB_SCHEMA = _Setting("Database", "schema", str, "public")
 	DB_USER = _Setting("Database", "user", str, "postgres")
+	DB_POOL_SIZE = _Setting("Database", "pool_size", int, 5)
+	DB_MAX_OVERFLOW = _Setting("Database", "max_overflow", int, 10)
+	DB_POOL_TIMEOUT = _Setting("Database", "pool_timeout", int, 30)
+	DB_POOL_PRE_PING = _Setting("Database", "pool_pre_ping", bool, True)
+	DB_POOL_RECYCLE = _Setting("Database", "pool_recycle", int, -1)
 
 	_directory: Path = None
 	_filepath: Path = None
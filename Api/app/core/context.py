@@ -0,0 +1,57 @@
+import typing
+
+import flask
+
+T = typing.TypeVar("T")
+
+# Stored in the WSGI environ, so every (sub)request has its own values, even when sharing an app context
+_ENVIRON_KEY = "app.context"
+_MISSING = object()
+
+
+def memoized(namespace: str, key: typing.Hashable, compute: typing.Callable[[], T]) -> T:
+	"""
+	Computes a value once per HTTP request, outside of a request it's always computed
+	Exceptions aren't memoized
+	"""
+	values = _values(namespace)
+	if values is None:
+		return compute()
+	value = values.get(key, _MISSING)
+	if value is _MISSING:
+		value = compute()
+		values[key] = value
+	return value
+
+
+def forget(namespace: str, key: typing.Hashable = _MISSING) -> None:
+	""" Forgets a value, or the whole namespace if no key is given """
+	values = _values(namespace)
+	if values is None:
+		return
+	if key is _MISSING:
+		values.clear()
+	else:
+		values.pop(key, None)
+
+
+def shared(exclude: typing.Container[str] = ()) -> dict:
+	""" The current request's namespaces, but the excluded ones, the very same dicts so values memoized by one sharer are seen by all """
+	if not flask.has_request_context():
+		return {}
+	namespaces: typing.Dict[str, dict] = flask.request.environ.setdefault(_ENVIRON_KEY, {})
+	return {namespace: values for namespace, values in namespaces.items() if namespace not in exclude}
+
+
+def environ(namespaces: dict) -> dict:
+	""" WSGI environ values which make a sub-request use the namespaces, see shared """
+	return {_ENVIRON_KEY: namespaces}
+
+
+# region Internal
+def _values(namespace: str) -> typing.Optional[dict]:
+	if not flask.has_request_context():
+		return None
+	namespaces: typing.Dict[str, dict] = flask.request.environ.setdefault(_ENVIRON_KEY, {})
+	return namespaces.setdefault(namespace, {})
+# endregion Internal
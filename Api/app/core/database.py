@@ -2,23 +2,51 @@ import typing
 if typing.TYPE_CHECKING:
 	# noinspection PyProtectedMember
 	from sqlalchemy.engine import Engine as th_Engine
-	from sqlalchemy.orm.session import sessionmaker as th_sessionmaker
+	from sqlalchemy.orm.scoping import scoped_session as th_scoped_session
 	from sqlalchemy.orm.session import Session as th_Session
 
+import time
+import threading
 import contextlib
 import sqlalchemy.orm
+import sqlalchemy.pool
 import sqlalchemy.engine.url
 from sqlalchemy.exc import SQLAlchemyError
 
 _DRIVER = "postgresql+psycopg2"
 
 
+class _TimedQueuePool(sqlalchemy.pool.QueuePool):
+	""" QueuePool which keeps track of how long checkouts had to wait for a connection """
+
+	def __init__(self, *args, **kwargs):
+		super().__init__(*args, **kwargs)
+		self._stats_lock = threading.Lock()
+		self.checkouts = 0
+		self.wait_total = 0.0
+		self.wait_max = 0.0
+
+	def _do_get(self):
+		start = time.perf_counter()
+		try:
+			return super()._do_get()
+		finally:
+			wait = time.perf_counter() - start
+			with self._stats_lock:
+				self.checkouts += 1
+				self.wait_total += wait
+				self.wait_max = max(self.wait_max, wait)
+
+
 class Database:
 	_engine: 'th_Engine' = None
-	_sessionmaker: 'th_sessionmaker' = None
-	_session: 'th_Session' = None
+	_sessions: 'th_scoped_session' = None
 
-	def __init__(self, host: str, port: str, dbname: str, schema: str, user: str, password: str) -> None:
+	def __init__(
+			self, host: str, port: str, dbname: str, schema: str, user: str, password: str,
+			pool_size: int = 5, max_overflow: int = 10, pool_timeout: int = 30,
+			pool_pre_ping: bool = True, pool_recycle: int = -1
+		) -> None:
 		"""
 		Raises
 		-------
@@ -31,16 +59,77 @@ class Database:
 			connect_args={
 				"options": f"-csearch_path={schema}"
 			},
+			poolclass=_TimedQueuePool,
+			pool_size=pool_size,
+			max_overflow=max_overflow,
+			pool_timeout=pool_timeout,
+			pool_pre_ping=pool_pre_ping,
+			pool_recycle=pool_recycle,
 		)
 		# Test connection
-		self._engine.connect()
-		self._session_maker = sqlalchemy.orm.sessionmaker(bind=self._engine)
-		self._session = self._session_maker(autocommit=True)
+		self._engine.connect().close()
+		# A session per thread, removed at the end of each request (see close_session)
+		# Rows stay loaded after a scope commits, rows memoized for the request don't get refreshed on every access
+		self._sessions = sqlalchemy.orm.scoped_session(
+			sqlalchemy.orm.sessionmaker(bind=self._engine, autocommit=True, expire_on_commit=False)
+		)
 
 	def __del__(self):
+		# Only closes the pooled connections, recreating the pool as dispose does re-registers its events, which may be collected already
+		if self._engine is not None:
+			self._engine.pool.dispose()
+
+	def dispose(self) -> None:
+		"""
+		Closes all pooled connections
+		Must be called before forking, connections can't be shared between processes
+		"""
 		if self._engine is not None:
 			self._engine.dispose()
 
+	def close_session(self, _exception: BaseException = None) -> None:
+		"""
+		Closes the current thread's session and returns its connection to the pool
+		Registered as a flask teardown hook
+		"""
+		self._sessions.remove()
+
+	def connect_listener(self, *channels: str) -> typing.Any:
+		"""
+		A psycopg2 connection of its own which LISTENs on the channels, the caller closes it
+		Notifications are read with its poll() and notifies
+
+		Raises
+		-------
+		sqlalchemy.exc.SQLAlchemyError
+		psycopg2.Error
+		"""
+		connection = self._engine.connect()
+		# Detached, it doesn't hold on to one of the pool's connections for as long as it listens
+		connection.detach()
+		dbapi_connection = connection.connection.connection
+		# Checked out connections may still be in a transaction, pool_pre_ping's for one, autocommit can't be set within it
+		dbapi_connection.rollback()
+		# Notifications are only delivered outside of a transaction
+		dbapi_connection.autocommit = True
+		with dbapi_connection.cursor() as cursor:
+			for channel in channels:
+				cursor.execute(f'LISTEN "{channel}"')
+		return dbapi_connection
+
+	def pool_stats(self) -> dict:
+		pool: _TimedQueuePool = self._engine.pool
+		return {
+			"size": pool.size(),
+			"checked_in": pool.checkedin(),
+			"checked_out": pool.checkedout(),
+			"overflow": pool.overflow(),
+			"checkouts": pool.checkouts,
+			"wait_total": pool.wait_total,
+			"wait_average": pool.wait_total / pool.checkouts if pool.checkouts > 0 else 0.0,
+			"wait_max": pool.wait_max,
+		}
+
 	@property
 	@contextlib.contextmanager
 	def scope(self) -> typing.ContextManager['th_Session']:
@@ -52,10 +141,11 @@ class Database:
 		-------
 		sqlalchemy.exc.SQLAlchemyError
 		"""
-		self._session.begin(subtransactions=True)
+		session = self._sessions()
+		session.begin(subtransactions=True)
 		try:
-			yield self._session
-			self._session.commit()
+			yield session
+			session.commit()
 		except SQLAlchemyError:
-			self._session.rollback()
+			session.rollback()
 			raise
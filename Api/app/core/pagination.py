@@ -0,0 +1,175 @@
+import typing
+if typing.TYPE_CHECKING:
+	from sqlalchemy.orm.query import Query as th_Query
+	from sqlalchemy.orm.attributes import InstrumentedAttribute as th_Column
+	from core.request import Request as th_Request
+
+import json
+import base64
+import binascii
+import datetime
+
+from sqlalchemy import tuple_, false
+
+from core import responses, conditional
+
+_STRING_ENCODING = "utf-8"
+
+STREAM_JSON = "json"
+STREAM_NDJSON = "ndjson"
+STREAM_FORMATS = [STREAM_JSON, STREAM_NDJSON]
+
+
+def encode_cursor(key: typing.Sequence[typing.Any]) -> str:
+	""" Key starts with a datetime, followed by ints """
+	values = [key[0].isoformat()] + list(key[1:])
+	return base64.urlsafe_b64encode(json.dumps(values).encode(_STRING_ENCODING)).decode(_STRING_ENCODING)
+
+
+def decode_cursor(cursor: str) -> typing.Tuple[typing.Any, ...]:
+	"""
+	Raises
+	-------
+	ValueError
+	"""
+	try:
+		values = json.loads(base64.urlsafe_b64decode(cursor.encode(_STRING_ENCODING)).decode(_STRING_ENCODING))
+	except (binascii.Error, UnicodeError, json.JSONDecodeError):
+		raise ValueError("Corrupt")
+	if not isinstance(values, list) or len(values) < 2 or not isinstance(values[0], str):
+		raise ValueError("Corrupt")
+	if not all(type(value) is int for value in values[1:]):
+		raise ValueError("Corrupt")
+	try:
+		date = datetime.datetime.fromisoformat(values[0])
+	except ValueError:
+		raise ValueError("Corrupt")
+	return (date, *values[1:])
+
+
+class Page:
+	"""
+	Keyset pagination over (date_created, primary key)
+	Rows come after the cursor's key, so pages stay stable while rows are being added
+	"""
+
+	def __init__(self, limit: int, after: str = None):
+		"""
+		Parameters
+		----------
+		after Cursor of the last row of the previous page
+
+		Raises
+		-------
+		ValueError
+			Corrupt cursor
+		"""
+		self.limit = limit
+		self._after = None if after is None else decode_cursor(after)
+		self._keys: typing.List[str] = []
+		self._conditional: typing.Optional[conditional.Conditional] = None
+
+	@staticmethod
+	def from_body(body: typing.Optional[dict], limit_max: int) -> 'Page':
+		"""
+		For a body which has been validated with the "limit", "after" and "stream" keys
+
+		Raises
+		-------
+		ValueError
+			Corrupt cursor
+		"""
+		if body is None:
+			return Page(limit_max)
+		if body.get("stream") is not None:
+			return Stream(body["stream"], body.get("after"))
+		limit = body.get("limit")
+		return Page(limit_max if limit is None else limit, body.get("after"))
+
+	def apply(self, query: 'th_Query', date_column: 'th_Column', *id_columns: 'th_Column') -> 'th_Query':
+		""" Fetches one row more than the limit, to know if there's a next page """
+		return self._apply_keys(query, (date_column,) + id_columns).limit(self.limit + 1)
+
+	def make_conditional(self, request: 'th_Request') -> 'Page':
+		""" The page gets an ETag, and isn't fetched if it matches the request's If-None-Match """
+		self._conditional = conditional.Conditional(request)
+		return self
+
+	def fetch(self, query: 'th_Query', columns: conditional.Columns = None) -> typing.Iterable[typing.Any]:
+		"""
+		Parameters
+		----------
+		columns What the ETag of a conditional page is computed from
+		"""
+		if self._conditional is None or columns is None:
+			return query.all()
+		return self._conditional.fetch(query, columns)
+
+	def to_response(self, rows: typing.Iterable[typing.Any]) -> responses.Response:
+		if self._conditional is None:
+			return responses.OKPage(*self.split(rows))
+		if self._conditional.not_modified:
+			return responses.NotModified(self._conditional.etag, self._conditional.last_modified)
+		return responses.OKPage(*self.split(rows), self._conditional.etag, self._conditional.last_modified)
+
+	def split(self, rows: typing.List[typing.Any]) -> typing.Tuple[typing.List[typing.Any], typing.Optional[str]]:
+		"""
+		Returns
+		-------
+		The page's rows and the cursor to the next page, if there is one
+		"""
+		if len(rows) <= self.limit:
+			return rows, None
+		rows = rows[:self.limit]
+		last = rows[-1]
+		# Projected rows are dicts
+		if isinstance(last, dict):
+			return rows, encode_cursor([last[key] for key in self._keys])
+		return rows, encode_cursor([getattr(last, key) for key in self._keys])
+
+	# region Internal
+	def _apply_keys(self, query: 'th_Query', columns: typing.Tuple['th_Column', ...]) -> 'th_Query':
+		self._keys = [column.key for column in columns]
+		if self._after is not None:
+			if len(self._after) != len(columns):
+				# A cursor of another collection
+				return query.filter(false())
+			query = query.filter(tuple_(*columns) > tuple_(*self._after))
+		return query.order_by(*columns)
+	# endregion Internal
+
+
+class Stream(Page):
+	"""
+	All the rows after the cursor, without a limit
+	They're fetched from a server side cursor in batches while the response is being written, so memory stays bounded
+	"""
+	BATCH_SIZE = 500
+
+	def __init__(self, format_: str, after: str = None):
+		"""
+		Parameters
+		----------
+		format_ One of STREAM_FORMATS
+
+		Raises
+		-------
+		ValueError
+			Corrupt cursor
+		"""
+		super().__init__(0, after)
+		self.format = format_
+
+	def apply(self, query: 'th_Query', date_column: 'th_Column', *id_columns: 'th_Column') -> 'th_Query':
+		return self._apply_keys(query, (date_column,) + id_columns).yield_per(Stream.BATCH_SIZE)
+
+	def make_conditional(self, request: 'th_Request') -> 'Page':
+		# A stream's rows are only known once it's been written
+		return self
+
+	def fetch(self, query: 'th_Query', columns: conditional.Columns = None) -> typing.Iterable[typing.Any]:
+		# Executed by the response, outside of the model's transaction scope
+		return query
+
+	def to_response(self, rows: typing.Iterable[typing.Any]) -> responses.Response:
+		return responses.OKStream(rows, ndjson=self.format == STREAM_NDJSON)
@@ -0,0 +1,52 @@
+import typing
+if typing.TYPE_CHECKING:
+	from sqlalchemy.orm.query import Query as th_Query
+
+import dataclasses
+
+SEPARATOR = ","
+
+
+def names_of(entity: typing.Type) -> typing.List[str]:
+	""" An ORM dataclass' serialized fields, the ones which can be requested """
+	return [field.name for field in dataclasses.fields(entity)]
+
+
+def parse(fields: str) -> typing.List[str]:
+	return fields.split(SEPARATOR)
+
+
+class Fields:
+	"""
+	A sparse fieldset, only the requested columns are selected
+	Rows are returned as dicts, with the always selected columns (keys) too
+	"""
+
+	def __init__(self, names: typing.Sequence[str]):
+		self.names = tuple(names)
+
+	@staticmethod
+	def from_body(body: typing.Optional[dict]) -> typing.Optional['Fields']:
+		""" For a body which has been validated with the "fields" key """
+		if body is None or body.get("fields") is None:
+			return None
+		return Fields(parse(body["fields"]))
+
+	def apply(self, query: 'th_Query', entity: typing.Type, *always: str) -> 'th_Query':
+		names = dict.fromkeys(always + self.names)
+		return query.with_entities(*(getattr(entity, name) for name in names))
+
+	# noinspection PyMethodMayBeStatic
+	def rows(self, rows: typing.Iterable[typing.Any]) -> typing.Iterable[dict]:
+		""" Keeps lists as lists and iterables lazy, a streamed query is executed by its response, outside of the model's scope """
+		if isinstance(rows, list):
+			return [row._asdict() for row in rows]
+		return _as_dicts(rows)
+
+
+# region Internal
+def _as_dicts(rows: typing.Iterable[typing.Any]) -> typing.Iterator[dict]:
+	# A generator expression would call iter(rows), executing the query, as soon as it's created
+	for row in rows:
+		yield row._asdict()
+# endregion Internal
@@ -8,9 +8,15 @@ if typing.TYPE_CHECKING:
 # 		self.token = token
 
 
+# A body sent as a JSON array or as NDJSON is a dict of its items under this key, routes can still insert their keys
+BODY_ITEMS = "items"
+
+
 class Request:
 	#  header: Header,
-	def __init__(self, user: 'th_User', body: dict):
+	def __init__(self, user: 'th_User', body: dict, if_none_match: str = None):
 		# self.header = header
 		self.user = user
 		self.body = body
+		# ETags of a cached response, see core.conditional
+		self.if_none_match = if_none_match
@@ -3,9 +3,22 @@ if typing.TYPE_CHECKING:
 	TH_ERRORS = typing.Union[str, dict, typing.List[typing.Union[str, dict]]]
 
 import logging
+import datetime
+import itertools
 import flask
 from http import HTTPStatus
 
+from core import serialization
+
+
+# region Common
+def _set_validators(response: flask.Response, etag: typing.Optional[str], last_modified: typing.Optional[datetime.datetime]) -> None:
+	if etag is not None:
+		response.headers["ETag"] = etag
+	if last_modified is not None:
+		response.last_modified = last_modified
+# endregion Common
+
 
 # region Codeless core responses
 class Response:
@@ -30,7 +43,7 @@ class _Object(Response):
 		self.object = obj
 
 	def to_flask(self):
-		return flask.jsonify(self.object), self.code
+		return flask.Response(serialization.dumps(self.object), self.code, mimetype=serialization.MIMETYPE)
 
 
 class Errors(Response):
@@ -39,7 +52,7 @@ class Errors(Response):
 		self.errors = errors
 
 	def to_flask(self):
-		return flask.jsonify({"errors": self.errors}), self.code
+		return flask.Response(serialization.dumps({"errors": self.errors}), self.code, mimetype=serialization.MIMETYPE)
 # endregion Core Responses
 
 
@@ -53,6 +66,97 @@ class OK(_Object):
 		super().__init__(HTTPStatus.OK, obj)
 
 
+class OKPage(OK):
+	""" A page of a collection, the next page's cursor is in the Next-Cursor header """
+	HEADER_NEXT = "Next-Cursor"
+
+	def __init__(
+			self, obj: typing.List[typing.Any], next_cursor: typing.Optional[str],
+			etag: str = None, last_modified: datetime.datetime = None
+	):
+		super().__init__(obj)
+		self.next_cursor = next_cursor
+		self.etag = etag
+		self.last_modified = last_modified
+
+	def to_flask(self):
+		response = super().to_flask()
+		if self.next_cursor is not None:
+			response.headers[OKPage.HEADER_NEXT] = self.next_cursor
+		_set_validators(response, self.etag, self.last_modified)
+		return response
+
+
+class OKStream(OK):
+	""" Rows are serialized while they're being fetched, as a JSON array or as NDJSON """
+	MIMETYPE_NDJSON = "application/x-ndjson"
+	CHUNK_ROWS = 100
+
+	def __init__(self, rows: typing.Iterable[typing.Any], ndjson: bool = False):
+		"""
+		Raises
+		-------
+		sqlalchemy.exc.SQLAlchemyError
+			Rows of a query are fetched from here on
+		"""
+		super().__init__(iter(rows))
+		self.ndjson = ndjson
+
+	def to_flask(self):
+		return flask.Response(
+			flask.stream_with_context(self._chunks()), self.code,
+			mimetype=OKStream.MIMETYPE_NDJSON if self.ndjson else serialization.MIMETYPE
+		)
+
+	def _chunks(self) -> typing.Iterator[bytes]:
+		# Errors past this point can only cut the response short, which breaks the array or the last line
+		dumps = serialization.dumps
+		separator = b""
+		if not self.ndjson:
+			yield b"["
+		while True:
+			chunk = [dumps(row) for row in itertools.islice(self.object, OKStream.CHUNK_ROWS)]
+			if len(chunk) < 1:
+				break
+			if self.ndjson:
+				yield b"\n".join(chunk) + b"\n"
+			else:
+				yield separator + b",".join(chunk)
+				separator = b","
+		if not self.ndjson:
+			yield b"]"
+
+
+class OKEvents(Response):
+	""" Server-Sent Events, sent as they come for as long as the client stays connected """
+	MIMETYPE = "text/event-stream"
+
+	def __init__(self, events: typing.Iterator[bytes], on_close: typing.Callable[[], None]):
+		"""
+		Parameters
+		----------
+		events Encoded events and comments
+		on_close Called once the stream ends, however it ends
+		"""
+		super().__init__(HTTPStatus.OK)
+		self.events = events
+		self.on_close = on_close
+
+	def to_flask(self):
+		response = flask.Response(flask.stream_with_context(self.events), self.code, mimetype=OKEvents.MIMETYPE)
+		response.call_on_close(self.on_close)
+		response.headers["Cache-Control"] = "no-cache"
+		# Proxies mustn't buffer the events
+		response.headers["X-Accel-Buffering"] = "no"
+		return response
+
+
+class Accepted(_Object):
+	""" The work continues in the background, the object tells how to follow it """
+	def __init__(self, obj: typing.Any):
+		super().__init__(HTTPStatus.ACCEPTED, obj)
+
+
 class Created(_Empty):
 	def __init__(self):
 		super().__init__(HTTPStatus.CREATED)
@@ -65,6 +169,16 @@ class OKEmpty(_Empty):
 
 
 # region 3xx Redirection
+class NotModified(Response):
+	def __init__(self, etag: str, last_modified: datetime.datetime = None):
+		super().__init__(HTTPStatus.NOT_MODIFIED)
+		self.etag = etag
+		self.last_modified = last_modified
+
+	def to_flask(self):
+		response = flask.Response(status=self.code)
+		_set_validators(response, self.etag, self.last_modified)
+		return response
 # endregion 3xx Redirection
 
 
@@ -88,9 +202,16 @@ class MethodNotAllowed(_Empty):
 	def __init__(self):
 		super().__init__(HTTPStatus.METHOD_NOT_ALLOWED)
 
-# class BadRequest(_Errors):
-# 	def __init__(self, errors: 'TH_ERRORS'):
-# 		super().__init__(HTTPStatus.BAD_REQUEST, errors)
+
+class BadRequest(Errors):
+	def __init__(self, errors: dict):
+		super().__init__(HTTPStatus.BAD_REQUEST, errors)
+
+
+class BadRequestCursor(BadRequest):
+	""" A pagination cursor which wasn't given out by the API, or has been tampered with """
+	def __init__(self):
+		super().__init__({"keys": {"after": "Corrupt cursor"}})
 
 
 class Unprocessable(Errors):
@@ -140,4 +261,20 @@ class DatabaseException(InternalException):
 	def __init__(self, exception: Exception):
 		super().__init__(exception, {"Database": ["error"]})
 
+
+class ServiceUnavailable(Errors):
+	def __init__(self, errors: dict, retry_after: int = 1):
+		super().__init__(HTTPStatus.SERVICE_UNAVAILABLE, errors)
+		self.retry_after = retry_after
+
+	def to_flask(self):
+		response = super().to_flask()
+		response.headers["Retry-After"] = str(self.retry_after)
+		return response
+
+
+class ServiceUnavailableBusy(ServiceUnavailable):
+	def __init__(self):
+		super().__init__({"server": ["Busy"]})
+
 # endregion 5xx Server error
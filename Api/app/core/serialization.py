@@ -0,0 +1,79 @@
+"""
+JSON serialization of responses
+orjson is used when it's installed, the standard json module otherwise
+"""
+import typing
+import json
+import datetime
+import operator
+import dataclasses
+
+try:
+	import orjson
+except ImportError:
+	orjson = None
+
+MIMETYPE = "application/json"
+
+
+class _Row:
+	""" Reads a dataclass' fields as one tuple, with a getter built once per class """
+	def __init__(self, cls: typing.Type):
+		self.names = tuple(field.name for field in dataclasses.fields(cls))
+		# attrgetter only returns a tuple for more than one name
+		self.values = operator.attrgetter(*self.names, *self.names[:1]) if len(self.names) == 1 else operator.attrgetter(*self.names)
+
+	def to_dict(self, obj: typing.Any) -> dict:
+		return dict(zip(self.names, self.values(obj)))
+
+
+_rows: typing.Dict[typing.Type, _Row] = {}
+
+
+def _default(obj: typing.Any) -> typing.Any:
+	""" Types which the backends can't serialize on their own """
+	cls = type(obj)
+	row = _rows.get(cls)
+	if row is None:
+		if not dataclasses.is_dataclass(cls):
+			if isinstance(obj, datetime.date):
+				return obj.isoformat()
+			raise TypeError(f"Object of type {cls.__name__} is not JSON serializable")
+		row = _rows[cls] = _Row(cls)
+	return row.to_dict(obj)
+
+
+def _json_dumps(obj: typing.Any) -> bytes:
+	return json.dumps(obj, default=_default, separators=(",", ":")).encode("utf-8")
+
+
+def _orjson_dumps(obj: typing.Any) -> bytes:
+	# Dataclasses are passed through, the ORM's dataclasses aren't plain ones
+	return orjson.dumps(obj, default=_default, option=orjson.OPT_PASSTHROUGH_DATACLASS)
+
+
+BACKENDS: typing.Dict[str, typing.Callable[[typing.Any], bytes]] = {"json": _json_dumps}
+if orjson is not None:
+	BACKENDS["orjson"] = _orjson_dumps
+
+dumps: typing.Callable[[typing.Any], bytes] = BACKENDS.get("orjson", _json_dumps)
+
+
+def use_backend(name: str) -> None:
+	"""
+	Parameters
+	----------
+	name One of BACKENDS, or "auto" for the fastest one installed
+
+	Raises
+	-------
+	ValueError
+		Unknown or not installed backend
+	"""
+	global dumps
+	if name == "auto":
+		dumps = BACKENDS.get("orjson", _json_dumps)
+		return
+	if name not in BACKENDS:
+		raise ValueError(f"Unknown or not installed JSON backend: {name}")
+	dumps = BACKENDS[name]
@@ -1,5 +1,7 @@
 import typing
 
+from core import projection
+
 
 class Error(Exception):
 	def __init__(self, errors: typing.Union[typing.List, typing.Dict, str]):
@@ -19,17 +21,41 @@ def _register_errors(error_dict: typing.Dict[str, typing.List[str]], key: str, e
 
 
 class _Validator:
+	"""
+	Validators are built once and compiled to a predicate, valid input only goes through the predicate
+	Errors are only collected for invalid input
+	"""
 	def __init__(self, value_type: typing.Type, allow_none: bool = False):
 		self._value_type = value_type
 		self.allow_none = allow_none
 		self.name = self.__class__.__name__.lower()
+		self._is_valid: typing.Optional[typing.Callable[[typing.Any], bool]] = None
 
 	def _assert_type(self, obj):
 		obj_type = type(obj)
 		if obj_type is not self._value_type:
 			raise Error(f"Wrong type: {obj_type.__name__}, expected {self._value_type.__name__}")
 
+	def is_valid(self, obj: typing.Any = None) -> bool:
+		if self._is_valid is None:
+			self._is_valid = self._compile()
+		return self._is_valid(obj)
+
 	def validate(self, obj: typing.Any = None) -> None:
+		"""
+		Raises
+		-------
+		Error
+		"""
+		if self.is_valid(obj):
+			return
+		self._raise_errors(obj)
+
+	def _compile(self) -> typing.Callable[[typing.Any], bool]:
+		""" Returns a predicate which accepts exactly what _raise_errors doesn't raise for """
+		raise NotImplementedError()
+
+	def _raise_errors(self, obj: typing.Any) -> None:
 		"""
 		Raises
 		-------
@@ -42,7 +68,16 @@ class Boolean(_Validator):
 	def __init__(self, allow_none: bool = False):
 		super().__init__(bool, allow_none)
 
-	def validate(self, obj: typing.Any = None) -> None:
+	def _compile(self) -> typing.Callable[[typing.Any], bool]:
+		allow_none = self.allow_none
+
+		def is_valid(obj: typing.Any) -> bool:
+			if obj is None:
+				return allow_none
+			return type(obj) is bool
+		return is_valid
+
+	def _raise_errors(self, obj: typing.Any) -> None:
 		# Check none
 		if obj is None:
 			if not self.allow_none:
@@ -58,7 +93,24 @@ class Integer(_Validator):
 		self._minimum = minimum
 		self._maximum = maximum
 
-	def validate(self, obj: typing.Any = None) -> None:
+	def _compile(self) -> typing.Callable[[typing.Any], bool]:
+		allow_none = self.allow_none
+		minimum = self._minimum
+		maximum = self._maximum
+
+		def is_valid(obj: typing.Any) -> bool:
+			if obj is None:
+				return allow_none
+			if type(obj) is not int:
+				return False
+			if minimum is not None and obj < minimum:
+				return False
+			if maximum is not None and obj > maximum:
+				return False
+			return True
+		return is_valid
+
+	def _raise_errors(self, obj: typing.Any) -> None:
 		# Check none
 		if obj is None:
 			if not self.allow_none:
@@ -85,7 +137,24 @@ class String(_Validator):
 		self._length_min = length_min
 		self._length_max = length_max
 
-	def validate(self, obj: typing.Any = None) -> None:
+	def _compile(self) -> typing.Callable[[typing.Any], bool]:
+		allow_none = self.allow_none
+		length_min = self._length_min
+		length_max = self._length_max
+
+		def is_valid(obj: typing.Any) -> bool:
+			if obj is None:
+				return allow_none
+			if type(obj) is not str:
+				return False
+			if length_min is not None and len(obj) < length_min:
+				return False
+			if length_max is not None and len(obj) > length_max:
+				return False
+			return True
+		return is_valid
+
+	def _raise_errors(self, obj: typing.Any) -> None:
 		# Check none
 		if obj is None:
 			if not self.allow_none:
@@ -106,6 +175,109 @@ class String(_Validator):
 			raise Error(errors)
 
 
+class Choice(_Validator):
+	def __init__(self, choices: typing.List[str], allow_none: bool = False):
+		super().__init__(str, allow_none)
+		self._choices = choices
+
+	def _compile(self) -> typing.Callable[[typing.Any], bool]:
+		allow_none = self.allow_none
+		choices = frozenset(self._choices)
+
+		def is_valid(obj: typing.Any) -> bool:
+			if obj is None:
+				return allow_none
+			return type(obj) is str and obj in choices
+		return is_valid
+
+	def _raise_errors(self, obj: typing.Any) -> None:
+		# Check none
+		if obj is None:
+			if not self.allow_none:
+				raise Error("Is none")
+			return
+		# Check type
+		self._assert_type(obj)
+
+		if obj not in self._choices:
+			raise Error(f"Not one of {', '.join(self._choices)}")
+
+
+class Fields(_Validator):
+	""" A core.projection sparse fieldset, comma separated names """
+	def __init__(self, names: typing.List[str], allow_none: bool = False):
+		super().__init__(str, allow_none)
+		self._names = names
+
+	def _compile(self) -> typing.Callable[[typing.Any], bool]:
+		allow_none = self.allow_none
+		names = frozenset(self._names)
+
+		def is_valid(obj: typing.Any) -> bool:
+			if obj is None:
+				return allow_none
+			return type(obj) is str and names.issuperset(projection.parse(obj))
+		return is_valid
+
+	def _raise_errors(self, obj: typing.Any) -> None:
+		# Check none
+		if obj is None:
+			if not self.allow_none:
+				raise Error("Is none")
+			return
+		# Check type
+		self._assert_type(obj)
+
+		unknown = [name for name in projection.parse(obj) if name not in self._names]
+		if len(unknown) > 0:
+			raise Error(f"Unknown fields: {', '.join(unknown)}, expected some of {', '.join(self._names)}")
+
+
+class List(_Validator):
+	""" Only the list's length, its items are left to the caller, which may report on each of them """
+	def __init__(self, allow_none: bool = False, length_min: int = None, length_max: int = None):
+		super().__init__(list, allow_none)
+		self._length_min = length_min
+		self._length_max = length_max
+
+	def _compile(self) -> typing.Callable[[typing.Any], bool]:
+		allow_none = self.allow_none
+		length_min = self._length_min
+		length_max = self._length_max
+
+		def is_valid(obj: typing.Any) -> bool:
+			if obj is None:
+				return allow_none
+			if type(obj) is not list:
+				return False
+			if length_min is not None and len(obj) < length_min:
+				return False
+			if length_max is not None and len(obj) > length_max:
+				return False
+			return True
+		return is_valid
+
+	def _raise_errors(self, obj: typing.Any) -> None:
+		# Check none
+		if obj is None:
+			if not self.allow_none:
+				raise Error("Is none")
+			return
+		# Check type
+		self._assert_type(obj)
+
+		errors = []
+
+		if self._length_min is not None and len(obj) < self._length_min:
+			errors.append(f"Fewer items than {self._length_min}")
+
+		if self._length_max is not None and len(obj) > self._length_max:
+			errors.append(f"More items than {self._length_max}")
+
+		if len(errors) > 0:
+			raise Error(errors)
+
+
 class Dict(_Validator):
 	def __init__(
 					self,
@@ -128,7 +300,40 @@ class Dict(_Validator):
 		self._allow_all_defined_keys_missing = allow_all_defined_keys_missing
 		self._allow_undefined_keys = allow_undefined_keys
 
-	def validate(self, obj: typing.Any = None) -> None:
+	def _compile(self) -> typing.Callable[[typing.Any], bool]:
+		allow_none = self.allow_none
+		allow_empty = self._allow_empty
+		allow_all_defined_keys_missing = self._allow_all_defined_keys_missing
+		allow_undefined_keys = self._allow_undefined_keys
+		# (key, is the key required, value's predicate)
+		fields = tuple(
+			(key, not validator.allow_none, validator.is_valid)
+			for key, validator in self._defined.items()
+		)
+
+		def is_valid(obj: typing.Any) -> bool:
+			if obj is None:
+				return allow_none
+			if type(obj) is not dict:
+				return False
+			if len(obj) < 1:
+				return allow_empty
+			defined_keys_count = 0
+			for key, required, is_value_valid in fields:
+				if key in obj:
+					defined_keys_count += 1
+					if not is_value_valid(obj[key]):
+						return False
+				elif required:
+					return False
+			if not allow_undefined_keys and defined_keys_count != len(obj):
+				return False
+			if not allow_all_defined_keys_missing and defined_keys_count == 0:
+				return False
+			return True
+		return is_valid
+
+	def _raise_errors(self, obj: typing.Any) -> None:
 		# Check none
 		if obj is None:
 			if not self.allow_none:
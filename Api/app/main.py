@@ -3,7 +3,6 @@ import getpass
 import sys
 
 # External
-import argon2
 import click
 import flask
 import flask.json
@@ -12,17 +11,23 @@ import sqlalchemy.exc
 import werkzeug
 from flask_cors import CORS
 
+import controllers.jobs
 import controllers.login
 import controllers.posts
 import controllers.rooms
 import controllers.rooms_bans
 import controllers.rooms_users
+import controllers.stats
 import controllers.users
 import controllers.users_bans
 import core.auth.jwt
+import core.auth.tokens_cache
 import core.config
 import core.database
 import core.responses
+import core.serialization
+import core.compression
+import models.jobs
 import models.posts
 import models.rooms
 import models.rooms_bans
@@ -31,7 +36,11 @@ import models.users
 import models.users_bans
 import routes.routes
 import services.auth
+import services.batch
+import services.passwords
+import services.post_events
 import services.request
+import services.revocations
 import services.users
 
 
@@ -55,46 +64,107 @@ def handle_exception(e):
 	}).to_flask()
 
 
-def main():
-	# Config
-	cfg = core.config.Config(sys.path[0], "config")
-	private_key_pass = getpass.getpass(prompt=f"Private key password: ") if cfg[cfg.TOKENS_PRIVATE_KEY_PROTECETD] else None
-	private_key = core.auth.jwt.read_private_key(cfg[cfg.TOKENS_PRIVATE_KEY_PATH], private_key_pass)
-	public_key = core.auth.jwt.read_public_key(cfg[cfg.TOKENS_PUBLIC_KEY_PATH])
+def create_app(cfg: core.config.Config, database: core.database.Database) -> flask.Flask:
+	"""
+	Builds the WSGI app, shared by the development server and serve.py
+
+	Raises
+	-------
+	ValueError
+		Invalid token keys or JSON backend
+	"""
+	token_keys = read_token_keys(cfg)
 	tokens_lifetime = isodate.parse_duration(cfg[cfg.TOKENS_LIFETIME])
+	tickets_lifetime = isodate.parse_duration(cfg[cfg.TOKENS_TICKETS_LIFETIME])
 	strict_requests = cfg[cfg.APP_STRICT_REQUESTS]
+	page_size_max = cfg[cfg.APP_PAGE_SIZE_MAX]
 	# Core
-	password_hasher = argon2.PasswordHasher()
-	database = connect_db(cfg)
+	tokens_cache = core.auth.tokens_cache.TokensCache(cfg[cfg.TOKENS_CACHE_SIZE], cfg[cfg.TOKENS_CACHE_TTL])
+	compression = core.compression.Compression(
+		cfg[cfg.APP_COMPRESSION_MIN_SIZE], cfg[cfg.APP_COMPRESSION_LEVEL], cfg[cfg.APP_COMPRESSION_CACHE_SIZE]
+	)
 	# Models
+	m_jobs			= models.jobs.			Jobs(database)
 	m_rooms_bans	= models.rooms_bans.	RoomsBans(database)
 	m_rooms_users	= models.rooms_users.	RoomsUsers(database)
 	m_posts			= models.posts.			Posts(database)
-	m_rooms			= models.rooms.			Rooms(database, m_rooms_users, m_rooms_bans, m_posts)
+	m_rooms			= models.rooms.			Rooms(database, m_rooms_users, m_rooms_bans, m_posts, m_jobs)
 	m_users_bans	= models.users_bans.	UsersBans(database)
-	m_users			= models.users.			Users(database, m_users_bans, m_rooms, m_rooms_users, m_rooms_bans, m_posts)
+	m_users			= models.users.			Users(database, m_users_bans, m_rooms, m_rooms_users, m_rooms_bans, m_posts, m_jobs, tokens_cache)
 	# Services
-	s_users			= services.users.		Users(m_users, public_key, tokens_lifetime)
+	s_revocations	= services.revocations.	Revocations(m_users, m_users_bans, tokens_lifetime, cfg[cfg.TOKENS_REVOCATIONS_REFRESH])
+	s_users			= services.users.		Users(m_users, token_keys, tokens_lifetime, tickets_lifetime, tokens_cache, s_revocations)
 	s_request		= services.request.		Request(s_users, strict_requests)
 	s_auth			= services.auth.		Auth()
+	s_batch			= services.batch.		Batch(cfg[cfg.APP_BATCH_SIZE_MAX], cfg[cfg.APP_BATCH_THREADS], strict_requests)
+	s_passwords		= services.passwords.	Passwords(cfg[cfg.PASSWORDS_WORKERS], cfg[cfg.PASSWORDS_QUEUE_LIMIT], cfg[cfg.PASSWORDS_TIMEOUT])
+	s_post_events	= services.post_events.	PostEvents(database, m_posts, cfg[cfg.EVENTS_SUBSCRIPTIONS_MAX], cfg[cfg.EVENTS_QUEUE_SIZE])
 	# Controllers
-	c_login			= controllers.login.		Login(m_users, m_users_bans, s_auth, password_hasher, private_key, strict_requests)
-	c_users			= controllers.users.		Users(m_users, m_users_bans, s_auth, password_hasher, strict_requests)
-	c_users_bans	= controllers.users_bans.	UsersBans(m_users_bans, s_auth, strict_requests)
-	c_rooms			= controllers.rooms.		Rooms(m_rooms, m_rooms_bans, m_rooms_users, s_auth, strict_requests)
-	c_rooms_bans	= controllers.rooms_bans.	RoomsBans(m_rooms_bans, m_rooms, m_rooms_users, s_auth, strict_requests)
-	c_rooms_users	= controllers.rooms_users.	RoomsUsers(m_rooms_users, m_rooms, m_rooms_bans, s_auth, strict_requests)
-	c_posts			= controllers.posts.		Posts(m_posts, m_rooms, m_rooms_users, m_rooms_bans, s_auth, strict_requests)
+	c_login			= controllers.login.		Login(m_users, m_users_bans, s_auth, s_passwords, token_keys, cfg[cfg.TOKENS_STATELESS], strict_requests)
+	c_users			= controllers.users.		Users(m_users, m_users_bans, s_auth, s_passwords, page_size_max, strict_requests)
+	c_users_bans	= controllers.users_bans.	UsersBans(m_users_bans, s_auth, page_size_max, strict_requests)
+	c_rooms			= controllers.rooms.		Rooms(m_rooms, m_rooms_bans, m_rooms_users, s_auth, page_size_max, strict_requests)
+	c_rooms_bans	= controllers.rooms_bans.	RoomsBans(m_rooms_bans, m_rooms, m_rooms_users, s_auth, page_size_max, strict_requests)
+	c_rooms_users	= controllers.rooms_users.	RoomsUsers(m_rooms_users, m_rooms, m_rooms_bans, s_auth, page_size_max, strict_requests)
+	c_posts			= controllers.posts.		Posts(m_posts, m_rooms, m_rooms_users, m_rooms_bans, s_auth, s_post_events, page_size_max, cfg[cfg.APP_BULK_SIZE_MAX], cfg[cfg.EVENTS_KEEPALIVE], strict_requests)
+	c_jobs			= controllers.jobs.		Jobs(m_jobs, s_auth, page_size_max, strict_requests)
+	c_stats			= controllers.stats.		Stats({
+		"database_pool": database.pool_stats,
+		"tokens_cache": tokens_cache.stats,
+		"revocations": s_revocations.stats,
+		"passwords": s_passwords.stats,
+		"compression": compression.stats,
+		"post_events": s_post_events.stats,
+		"batch": s_batch.stats,
+	}, s_auth, strict_requests)
 	# App
 	app = flask.Flask(__name__)
-	CORS(app)
+	CORS(app, expose_headers=[core.responses.OKPage.HEADER_NEXT, "ETag"])
 	app.json_encoder = AppJsonEncoder
+	core.serialization.use_backend(cfg[cfg.APP_JSON_BACKEND])
 	# noinspection PyProtectedMember,PyTypeChecker
 	app._register_error_handler(None, werkzeug.exceptions.HTTPException, handle_exception)
+	app.after_request(compression.after_request)
+	# Each request gets its own database session
+	app.teardown_appcontext(database.close_session)
 	# Set up routes
-	app.register_blueprint(routes.routes.init(s_request, c_login, c_users, c_users_bans, c_rooms, c_rooms_bans, c_rooms_users, c_posts))
-	# Start the app
-	app.run(port=cfg[cfg.APP_PORT], debug=cfg[cfg.APP_DEBUG], threaded=False)
+	app.register_blueprint(routes.routes.init(s_request, s_batch, c_login, c_users, c_users_bans, c_rooms, c_rooms_bans, c_rooms_users, c_posts, c_stats, c_jobs))
+	return app
+
+
+def main():
+	cfg = core.config.Config(sys.path[0], "config")
+	app = create_app(cfg, connect_db(cfg))
+	# Development server, see serve.py for production
+	app.run(port=cfg[cfg.APP_PORT], debug=cfg[cfg.APP_DEBUG], threaded=True)
+
+
+def read_token_keys(cfg: core.config.Config) -> core.auth.jwt.Keys:
+	"""
+	Raises
+	-------
+	ValueError
+	"""
+	algorithm = cfg[cfg.TOKENS_ALGORITHM]
+	private_key_pass = None
+	if cfg[cfg.TOKENS_PRIVATE_KEY_PROTECETD] and algorithm != core.auth.jwt.HS256.NAME:
+		private_key_pass = getpass.getpass(prompt=f"Private key password: ").encode("utf-8")
+	keys = core.auth.jwt.Keys(cfg[cfg.TOKENS_KEY_ID], core.auth.jwt.load_algorithm(
+		algorithm, cfg[cfg.TOKENS_PRIVATE_KEY_PATH], private_key_pass,
+		None if algorithm == core.auth.jwt.HS256.NAME else cfg[cfg.TOKENS_PUBLIC_KEY_PATH]
+	))
+	# Format: kid:algorithm:path, ...
+	# Path is the public key, or the secret for HS256
+	for retired_key in filter(None, map(str.strip, cfg[cfg.TOKENS_RETIRED_KEYS].split(","))):
+		try:
+			kid, algorithm, path = retired_key.split(":", 2)
+		except ValueError:
+			raise ValueError(f"Invalid retired key: {retired_key}")
+		if algorithm == core.auth.jwt.HS256.NAME:
+			keys.add(kid, core.auth.jwt.load_algorithm(algorithm, private_key_path=path))
+		else:
+			keys.add(kid, core.auth.jwt.load_algorithm(algorithm, public_key_path=path))
+	return keys
 
 
 def connect_db(cfg: core.config.Config) -> core.database.Database:
@@ -116,7 +186,9 @@ def connect_db(cfg: core.config.Config) -> core.database.Database:
 			db = core.database.Database(
 				db_args["host"], db_args["port"],
 				db_args["name"], db_args["schema"],
-				db_args["user"], getpass.getpass(prompt=f"{db_args['user']} password: ")
+				db_args["user"], getpass.getpass(prompt=f"{db_args['user']} password: "),
+				cfg[cfg.DB_POOL_SIZE], cfg[cfg.DB_MAX_OVERFLOW], cfg[cfg.DB_POOL_TIMEOUT],
+				cfg[cfg.DB_POOL_PRE_PING], cfg[cfg.DB_POOL_RECYCLE]
 			)
 			# Success, save missing cfg values
 			for key in cfg_args:
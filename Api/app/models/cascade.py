@@ -0,0 +1,85 @@
+"""
+Set-based deletion of rooms and users, along with every row which references them
+A statement per referencing table, however many rooms are deleted
+Purges delete the same rows in bounded batches, a transaction each, see services.jobs
+"""
+import typing
+if typing.TYPE_CHECKING:
+	from sqlalchemy.orm.session import Session as th_Session
+	from sqlalchemy.sql.elements import ColumnElement as th_Condition
+
+	th_Steps = typing.List[typing.Tuple[typing.Type, th_Condition]]
+
+from sqlalchemy import or_, select, tuple_
+
+from models import orm
+from core import context
+
+
+def room_steps(condition: 'th_Condition') -> 'th_Steps':
+	""" The rooms which match the condition, after their posts, users and bans """
+	room_ids = select([orm.Rooms.id]).where(condition)
+	return [
+		(orm.Posts, orm.Posts.room_id.in_(room_ids)),
+		(orm.RoomsUsers, orm.RoomsUsers.room_id.in_(room_ids)),
+		(orm.RoomsBans, orm.RoomsBans.room_id.in_(room_ids)),
+		(orm.Rooms, condition),
+	]
+
+
+def user_steps(condition: 'th_Condition') -> 'th_Steps':
+	""" The users who match the condition, after their rooms, posts, memberships and bans, and the bans they've given """
+	user_ids = select([orm.Users.id]).where(condition)
+	return [
+		(orm.UsersBans, or_(orm.UsersBans.user_id.in_(user_ids), orm.UsersBans.banner_id.in_(user_ids))),
+		(orm.RoomsBans, orm.RoomsBans.banner_id.in_(user_ids)),
+		(orm.RoomsUsers, orm.RoomsUsers.user_id.in_(user_ids)),
+		(orm.Posts, orm.Posts.user_id.in_(user_ids)),
+		*room_steps(orm.Rooms.user_id.in_(user_ids)),
+		(orm.Users, condition),
+	]
+
+
+def delete(scope: 'th_Session', steps: 'th_Steps') -> int:
+	"""
+	Runs every step with one statement
+
+	Returns
+	-------
+	The amount of rows deleted by the last step
+
+	Raises
+	-------
+	sqlalchemy.exc.SQLAlchemyError
+	"""
+	count = 0
+	for entity, condition in steps:
+		count = scope.query(entity).filter(condition).delete(synchronize_session=False)
+	return count
+
+
+def purge(scope: 'th_Session', steps: 'th_Steps', batch_size: int) -> int:
+	"""
+	Deletes at most batch_size rows of the first step which has any left
+
+	Returns
+	-------
+	The amount of deleted rows, 0 once every step is done
+
+	Raises
+	-------
+	sqlalchemy.exc.SQLAlchemyError
+	"""
+	for entity, condition in steps:
+		keys = entity.__mapper__.primary_key
+		batch = scope.query(*keys).filter(condition).limit(batch_size)
+		count = scope.query(entity).filter(tuple_(*keys).in_(batch)).delete(synchronize_session=False)
+		if count > 0:
+			return count
+	return 0
+
+
+def forget_rooms() -> None:
+	""" Forgets the memoized rooms and memberships, any of them may have been deleted """
+	for namespace in ("rooms", "rooms_access", "rooms_users", "rooms_users_by_room"):
+		context.forget(namespace)
@@ -0,0 +1,175 @@
+import typing
+if typing.TYPE_CHECKING:
+	from core.database import Database as th_Database
+	from core.pagination import Page as th_Page
+	from datetime import datetime as th_datetime, timedelta as th_timedelta
+
+from sqlalchemy import and_, exists, func, literal, select
+from sqlalchemy.dialects.postgresql import insert
+
+from models import orm
+from core import conditional
+
+# What the listings' ETags are computed from, a job's progress moves date_updated
+_VERSION_COLUMNS = conditional.Columns(orm.Jobs.id, orm.Jobs.date_updated)
+
+_jobs = orm.Jobs.__table__
+# The claim's subquery, aliased so it isn't correlated to the UPDATE of the same table
+_runnable = _jobs.alias("runnable_jobs")
+
+
+class Jobs:
+	def __init__(self, database: 'th_Database'):
+		self._database = database
+
+	def create(self, kind: str, target_id: int) -> orm.Jobs:
+		"""
+		Joins the caller's scope, the job is only visible to workers once it commits
+
+		Raises
+		-------
+		sqlalchemy.exc.SQLAlchemyError
+		"""
+		with self._database.scope as scope:
+			orm_job = orm.Jobs(kind=kind, target_id=target_id)
+			scope.add(orm_job)
+			scope.flush()
+			# Server defaults, for the response
+			scope.refresh(orm_job)
+			return orm_job
+
+	def enqueue(self, kind: str, target_id: int = 0, created_since: 'th_datetime' = None) -> bool:
+		"""
+		Creates the job unless the same one is already pending or running
+
+		Parameters
+		----------
+		created_since If set, the job is also skipped if the same one has been created since then, whatever its status
+
+		Returns
+		-------
+		Whether the job was created
+
+		Raises
+		-------
+		sqlalchemy.exc.SQLAlchemyError
+		"""
+		statement = insert(_jobs).values(kind=kind, target_id=target_id)
+		if created_since is not None:
+			# Decided by the database, so that workers of other processes see each other's jobs
+			created = exists().where(and_(_jobs.c.kind == kind, _jobs.c.target_id == target_id, _jobs.c.date_created >= created_since))
+			statement = insert(_jobs).from_select(
+				[_jobs.c.kind, _jobs.c.target_id], select([literal(kind), literal(target_id)]).where(~created)
+			)
+		with self._database.scope as scope:
+			result = scope.execute(
+				statement.on_conflict_do_nothing(
+					index_elements=[_jobs.c.kind, _jobs.c.target_id],
+					index_where=_jobs.c.status.in_([orm.Jobs.STATUS_PENDING, orm.Jobs.STATUS_RUNNING])
+				)
+			)
+			return result.rowcount > 0
+
+	def get(self, job_id: int) -> orm.Jobs:
+		"""
+		Raises
+		-------
+		sqlalchemy.orm.exc.NoResultFound
+			Job with job_id doesn't exist
+		sqlalchemy.exc.SQLAlchemyError
+		"""
+		with self._database.scope as scope:
+			return scope.query(orm.Jobs).filter(orm.Jobs.id == job_id).one()
+
+	def get_all(self, status_filter: str = None, kind_filter: str = None, page: 'th_Page' = None) -> typing.Iterable[orm.Jobs]:
+		"""
+		Raises
+		-------
+		sqlalchemy.exc.SQLAlchemyError
+		"""
+		with self._database.scope as scope:
+			query = scope.query(orm.Jobs)
+			if status_filter is not None:
+				query = query.filter(orm.Jobs.status == status_filter)
+			if kind_filter is not None:
+				query = query.filter(orm.Jobs.kind == kind_filter)
+			if page is not None:
+				query = page.apply(query, orm.Jobs.date_created, orm.Jobs.id)
+			return query.all() if page is None else page.fetch(query, _VERSION_COLUMNS)
+
+	def claim(self, lease: 'th_timedelta') -> typing.Optional[typing.Any]:
+		"""
+		Marks the oldest runnable job as running, until lease runs out
+		A job whose worker's lease ran out is runnable again
+		Workers skip each other's locked rows, instead of waiting on them
+
+		Returns
+		-------
+		The claimed job's row, None if there's none to run
+
+		Raises
+		-------
+		sqlalchemy.exc.SQLAlchemyError
+		"""
+		runnable = select([_runnable.c.id]).where(and_(
+			_runnable.c.status.in_([orm.Jobs.STATUS_PENDING, orm.Jobs.STATUS_RUNNING]),
+			_runnable.c.date_run_after <= func.now()
+		)).order_by(_runnable.c.date_run_after).limit(1).with_for_update(skip_locked=True)
+		with self._database.scope as scope:
+			return scope.execute(_jobs.update().where(_jobs.c.id == runnable.as_scalar()).values(
+				status=orm.Jobs.STATUS_RUNNING,
+				attempts=_jobs.c.attempts + 1,
+				date_updated=func.now(),
+				date_run_after=func.now() + lease,
+			).returning(*_jobs.c)).first()
+
+	def progress(self, job_id: int, attempt: int, count: int, lease: 'th_timedelta') -> bool:
+		"""
+		Adds count to the job's progress, and extends its lease
+
+		Parameters
+		----------
+		attempt The claimed row's attempts, a job is only updated by the worker which claimed it last
+
+		Returns
+		-------
+		Whether the job is still this worker's, its lease may have run out and another worker claimed it
+
+		Raises
+		-------
+		sqlalchemy.exc.SQLAlchemyError
+		"""
+		return self._set(job_id, attempt, progress=_jobs.c.progress + count, date_run_after=func.now() + lease)
+
+	def finish(self, job_id: int, attempt: int) -> bool:
+		"""
+		Raises
+		-------
+		sqlalchemy.exc.SQLAlchemyError
+		"""
+		return self._set(job_id, attempt, status=orm.Jobs.STATUS_DONE, error=None)
+
+	def fail(self, job_id: int, attempt: int, error: str, retry_after: typing.Optional['th_timedelta']) -> bool:
+		"""
+		Parameters
+		----------
+		retry_after None if the job has run out of attempts
+
+		Raises
+		-------
+		sqlalchemy.exc.SQLAlchemyError
+		"""
+		if retry_after is None:
+			return self._set(job_id, attempt, status=orm.Jobs.STATUS_FAILED, error=error)
+		return self._set(job_id, attempt, status=orm.Jobs.STATUS_PENDING, error=error, date_run_after=func.now() + retry_after)
+
+	# region Internal
+	def _set(self, job_id: int, attempt: int, **values: typing.Any) -> bool:
+		with self._database.scope as scope:
+			result = scope.execute(_jobs.update().where(and_(
+				_jobs.c.id == job_id,
+				_jobs.c.attempts == attempt,
+				_jobs.c.status == orm.Jobs.STATUS_RUNNING
+			)).values(date_updated=func.now(), **values))
+			return result.rowcount > 0
+	# endregion Internal
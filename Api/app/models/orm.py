@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, SmallInteger, Text, Boolean, FetchedValue
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, BigInteger, SmallInteger, Text, Boolean, FetchedValue
 from sqlalchemy.ext.declarative import declarative_base
 
 
@@ -22,6 +22,12 @@ class Users(Base):
 	name: Text.python_type = Column(Text, nullable=False)
 	# passhash is excluded from dataclass autojson
 	passhash = Column(Text, nullable=False)
+	# cred_version is excluded from dataclass autojson
+	cred_version = Column(Integer, nullable=False, server_default=FetchedValue())
+	# date_deleted is excluded from dataclass autojson, marked users are hidden until a job purges them
+	date_deleted = Column(DateTime, nullable=True)
+	# version is excluded from dataclass autojson, bumped by database triggers, part of the listings' ETags
+	version = Column(BigInteger, nullable=False, server_default=FetchedValue())
 
 	LOGIN_LEN_MIN = 1
 	LOGIN_LEN_MAX = 31
@@ -31,6 +37,17 @@ class Users(Base):
 	PASSWORD_LEN_MAX = 255
 
 
+class UsersRevocations(Base):
+	__tablename__ = "users_revocations"
+
+	# No foreign key, deleted users are revoked too
+	user_id = Column(Integer, primary_key=True)
+	cred_version = Column(Integer, nullable=False)
+	date_created = Column(DateTime, nullable=False, server_default=FetchedValue())
+
+	CRED_VERSION_DELETED = 2 ** 31 - 1
+
+
 @dataclass
 class UsersBans(Base):
 	__tablename__ = "users_bans"
@@ -53,6 +70,10 @@ class Rooms(Base):
 	date_created: DateTime.python_type = Column(DateTime, nullable=False, server_default=FetchedValue())
 	is_public: Boolean.python_type = Column(Boolean, nullable=False)
 	title: Text.python_type = Column(Text, nullable=False)
+	# date_deleted is excluded from dataclass autojson, marked rooms are hidden until a job purges them
+	date_deleted = Column(DateTime, nullable=True)
+	# version is excluded from dataclass autojson, bumped by database triggers, part of the listings' ETags
+	version = Column(BigInteger, nullable=False, server_default=FetchedValue())
 
 	TITLE_LEN_MIN = 1
 	TITLE_LEN_MAX = 255
@@ -90,6 +111,37 @@ class Posts(Base):
 	room_id: Integer.python_type = Column(ForeignKey(Rooms.id), nullable=False)
 	user_id: Integer.python_type = Column(ForeignKey(Users.id), nullable=False)
 	content: Text.python_type = Column(Text, nullable=True)
+	# date_deleted is excluded from dataclass autojson, deleted posts are tombstones until a job purges them
+	date_deleted = Column(DateTime, nullable=True)
 
 	CONTENT_LEN_MIN = 1
 	CONTENT_LEN_MAX = 1024
+
+
+@dataclass
+class Jobs(Base):
+	__tablename__ = "jobs"
+
+	id: BigInteger.python_type = Column(BigInteger, primary_key=True)
+	date_created: DateTime.python_type = Column(DateTime, nullable=False, server_default=FetchedValue())
+	date_updated: DateTime.python_type = Column(DateTime, nullable=False, server_default=FetchedValue())
+	kind: Text.python_type = Column(Text, nullable=False)
+	target_id: Integer.python_type = Column(Integer, nullable=False)
+	status: Text.python_type = Column(Text, nullable=False, server_default=FetchedValue())
+	attempts: Integer.python_type = Column(Integer, nullable=False, server_default=FetchedValue())
+	progress: BigInteger.python_type = Column(BigInteger, nullable=False, server_default=FetchedValue())
+	error: Text.python_type = Column(Text, nullable=True)
+	# When a pending job may run, or when a running job's worker is given up on
+	date_run_after: DateTime.python_type = Column(DateTime, nullable=False, server_default=FetchedValue())
+
+	KIND_USERS_PURGE = "users.purge"
+	KIND_ROOMS_PURGE = "rooms.purge"
+	# Every post tombstone older than the retention, target_id is unused
+	KIND_POSTS_PURGE = "posts.purge"
+	KINDS = [KIND_USERS_PURGE, KIND_ROOMS_PURGE, KIND_POSTS_PURGE]
+
+	STATUS_PENDING = "pending"
+	STATUS_RUNNING = "running"
+	STATUS_DONE = "done"
+	STATUS_FAILED = "failed"
+	STATUSES = [STATUS_PENDING, STATUS_RUNNING, STATUS_DONE, STATUS_FAILED]
@@ -1,9 +1,32 @@
 import typing
 if typing.TYPE_CHECKING:
 	from core.database import Database as th_Database
+	from core.pagination import Page as th_Page
+	from core.projection import Fields as th_Fields
+	from sqlalchemy.orm.session import Session as th_Session
+	from datetime import timedelta as th_timedelta
 
-from sqlalchemy import or_
-from models import orm
+import json
+
+from sqlalchemy import and_, or_, func, select, literal, literal_column, null, bindparam, Integer, Text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm.exc import NoResultFound
+from models import orm, visibility, cascade
+from core import conditional
+
+# What the listings' ETags are computed from
+_VERSION_COLUMNS = conditional.Columns(orm.Posts.id, orm.Posts.date_updated, orm.Posts.date_created, version=orm.Rooms.version, version_key="room_id")
+
+# Deleted posts are tombstones until a job purges them, every read skips them
+_NOT_DELETED = orm.Posts.date_deleted.is_(None)
+
+_posts = orm.Posts.__table__
+
+# Created, updated and deleted posts are announced on it, see services.post_events
+CHANNEL = "posts"
+EVENT_CREATED = "created"
+EVENT_UPDATED = "updated"
+EVENT_DELETED = "deleted"
 
 
 class Posts:
@@ -19,7 +42,39 @@ class Posts:
 		sqlalchemy.exc.SQLAlchemyError
 		"""
 		with self._database.scope as scope:
-			scope.add(orm.Posts(date_updated=None, room_id=room_id, user_id=user_id, content=content))
+			orm_post = orm.Posts(date_updated=None, room_id=room_id, user_id=user_id, content=content)
+			scope.add(orm_post)
+			# For the post's id
+			scope.flush()
+			_notify(scope, EVENT_CREATED, orm_post.id, orm_post.room_id)
+
+	def create_all(self, room_id: int, user_id: int, contents: typing.List[str]) -> typing.List[int]:
+		"""
+		Inserts every post with one statement, the contents are sent as a single array parameter
+
+		Returns
+		-------
+		The posts' IDs, in the order of contents
+
+		Raises
+		-------
+		sqlalchemy.exc.IntegrityError
+			Room with room_id doesn't exist or User with user_id doesn't exist
+		sqlalchemy.exc.SQLAlchemyError
+		"""
+		if len(contents) < 1:
+			return []
+		rows = select([
+			null(), literal(room_id, Integer), literal(user_id, Integer),
+			func.unnest(bindparam("contents", contents, type_=ARRAY(Text)))
+		])
+		with self._database.scope as scope:
+			# Postgres returns an INSERT ... SELECT's rows in the order the SELECT produced them
+			post_ids = [row.id for row in scope.execute(
+				_posts.insert().from_select(["date_updated", "room_id", "user_id", "content"], rows).returning(_posts.c.id)
+			)]
+			_notify_all(scope, EVENT_CREATED, post_ids, room_id)
+			return post_ids
 
 	def get(self, post_id: int) -> orm.Posts:
 		"""
@@ -32,69 +87,43 @@ class Posts:
 		sqlalchemy.exc.SQLAlchemyError
 		"""
 		with self._database.scope as scope:
-			return scope.query(orm.Posts).filter(orm.Posts.id == post_id).one()
+			return scope.query(orm.Posts).filter(orm.Posts.id == post_id, _NOT_DELETED).one()
 
 	def get_all(
 			self, exclude_banned_rooms: bool, exclude_public_rooms: bool, exclude_private_rooms: bool,
-			user_id: int = None, room_id_filter: int = None, user_id_filter: int = None
-	) -> typing.List[orm.Posts]:
+			user_id: int = None, room_id_filter: int = None, user_id_filter: int = None, page: 'th_Page' = None, fields: 'th_Fields' = None
+	) -> typing.Iterable[typing.Union[orm.Posts, dict]]:
+		"""
+		Raises
+		-------
+		sqlalchemy.exc.SQLAlchemyError
+		"""
 		with self._database.scope as scope:
-			# Get post ids visible to the user
-			q_visible_ids = []
+			# Posts in rooms which pass the filters
+			condition = visibility.room_passes(orm.Posts.room_id, exclude_banned_rooms, exclude_public_rooms, exclude_private_rooms)
 			if user_id is not None:
-				q_visible_ids = scope.query(orm.Posts.id).filter(
-					or_(
-						# Posts which the user has created
-						orm.Posts.user_id == user_id,
-						# Posts in a room which user has created
-						orm.Posts.room_id.in_(
-							scope.query(orm.Rooms.id).filter(
-								orm.Rooms.user_id == user_id
-							)
-						),
-						# Posts in a room to which to user has been added
-						orm.Posts.room_id.in_(
-							scope.query(orm.RoomsUsers.room_id).filter(
-								orm.RoomsUsers.user_id == user_id
-							)
-						),
-					)
-				)
-
-			q_filtered_ids = scope.query(orm.Posts.id)
-			if exclude_banned_rooms:
-				q_filtered_ids = q_filtered_ids.filter(
-					orm.Posts.room_id.notin_(scope.query(orm.RoomsBans.room_id))
-				)
-			if exclude_public_rooms:
-				q_filtered_ids = q_filtered_ids.filter(
-					orm.Posts.room_id.notin_(
-						scope.query(orm.Rooms.id).filter(orm.Rooms.is_public.is_(True))
-					)
-				)
-			if exclude_private_rooms:
-				q_filtered_ids = q_filtered_ids.filter(
-					orm.Posts.room_id.notin_(
-						scope.query(orm.Rooms.id).filter(orm.Rooms.is_public.is_(False))
-					)
+				condition = or_(
+					condition,
+					# Posts which the user has created
+					orm.Posts.user_id == user_id,
+					# Posts in a room which user has created
+					visibility.room_owned_by(orm.Posts.room_id, user_id),
+					# Posts in a room to which to user has been added
+					visibility.room_joined_by(orm.Posts.room_id, user_id),
 				)
 
-			# TODO?
-			visible_ids = [idk[0] for idk in q_visible_ids]
-			filtered_ids = [idk[0] for idk in q_filtered_ids]
-
-			query = scope.query(orm.Posts).filter(
-				or_(
-					orm.Posts.id.in_(visible_ids),
-					orm.Posts.id.in_(filtered_ids)
-				)
-			)
+			query = scope.query(orm.Posts).filter(condition, _NOT_DELETED, ~visibility.room_deleted(orm.Posts.room_id))
 			if room_id_filter is not None:
 				query = query.filter(orm.Posts.room_id == room_id_filter)
 			if user_id_filter is not None:
 				query = query.filter(orm.Posts.user_id == user_id_filter)
+			if fields is not None:
+				query = fields.apply(query, orm.Posts, "id", "room_id", "date_created", "date_updated")
+			if page is not None:
+				query = page.apply(query, orm.Posts.date_created, orm.Posts.id)
 
-			return query.all()
+			rows = query.all() if page is None else page.fetch(query, _VERSION_COLUMNS)
+			return rows if fields is None else fields.rows(rows)
 
 	def get_all_visible(self, user_id: int, room_id_filter: int = None, user_id_filter: int = None) -> typing.List[orm.Posts]:
 		"""
@@ -107,17 +136,13 @@ class Posts:
 				or_(
 					# Posts which user has created
 					orm.Posts.user_id == user_id,
-					# Posts in rooms which user can access
-					orm.Posts.room_id.in_(
-						scope.query(orm.Rooms.id).filter(
-							or_(
-								# Rooms which user has created
-								orm.Rooms.user_id == user_id,
-								# Rooms with user
-								orm.Rooms.id.in_(scope.query(orm.RoomsUsers.room_id).filter(orm.RoomsUsers.user_id == user_id)),
-								# Public rooms
-								orm.Rooms.id.notin_(scope.query(orm.RoomsUsers.room_id).all())
-								)))))
+					# Posts in rooms which user has created
+					visibility.room_owned_by(orm.Posts.room_id, user_id),
+					# Posts in rooms with user
+					visibility.room_joined_by(orm.Posts.room_id, user_id),
+					# Posts in public rooms
+					~visibility.room_has_users(orm.Posts.room_id)
+				), _NOT_DELETED)
 			if room_id_filter is not None:
 				query = query.filter(orm.Posts.room_id == room_id_filter)
 			if user_id_filter is not None:
@@ -131,11 +156,8 @@ class Posts:
 		sqlalchemy.exc.SQLAlchemyError
 		"""
 		with self._database.scope as scope:
-			query = scope.query(orm.Posts).filter(
-				orm.Posts.room_id.notin_(
-					scope.query(orm.RoomsUsers.room_id).all()
-				)
-			)
+			# Posts in public rooms
+			query = scope.query(orm.Posts).filter(~visibility.room_has_users(orm.Posts.room_id), _NOT_DELETED)
 			if room_id_filter is not None:
 				query = query.filter(orm.Posts.room_id == room_id_filter)
 			if user_id_filter is not None:
@@ -152,33 +174,74 @@ class Posts:
 			post_id is not unique in Posts
 		sqlalchemy.exc.SQLAlchemyError
 		"""
-		with self._database.scope:
-			# TODO date_updated?
-			self.get(post_id).content = content
+		with self._database.scope as scope:
+			orm_post = self.get(post_id)
+			orm_post.content = content
+			# Listings' ETags see updates through it
+			orm_post.date_updated = func.now()
+			_notify(scope, EVENT_UPDATED, orm_post.id, orm_post.room_id)
 
 	def delete(self, post_id: int) -> None:
 		"""
+		Leaves a tombstone, one UPDATE by primary key, see purge
+
 		Raises
 		-------
 		sqlalchemy.orm.exc.NoResultFound
 			Post with post_id doesn't exist
-		sqlalchemy.orm.exc.MultipleResultsFound
-			post_id is not unique in Posts
 		sqlalchemy.exc.SQLAlchemyError
 		"""
 		with self._database.scope as scope:
-			scope.delete(self.get(post_id))
+			row = scope.execute(
+				_posts.update().where(and_(_posts.c.id == post_id, _posts.c.date_deleted.is_(None)))
+				.values(date_deleted=func.now()).returning(_posts.c.room_id)
+			).first()
+			if row is None:
+				raise NoResultFound()
+			_notify(scope, EVENT_DELETED, post_id, row.room_id)
 
 	def delete_all(self, room_id_filter: int = None, user_id_filter: int = None) -> None:
 		"""
+		Leaves tombstones, one UPDATE, see purge
+
 		Raises
 		-------
 		sqlalchemy.exc.SQLAlchemyError
 		"""
 		with self._database.scope as scope:
-			query = scope.query(orm.Posts)
+			query = scope.query(orm.Posts).filter(_NOT_DELETED)
 			if room_id_filter is not None:
 				query = query.filter(orm.Posts.room_id == room_id_filter)
 			if user_id_filter is not None:
 				query = query.filter(orm.Posts.user_id == user_id_filter)
-			query.delete()
+			query.update({orm.Posts.date_deleted: func.now()}, synchronize_session=False)
+
+	def purge(self, older_than: 'th_timedelta', batch_size: int) -> int:
+		"""
+		Deletes a batch of the posts which have been tombstones for longer than older_than
+
+		Returns
+		-------
+		The amount of deleted posts, 0 once there are none left
+
+		Raises
+		-------
+		sqlalchemy.exc.SQLAlchemyError
+		"""
+		with self._database.scope as scope:
+			return cascade.purge(scope, [(orm.Posts, orm.Posts.date_deleted < func.now() - older_than)], batch_size)
+
+
+# region Internal
+def _notify(scope: 'th_Session', event: str, post_id: int, room_id: int) -> None:
+	""" Postgres delivers the notification on commit, and drops it on rollback """
+	payload = json.dumps({"event": event, "id": post_id, "room_id": room_id})
+	scope.execute(select([func.pg_notify(CHANNEL, payload)]))
+
+
+def _notify_all(scope: 'th_Session', event: str, post_ids: typing.List[int], room_id: int) -> None:
+	""" One statement for all of the posts, a notification each """
+	payloads = [json.dumps({"event": event, "id": post_id, "room_id": room_id}) for post_id in post_ids]
+	payload = func.unnest(bindparam("payloads", payloads, type_=ARRAY(Text))).alias("payload")
+	scope.execute(select([func.pg_notify(CHANNEL, literal_column("payload"))]).select_from(payload))
+# endregion Internal
@@ -1,21 +1,51 @@
 import typing
 if typing.TYPE_CHECKING:
 	from core.database import Database as th_Database
+	from core.pagination import Page as th_Page
+	from core.projection import Fields as th_Fields
 	from models.rooms_users import RoomsUsers as th_m_RoomsUsers
 	from models.rooms_bans import RoomsBans as th_m_RoomsBans
 	from models.posts import Posts as th_m_Posts
+	from models.jobs import Jobs as th_m_Jobs
 
-from sqlalchemy import or_
+from sqlalchemy import and_, or_, false, true, func
+from sqlalchemy.orm.exc import NoResultFound
 
-from models import orm
+from models import orm, visibility, cascade
+from core import context, conditional
+
+# What the listings' ETags are computed from
+_VERSION_COLUMNS = conditional.Columns(orm.Rooms.id, orm.Rooms.date_created, version=orm.Rooms.version)
+
+# Rooms marked as deleted are hidden until their purge job is done
+_NOT_DELETED = orm.Rooms.date_deleted.is_(None)
+
+
+class RoomAccess:
+	""" What authorizing an access to a room needs to know about it """
+	def __init__(self, room: orm.Rooms, is_banned: bool, is_member: bool):
+		self.room = room
+		self.is_banned = is_banned
+		# Whether the user the access was resolved for has been added to the room
+		self.is_member = is_member
+		self.user_id: typing.Optional[int] = None
+
+	@property
+	def allowed_ids(self) -> typing.List[int]:
+		""" Of the room's owner and users, the ones that matter for this access """
+		allowed_ids = [self.room.user_id]
+		if self.is_member:
+			allowed_ids.append(self.user_id)
+		return allowed_ids
 
 
 class Rooms:
-	def __init__(self, database: 'th_Database', m_rooms_users: 'th_m_RoomsUsers', m_rooms_bans: 'th_m_RoomsBans', m_posts: 'th_m_Posts'):
+	def __init__(self, database: 'th_Database', m_rooms_users: 'th_m_RoomsUsers', m_rooms_bans: 'th_m_RoomsBans', m_posts: 'th_m_Posts', m_jobs: 'th_m_Jobs'):
 		self._database = database
 		self._m_rooms_users = m_rooms_users
 		self._m_rooms_bans = m_rooms_bans
 		self._m_posts = m_posts
+		self._m_jobs = m_jobs
 
 	def create(self, user_id: int, is_public: bool, title: str) -> None:
 		"""
@@ -39,10 +69,24 @@ class Rooms:
 		sqlalchemy.exc.SQLAlchemyError
 		"""
 		# TODO check if visible
-		with self._database.scope as scope:
-			return scope.query(orm.Rooms).filter(orm.Rooms.id == room_id).one()
+		return context.memoized("rooms", room_id, lambda: self._get(room_id))
+
+	def get_access(self, room_id: int, user_id: int = None) -> RoomAccess:
+		"""
+		Resolves the room, its ban and the user's membership in one query, without loading the room's users
+
+		Raises
+		-------
+		sqlalchemy.orm.exc.NoResultFound
+			Room with room_id doesn't exist
+		sqlalchemy.exc.SQLAlchemyError
+		"""
+		return context.memoized("rooms_access", (room_id, user_id), lambda: self._get_access(room_id, user_id))
 
-	def get_all(self, exclude_banned: bool, exclude_public: bool, exclude_private: bool, user_id: int = None, user_id_filter: int = None) -> typing.List[orm.Rooms]:
+	def get_all(
+			self, exclude_banned: bool, exclude_public: bool, exclude_private: bool,
+			user_id: int = None, user_id_filter: int = None, page: 'th_Page' = None, fields: 'th_Fields' = None
+	) -> typing.Iterable[typing.Union[orm.Rooms, dict]]:
 		"""
 		Raises
 		-------
@@ -81,11 +125,17 @@ class Rooms:
 				or_(
 					orm.Rooms.id.in_(q_visible_ids),
 					orm.Rooms.id.in_(q_filtered_ids)
-				)
+				),
+				_NOT_DELETED
 			)
 			if user_id_filter is not None:
 				query = query.filter(orm.Rooms.user_id == user_id_filter)
-			return query.all()
+			if fields is not None:
+				query = fields.apply(query, orm.Rooms, "id", "date_created")
+			if page is not None:
+				query = page.apply(query, orm.Rooms.date_created, orm.Rooms.id)
+			rows = query.all() if page is None else page.fetch(query, _VERSION_COLUMNS)
+			return rows if fields is None else fields.rows(rows)
 
 	def update(self, room_id: int, title: str) -> None:
 		"""
@@ -100,37 +150,66 @@ class Rooms:
 		with self._database.scope:
 			self.get(room_id).title = title
 
-	def delete(self, room_id: int) -> None:
+	def delete(self, room_id: int) -> orm.Jobs:
 		"""
+		Marks the room as deleted, it's hidden right away
+		Its rows are purged by the returned job, see purge
+
 		Raises
 		-------
 		sqlalchemy.orm.exc.NoResultFound
 			Room with room_id doesn't exist
-		sqlalchemy.orm.exc.MultipleResultsFound
-			room_id is not unique in Rooms
 		sqlalchemy.exc.SQLAlchemyError
 		"""
 		with self._database.scope as scope:
-			self._m_posts.delete_all(room_id_filter=room_id)
-			self._m_rooms_users.delete_all(room_id_filter=room_id)
-			self._m_rooms_bans.delete(room_id)
-			scope.delete(self.get(room_id))
+			marked = scope.query(orm.Rooms).filter(orm.Rooms.id == room_id, _NOT_DELETED).update(
+				{orm.Rooms.date_deleted: func.now()}, synchronize_session=False
+			)
+			if marked < 1:
+				raise NoResultFound()
+			orm_job = self._m_jobs.create(orm.Jobs.KIND_ROOMS_PURGE, room_id)
+		cascade.forget_rooms()
+		return orm_job
+
+	def purge(self, room_id: int, batch_size: int) -> int:
+		"""
+		Deletes a batch of a deleted room's rows, see cascade.room_steps
+
+		Returns
+		-------
+		The amount of deleted rows, 0 once the room is gone
+
+		Raises
+		-------
+		sqlalchemy.exc.SQLAlchemyError
+		"""
+		with self._database.scope as scope:
+			return cascade.purge(scope, cascade.room_steps(and_(orm.Rooms.id == room_id, orm.Rooms.date_deleted.isnot(None))), batch_size)
 
 	def delete_all(self, user_id_filter: int = None) -> None:
 		"""
 		Raises
 		-------
-		sqlalchemy.orm.exc.NoResultFound
-			Room with room_id doesn't exist
-		sqlalchemy.orm.exc.MultipleResultsFound
-			room_id is not unique in Rooms
 		sqlalchemy.exc.SQLAlchemyError
 		"""
 		with self._database.scope as scope:
-			query = scope.query(orm.Rooms)
-			if user_id_filter is not None:
-				query = query.filter(orm.Rooms.user_id == user_id_filter)
-			rooms = query.all()
-			# todo optimize ?
-			for room in rooms:
-				self.delete(room.id)
+			cascade.delete(scope, cascade.room_steps(true() if user_id_filter is None else orm.Rooms.user_id == user_id_filter))
+		cascade.forget_rooms()
+
+	# region Internal
+	def _get(self, room_id: int) -> orm.Rooms:
+		with self._database.scope as scope:
+			return scope.query(orm.Rooms).filter(orm.Rooms.id == room_id, _NOT_DELETED).one()
+
+	def _get_access(self, room_id: int, user_id: typing.Optional[int]) -> RoomAccess:
+		with self._database.scope as scope:
+			room, is_banned, is_member = scope.query(
+				orm.Rooms,
+				visibility.room_banned(orm.Rooms.id),
+				false() if user_id is None else visibility.room_joined_by(orm.Rooms.id, user_id)
+			).filter(orm.Rooms.id == room_id, _NOT_DELETED).one()
+		context.memoized("rooms", room_id, lambda: room)
+		access = RoomAccess(room, is_banned, is_member)
+		access.user_id = user_id
+		return access
+	# endregion Internal
@@ -1,10 +1,12 @@
 import typing
 if typing.TYPE_CHECKING:
 	from core.database import Database as th_Database
+	from core.pagination import Page as th_Page
 
 from sqlalchemy import or_
 
 from models import orm
+from core import context
 
 
 class RoomsBans:
@@ -21,6 +23,7 @@ class RoomsBans:
 		"""
 		with self._database.scope as scope:
 			scope.add(orm.RoomsBans(room_id=room_id, banner_id=banner_id, reason=reason))
+		context.forget("rooms_access")
 
 	def get(self, room_id: int) -> orm.RoomsBans:
 		"""
@@ -35,7 +38,15 @@ class RoomsBans:
 		with self._database.scope as scope:
 			return scope.query(orm.RoomsBans).filter(orm.RoomsBans.room_id == room_id).one()
 
-	def get_all(self, exclude_public: bool, exclude_private: bool, user_id: int = None, room_id_filter: int = None, banner_id_filter: int = None):
+	def get_all(
+			self, exclude_public: bool, exclude_private: bool,
+			user_id: int = None, room_id_filter: int = None, banner_id_filter: int = None, page: 'th_Page' = None
+	) -> typing.Iterable[orm.RoomsBans]:
+		"""
+		Raises
+		-------
+		sqlalchemy.exc.SQLAlchemyError
+		"""
 		with self._database.scope as scope:
 			q_visible_ids = []
 			if user_id is not None:
@@ -74,7 +85,9 @@ class RoomsBans:
 				query = query.filter(orm.RoomsBans.room_id == room_id_filter)
 			if banner_id_filter is not None:
 				query = query.filter(orm.RoomsBans.banner_id == banner_id_filter)
-			return query.all()
+			if page is not None:
+				query = page.apply(query, orm.RoomsBans.date_created, orm.RoomsBans.room_id)
+			return query.all() if page is None else page.fetch(query)
 
 	def update(self, room_id: int, reason: str) -> None:
 		"""
@@ -101,6 +114,7 @@ class RoomsBans:
 		"""
 		with self._database.scope as scope:
 			scope.delete(self.get(room_id))
+		context.forget("rooms_access")
 
 	def delete_all(self, room_id_filter: int = None, banner_id_filter: int = None) -> None:
 		"""
@@ -115,3 +129,4 @@ class RoomsBans:
 			if banner_id_filter is not None:
 				query = query.filter(orm.RoomsBans.banner_id == banner_id_filter)
 			query.delete()
+		context.forget("rooms_access")
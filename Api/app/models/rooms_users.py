@@ -1,10 +1,12 @@
 import typing
 if typing.TYPE_CHECKING:
 	from core.database import Database as th_Database
+	from core.pagination import Page as th_Page
 
 from sqlalchemy import or_
 
-from models import orm
+from models import orm, visibility
+from core import context
 
 
 class RoomsUsers:
@@ -21,6 +23,8 @@ class RoomsUsers:
 		"""
 		with self._database.scope as scope:
 			scope.add(orm.RoomsUsers(room_id=room_id, user_id=user_id))
+		context.forget("rooms_users_by_room", room_id)
+		context.forget("rooms_access")
 
 	def get(self, room_id: int, user_id: int) -> typing.List[orm.RoomsUsers]:
 		"""
@@ -32,8 +36,7 @@ class RoomsUsers:
 			room_id and user_id pair is not unique in RoomsUsers
 		sqlalchemy.exc.SQLAlchemyError
 		"""
-		with self._database.scope as scope:
-			return scope.query(orm.RoomsUsers).filter(orm.RoomsUsers.room_id == room_id, orm.RoomsUsers.user_id == user_id).one()
+		return context.memoized("rooms_users", (room_id, user_id), lambda: self._get(room_id, user_id))
 
 	def get_all_by_room(self, room_id: int) -> typing.List[orm.RoomsUsers]:
 		"""
@@ -41,10 +44,12 @@ class RoomsUsers:
 		-------
 		sqlalchemy.exc.SQLAlchemyError
 		"""
-		with self._database.scope as scope:
-			return scope.query(orm.RoomsUsers).filter(orm.RoomsUsers.room_id == room_id).all()
+		return context.memoized("rooms_users_by_room", room_id, lambda: self._get_all_by_room(room_id))
 
-	def get_all(self, exclude_banned_rooms: bool, exclude_public: bool, exclude_private: bool, user_id: int = None, room_id_filter: int = None, user_id_filter: int = None):
+	def get_all(
+			self, exclude_banned_rooms: bool, exclude_public: bool, exclude_private: bool,
+			user_id: int = None, room_id_filter: int = None, user_id_filter: int = None, page: 'th_Page' = None
+	) -> typing.Iterable[orm.RoomsUsers]:
 		with self._database.scope as scope:
 			q_visible_ids = []
 			if user_id is not None:
@@ -87,8 +92,10 @@ class RoomsUsers:
 				query = query.filter(orm.RoomsUsers.room_id == room_id_filter)
 			if user_id_filter is not None:
 				query = query.filter(orm.RoomsUsers.user_id == user_id_filter)
-			return query.all()
-	
+			if page is not None:
+				query = page.apply(query, orm.RoomsUsers.date_created, orm.RoomsUsers.room_id, orm.RoomsUsers.user_id)
+			return query.all() if page is None else page.fetch(query)
+
 	def get_all_visible(self, user_id: int, room_id_filter: int = None, user_id_filter: int = None) -> typing.List[orm.RoomsUsers]:
 		"""
 		Raises
@@ -99,9 +106,9 @@ class RoomsUsers:
 			query = scope.query(orm.RoomsUsers).filter(
 				or_(
 					# Rooms in which the user is participating
-					orm.RoomsUsers.room_id == scope.query(orm.RoomsUsers.room_id).filter(orm.RoomsUsers.user_id == user_id),
+					visibility.room_joined_by(orm.RoomsUsers.room_id, user_id),
 					# Rooms which the user is the owner of
-					orm.RoomsUsers.room_id == scope.query(orm.Rooms).filter(orm.Rooms.user_id == user_id)
+					visibility.room_owned_by(orm.RoomsUsers.room_id, user_id)
 				)
 			)
 			if room_id_filter is not None:
@@ -122,8 +129,11 @@ class RoomsUsers:
 		"""
 		with self._database.scope as scope:
 			scope.delete(self.get(room_id, user_id))
+		context.forget("rooms_users", (room_id, user_id))
+		context.forget("rooms_users_by_room", room_id)
+		context.forget("rooms_access")
 
-	def delete_all(self, room_id_filter: int = False, user_id_filter: int = False) -> None:
+	def delete_all(self, room_id_filter: int = None, user_id_filter: int = None) -> None:
 		"""
 		Raises
 		-------
@@ -132,7 +142,20 @@ class RoomsUsers:
 		with self._database.scope as scope:
 			query = scope.query(orm.RoomsUsers)
 			if room_id_filter is not None:
-				query.filter(orm.RoomsUsers.room_id == room_id_filter)
+				query = query.filter(orm.RoomsUsers.room_id == room_id_filter)
 			if user_id_filter is not None:
-				query.filter(orm.RoomsUsers.user_id == user_id_filter)
+				query = query.filter(orm.RoomsUsers.user_id == user_id_filter)
 			query.delete()
+		context.forget("rooms_users")
+		context.forget("rooms_users_by_room")
+		context.forget("rooms_access")
+
+	# region Internal
+	def _get(self, room_id: int, user_id: int) -> orm.RoomsUsers:
+		with self._database.scope as scope:
+			return scope.query(orm.RoomsUsers).filter(orm.RoomsUsers.room_id == room_id, orm.RoomsUsers.user_id == user_id).one()
+
+	def _get_all_by_room(self, room_id: int) -> typing.List[orm.RoomsUsers]:
+		with self._database.scope as scope:
+			return scope.query(orm.RoomsUsers).filter(orm.RoomsUsers.room_id == room_id).all()
+	# endregion Internal
@@ -1,24 +1,43 @@
 import typing
 if typing.TYPE_CHECKING:
 	from core.database import Database as th_Database
+	from core.pagination import Page as th_Page
+	from core.projection import Fields as th_Fields
 	from models.users_bans import UsersBans as th_m_UsersBans
 	from models.rooms import Rooms as th_m_Rooms
 	from models.rooms_users import RoomsUsers as th_m_RoomsUsers
 	from models.rooms_bans import RoomsBans as th_m_RoomsBans
 	from models.posts import Posts as th_m_Posts
+	from models.jobs import Jobs as th_m_Jobs
+	from core.auth.tokens_cache import TokensCache as th_TokensCache
+	from sqlalchemy.orm.session import Session as th_Session
+	from datetime import timedelta as th_timedelta
 
-from models import orm
+from sqlalchemy import and_, func
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm.exc import NoResultFound
+
+from models import orm, cascade
+from core import context, conditional
+
+# What the listings' ETags are computed from
+_VERSION_COLUMNS = conditional.Columns(orm.Users.id, orm.Users.date_created, version=orm.Users.version)
+
+# Users marked as deleted are hidden until their purge job is done
+_NOT_DELETED = orm.Users.date_deleted.is_(None)
 
 
 class Users:
 	def __init__(self, database: 'th_Database', m_usrs_bans: 'th_m_UsersBans', m_rooms: 'th_m_Rooms', m_rooms_users: 'th_m_RoomsUsers',
-					m_rooms_bans: 'th_m_RoomsBans', m_posts: 'th_m_Posts'):
+					m_rooms_bans: 'th_m_RoomsBans', m_posts: 'th_m_Posts', m_jobs: 'th_m_Jobs', tokens_cache: 'th_TokensCache' = None):
 		self._database = database
 		self._m_users_bans = m_usrs_bans
 		self._m_rooms = m_rooms
 		self._m_rooms_users = m_rooms_users
 		self._m_rooms_bans = m_rooms_bans
 		self._m_posts = m_posts
+		self._m_jobs = m_jobs
+		self._tokens_cache = tokens_cache
 
 	def create(self, role: int, login: str, name: str, passhash: str) -> None:
 		"""
@@ -42,8 +61,7 @@ class Users:
 			user_id is not unique in Users
 		sqlalchemy.exc.SQLAlchemyError
 		"""
-		with self._database.scope as scope:
-			return scope.query(orm.Users).filter(orm.Users.id == user_id).one()
+		return context.memoized("users", user_id, lambda: self._get(user_id))
 
 	def get_by_login(self, login: str) -> orm.Users:
 		"""
@@ -56,44 +74,78 @@ class Users:
 		sqlalchemy.exc.SQLAlchemyError
 		"""
 		with self._database.scope as scope:
-			return scope.query(orm.Users).filter(orm.Users.login == login).one()
+			return scope.query(orm.Users).filter(orm.Users.login == login, _NOT_DELETED).one()
 
-	def get_all(self, login_filter: str = None) -> typing.List[orm.Users]:
+	def get_all(self, login_filter: str = None, page: 'th_Page' = None, fields: 'th_Fields' = None) -> typing.Iterable[typing.Union[orm.Users, dict]]:
 		"""
 		Raises
 		-------
 		sqlalchemy.exc.SQLAlchemyError
 		"""
 		with self._database.scope as scope:
-			query = scope.query(orm.Users)
+			query = scope.query(orm.Users).filter(_NOT_DELETED)
 			if login_filter is not None:
 				query = query.filter(orm.Users.login == login_filter)
-			return query.all()
+			if fields is not None:
+				query = fields.apply(query, orm.Users, "id", "date_created")
+			if page is not None:
+				query = page.apply(query, orm.Users.date_created, orm.Users.id)
+			rows = query.all() if page is None else page.fetch(query, _VERSION_COLUMNS)
+			return rows if fields is None else fields.rows(rows)
 
-	def get_all_unbanned(self) -> typing.List[orm.Users]:
+	def get_all_unbanned(self, page: 'th_Page' = None, fields: 'th_Fields' = None) -> typing.Iterable[typing.Union[orm.Users, dict]]:
 		"""
 		Raises
 		-------
 		sqlalchemy.exc.SQLAlchemyError
 		"""
 		with self._database.scope as scope:
-			return scope.query(orm.Users).filter(
+			query = scope.query(orm.Users).filter(
 				orm.Users.id.notin_(
 					scope.query(orm.UsersBans.user_id)
-				)
-			).all()
+				),
+				_NOT_DELETED
+			)
+			if fields is not None:
+				query = fields.apply(query, orm.Users, "id", "date_created")
+			if page is not None:
+				query = page.apply(query, orm.Users.date_created, orm.Users.id)
+			rows = query.all() if page is None else page.fetch(query, _VERSION_COLUMNS)
+			return rows if fields is None else fields.rows(rows)
 
-	def get_all_banned(self) -> typing.List[orm.Users]:
+	def get_all_banned(self, page: 'th_Page' = None, fields: 'th_Fields' = None) -> typing.Iterable[typing.Union[orm.Users, dict]]:
 		"""
 		Raises
 		-------
 		sqlalchemy.exc.SQLAlchemyError
 		"""
 		with self._database.scope as scope:
-			return scope.query(orm.Users).filter(
+			query = scope.query(orm.Users).filter(
 				orm.Users.id.in_(
 					scope.query(orm.UsersBans.user_id)
-				)
+				),
+				_NOT_DELETED
+			)
+			if fields is not None:
+				query = fields.apply(query, orm.Users, "id", "date_created")
+			if page is not None:
+				query = page.apply(query, orm.Users.date_created, orm.Users.id)
+			rows = query.all() if page is None else page.fetch(query, _VERSION_COLUMNS)
+			return rows if fields is None else fields.rows(rows)
+
+	def get_revocations(self, newer_than: 'th_timedelta') -> typing.List[typing.Tuple[int, int]]:
+		"""
+		Returns
+		-------
+		(user_id, minimum valid cred_version) of users revoked in the given timespan
+
+		Raises
+		-------
+		sqlalchemy.exc.SQLAlchemyError
+		"""
+		with self._database.scope as scope:
+			return scope.query(orm.UsersRevocations.user_id, orm.UsersRevocations.cred_version).filter(
+				orm.UsersRevocations.date_created > func.now() - newer_than
 			).all()
 
 	def update(self, user_id: int, role: int = None, login: str = None, name: str = None, passhash: str = None) -> None:
@@ -108,7 +160,7 @@ class Users:
 			user_id is not unique in Users
 		sqlalchemy.exc.SQLAlchemyError
 		"""
-		with self._database.scope:
+		with self._database.scope as scope:
 			user = self.get(user_id)
 			if role is not None:
 				user.role = role
@@ -118,22 +170,76 @@ class Users:
 				user.name = name
 			if passhash is not None:
 				user.passhash = passhash
+			# Tokens are bound to the passhash and resolve to the role
+			if role is not None or passhash is not None:
+				# Incremented by the UPDATE, concurrent updates are serialized by its row lock and each get a version of their own
+				user.cred_version = orm.Users.cred_version + 1
+				scope.flush()
+				self._revoke(scope, user_id, user.cred_version)
+		if role is not None or passhash is not None:
+			self._forget_tokens(user_id)
 
-	def delete(self, user_id: int) -> None:
+	def delete(self, user_id: int) -> orm.Jobs:
 		"""
+		Marks the user as deleted, they're hidden and their tokens revoked right away
+		Their rooms are marked as deleted and their posts left as tombstones too, so they're hidden until the purge
+		Their rows are purged by the returned job, see purge
+
 		Raises
 		-------
 		sqlalchemy.orm.exc.NoResultFound
 			User with user_id doesn't exist
-		sqlalchemy.orm.exc.MultipleResultsFound
-			user_id is not unique in Users
 		sqlalchemy.exc.SQLAlchemyError
 		"""
 		with self._database.scope as scope:
-			self._m_users_bans.delete_all(user_id)
-			self._m_users_bans.delete_all(banner_id_filter=user_id)
-			self._m_rooms_bans.delete_all(banner_id_filter=user_id)
-			self._m_rooms_users.delete_all(user_id_filter=user_id)
-			self._m_posts.delete_all(user_id_filter=user_id)
-			self._m_rooms.delete_all(user_id)
-			scope.delete(self.get(user_id))
+			marked = scope.query(orm.Users).filter(orm.Users.id == user_id, _NOT_DELETED).update(
+				{orm.Users.date_deleted: func.now()}, synchronize_session=False
+			)
+			if marked < 1:
+				raise NoResultFound()
+			scope.query(orm.Rooms).filter(orm.Rooms.user_id == user_id, orm.Rooms.date_deleted.is_(None)).update(
+				{orm.Rooms.date_deleted: func.now()}, synchronize_session=False
+			)
+			scope.query(orm.Posts).filter(orm.Posts.user_id == user_id, orm.Posts.date_deleted.is_(None)).update(
+				{orm.Posts.date_deleted: func.now()}, synchronize_session=False
+			)
+			self._revoke(scope, user_id, orm.UsersRevocations.CRED_VERSION_DELETED)
+			orm_job = self._m_jobs.create(orm.Jobs.KIND_USERS_PURGE, user_id)
+		context.forget("users", user_id)
+		cascade.forget_rooms()
+		self._forget_tokens(user_id)
+		return orm_job
+
+	def purge(self, user_id: int, batch_size: int) -> int:
+		"""
+		Deletes a batch of a deleted user's rows, see cascade.user_steps
+
+		Returns
+		-------
+		The amount of deleted rows, 0 once the user is gone
+
+		Raises
+		-------
+		sqlalchemy.exc.SQLAlchemyError
+		"""
+		with self._database.scope as scope:
+			return cascade.purge(scope, cascade.user_steps(and_(orm.Users.id == user_id, orm.Users.date_deleted.isnot(None))), batch_size)
+
+	# region Internal
+	def _get(self, user_id: int) -> orm.Users:
+		with self._database.scope as scope:
+			return scope.query(orm.Users).filter(orm.Users.id == user_id, _NOT_DELETED).one()
+
+	@staticmethod
+	def _revoke(scope: 'th_Session', user_id: int, cred_version: int) -> None:
+		""" Invalidates the user's stateless tokens with a lower cred_version """
+		statement = postgresql.insert(orm.UsersRevocations.__table__).values(user_id=user_id, cred_version=cred_version)
+		scope.execute(statement.on_conflict_do_update(
+			index_elements=[orm.UsersRevocations.user_id],
+			set_={"cred_version": statement.excluded.cred_version, "date_created": func.now()}
+		))
+
+	def _forget_tokens(self, user_id: int) -> None:
+		if self._tokens_cache is not None:
+			self._tokens_cache.invalidate_user(user_id)
+	# endregion Internal
@@ -1,6 +1,7 @@
 import typing
 if typing.TYPE_CHECKING:
 	from core.database import Database as th_Database
+	from core.pagination import Page as th_Page
 
 from sqlalchemy import or_
 
@@ -35,7 +36,7 @@ class UsersBans:
 		with self._database.scope as scope:
 			return scope.query(orm.UsersBans).filter(orm.UsersBans.user_id == user_id).one()
 
-	def get_all(self, user_id_filter: int = None, banner_id_filter: int = None) -> typing.List[orm.UsersBans]:
+	def get_all(self, user_id_filter: int = None, banner_id_filter: int = None, page: 'th_Page' = None) -> typing.Iterable[orm.UsersBans]:
 		"""
 		Raises
 		-------
@@ -47,9 +48,22 @@ class UsersBans:
 				query = query.filter(orm.UsersBans.user_id == user_id_filter)
 			if banner_id_filter is not None:
 				query = query.filter(orm.UsersBans.banner_id == banner_id_filter)
-			return query.all()
+			if page is not None:
+				query = page.apply(query, orm.UsersBans.date_created, orm.UsersBans.user_id)
+			return query.all() if page is None else page.fetch(query)
 
-	def get_all_visible(self, user_id: int = None, user_id_filter: int = None, banner_id_filter: int = None) -> typing.List[orm.UsersBans]:
+	def get_all_user_ids(self) -> typing.Set[int]:
+		"""
+		Raises
+		-------
+		sqlalchemy.exc.SQLAlchemyError
+		"""
+		with self._database.scope as scope:
+			return {user_id for user_id, in scope.query(orm.UsersBans.user_id)}
+
+	def get_all_visible(
+			self, user_id: int = None, user_id_filter: int = None, banner_id_filter: int = None, page: 'th_Page' = None
+	) -> typing.Iterable[orm.UsersBans]:
 		"""
 		Raises
 		-------
@@ -66,7 +80,9 @@ class UsersBans:
 				query = query.filter(orm.UsersBans.user_id == user_id_filter)
 			if banner_id_filter is not None:
 				query = query.filter(orm.UsersBans.banner_id == banner_id_filter)
-			return query.all()
+			if page is not None:
+				query = page.apply(query, orm.UsersBans.date_created, orm.UsersBans.user_id)
+			return query.all() if page is None else page.fetch(query)
 
 	def update(self, user_id: int, reason: str) -> None:
 		"""
@@ -0,0 +1,49 @@
+"""
+Conditions on a room id column, shared by the models' visibility filters
+They are correlated EXISTS subqueries, so a whole listing is decided by the database in one statement
+The subqueries use aliases, so they also work on queries of the same table
+"""
+import typing
+if typing.TYPE_CHECKING:
+	from sqlalchemy.sql.elements import ColumnElement as th_ColumnElement
+
+from sqlalchemy import and_, exists, true, false
+
+from models import orm
+
+_rooms = orm.Rooms.__table__.alias("visibility_rooms")
+_rooms_users = orm.RoomsUsers.__table__.alias("visibility_rooms_users")
+_rooms_bans = orm.RoomsBans.__table__.alias("visibility_rooms_bans")
+
+
+def room_owned_by(room_id: 'th_ColumnElement', user_id: int) -> 'th_ColumnElement':
+	return exists().where(and_(_rooms.c.id == room_id, _rooms.c.user_id == user_id))
+
+
+def room_joined_by(room_id: 'th_ColumnElement', user_id: int) -> 'th_ColumnElement':
+	return exists().where(and_(_rooms_users.c.room_id == room_id, _rooms_users.c.user_id == user_id))
+
+
+def room_has_users(room_id: 'th_ColumnElement') -> 'th_ColumnElement':
+	return exists().where(_rooms_users.c.room_id == room_id)
+
+
+def room_deleted(room_id: 'th_ColumnElement') -> 'th_ColumnElement':
+	""" Marked as deleted, its rows are hidden until a job purges them """
+	return exists().where(and_(_rooms.c.id == room_id, _rooms.c.date_deleted.isnot(None)))
+
+
+def room_banned(room_id: 'th_ColumnElement') -> 'th_ColumnElement':
+	return exists().where(_rooms_bans.c.room_id == room_id)
+
+
+def room_passes(room_id: 'th_ColumnElement', exclude_banned: bool, exclude_public: bool, exclude_private: bool) -> 'th_ColumnElement':
+	""" Room is not excluded by the authorization filters """
+	if exclude_public and exclude_private:
+		return false()
+	conditions = []
+	if exclude_banned:
+		conditions.append(~room_banned(room_id))
+	if exclude_public or exclude_private:
+		conditions.append(exists().where(and_(_rooms.c.id == room_id, _rooms.c.is_public.is_(exclude_private))))
+	return and_(*conditions) if conditions else true()
@@ -6,6 +6,7 @@ from core import responses
 
 if typing.TYPE_CHECKING:
 	from services.request import Request as th_s_Request
+	from services.batch import Batch as th_s_Batch
 	from core.request import Request as th_Request
 	from controllers.login import Login as th_c_Login
 	from controllers.users import Users as th_c_Users
@@ -14,16 +15,18 @@ if typing.TYPE_CHECKING:
 	from controllers.rooms_bans import RoomsBans as th_c_RoomsBans
 	from controllers.rooms_users import RoomsUsers as th_c_RoomsUsers
 	from controllers.posts import Posts as th_c_Posts
+	from controllers.stats import Stats as th_c_Stats
+	from controllers.jobs import Jobs as th_c_Jobs
 
 	th_Controller_Method = typing.Callable[[th_Request], responses.Response]
 	th_Methods = typing.Dict[str, th_Controller_Method]
 
 
 def init(
-		s_request: 'th_s_Request',
+		s_request: 'th_s_Request', s_batch: 'th_s_Batch',
 		c_login: 'th_c_Login', c_users: 'th_c_Users', c_users_bans: 'th_c_UsersBans',
 		c_rooms: 'th_c_Rooms', c_rooms_bans: 'th_c_RoomsBans', c_rooms_users: 'th_c_RoomsUsers',
-		c_posts: 'th_c_Posts'
+		c_posts: 'th_c_Posts', c_stats: 'th_c_Stats', c_jobs: 'th_c_Jobs'
 	) -> flask.Blueprint:
 	bp_routes = flask.Blueprint("bp_routes", __name__)
 
@@ -52,7 +55,14 @@ def init(
 			for key in insert.keys():
 				request.body[key] = insert[key]
 		# Run method
-		return method(request).to_flask()
+		response = method(request).to_flask()
+		# Listings have already answered If-None-Match with an ETag of their rows
+		# Any other OK response gets an ETag of its body, which only saves sending it
+		if flask.request.method == "GET" and isinstance(response, flask.Response) and response.status_code == HTTPStatus.OK \
+				and not response.is_streamed and "ETag" not in response.headers:
+			response.add_etag()
+			response.make_conditional(flask.request)
+		return response
 
 	def process_inner(controller_method: 'th_Controller_Method', body_override: dict) -> responses.Response:
 		request_response = s_request.from_flask(flask.request)
@@ -65,6 +75,11 @@ def init(
 	# region Route strings
 	r_root						= ""											# /
 	r_login						= "/login"										# /login
+	r_login_ticket				= r_login+"/ticket"								# /login/ticket
+	r_stats						= "/stats"										# /stats
+	r_batch						= "/batch"										# /batch
+	r_jobs						= "/jobs"										# /jobs
+	r_jobs_jobid				= r_jobs+r_id("job_id")							# /jobs/<job_id>
 	r_users						= r_root+"/users"								# /users
 	r_users_userid				= r_users+r_id("user_id")						# /users/<user_id>
 	r_users_userid_rooms		= r_users_userid+"/rooms"						# /users/<user_id>/rooms
@@ -78,6 +93,8 @@ def init(
 	r_rooms_roomid_bans			= r_rooms_roomid+"/bans" 						# /rooms/<room_id>/bans
 	r_rooms_roomid_posts		= r_rooms_roomid+"/posts"						# /rooms/<room_id>/posts
 	r_rooms_roomid_posts_post_id= r_rooms_roomid_posts+r_id("post_id")			# /rooms/<room_id>/posts
+	r_rooms_roomid_posts_stream	= r_rooms_roomid_posts+"/stream"				# /rooms/<room_id>/posts/stream
+	r_rooms_roomid_posts_bulk	= r_rooms_roomid_posts+"/bulk"					# /rooms/<room_id>/posts/bulk
 	r_rooms_room_id_users		= r_rooms_roomid+"/users"						# /rooms/<room_id>/users
 	r_rooms_room_id_users_userid = r_rooms_room_id_users+r_id("user_id")		# /rooms/<room_id>/users/<user_id>
 	r_rooms_room_id_users_userid_posts = r_rooms_room_id_users_userid+"/posts"	# /rooms/<room_id>/users/<user_id>/posts
@@ -90,6 +107,38 @@ def init(
 			"POST": c_login.login
 		})
 
+	@bp_routes.route(r_login_ticket, methods=API_METHODS)
+	def login_ticket() -> flask.Response:
+		return process_request({
+			"POST": c_login.ticket
+		})
+
+	@bp_routes.route(r_stats, methods=API_METHODS)
+	def stats() -> flask.Response:
+		return process_request({
+			"GET": c_stats.get
+		})
+
+	@bp_routes.route(r_batch, methods=API_METHODS)
+	def batch() -> flask.Response:
+		return process_request({
+			"POST": s_batch.run
+		})
+
+	@bp_routes.route(r_jobs, methods=API_METHODS)
+	def jobs() -> flask.Response:
+		return process_request({
+			"GET": c_jobs.get_all
+		})
+
+	@bp_routes.route(r_jobs_jobid, methods=API_METHODS)
+	def jobs_jobid(job_id: str) -> flask.Response:
+		return process_request({
+			"GET": c_jobs.get
+		}, {
+			"job_id": try_int(job_id)
+		})
+
 	# region /users
 
 	@bp_routes.route(r_users, methods=API_METHODS)
@@ -278,6 +327,24 @@ def init(
 			"post_id": try_int(post_id)
 		})
 
+	# Matched before /rooms/<room_id>/posts/<post_id>, a static part outranks a variable one
+	@bp_routes.route(r_rooms_roomid_posts_stream, methods=API_METHODS)
+	def rooms_roomid_posts_stream(room_id: str):
+		return process_request({
+			"GET": c_posts.stream
+		}, {
+			"room_id": try_int(room_id)
+		})
+
+	# Matched before /rooms/<room_id>/posts/<post_id>, a static part outranks a variable one
+	@bp_routes.route(r_rooms_roomid_posts_bulk, methods=API_METHODS)
+	def rooms_roomid_posts_bulk(room_id: str):
+		return process_request({
+			"POST": c_posts.create_bulk
+		}, {
+			"room_id": try_int(room_id)
+		})
+
 	@bp_routes.route(r_rooms_roomid_bans, methods=API_METHODS)
 	def rooms_roomid_bans(room_id: str):
 		return process_request({
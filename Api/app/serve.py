@@ -0,0 +1,47 @@
+import multiprocessing
+import sys
+
+# External
+from gunicorn.app.base import BaseApplication
+
+import core.config
+import main
+
+
+class Server(BaseApplication):
+	"""
+	Production server
+	Pre-forks [App] workers processes, each serving requests with [App] threads threads
+	The app is built once in the master process, so passwords are only prompted for once
+	"""
+
+	def __init__(self, cfg: core.config.Config):
+		self._cfg = cfg
+		super().__init__()
+
+	def load_config(self):
+		workers = self._cfg[self._cfg.APP_WORKERS]
+		if workers < 1:
+			workers = multiprocessing.cpu_count()
+		self.cfg.set("bind", f"{self._cfg[self._cfg.APP_HOST]}:{self._cfg[self._cfg.APP_PORT]}")
+		self.cfg.set("workers", workers)
+		self.cfg.set("threads", max(self._cfg[self._cfg.APP_THREADS], 1))
+		self.cfg.set("worker_class", "gthread")
+		self.cfg.set("preload_app", True)
+		# Gunicorn's default, without the query string, event streams carry their ticket there
+		self.cfg.set("access_log_format", '%(h)s %(l)s %(u)s %(t)s "%(m)s %(U)s %(H)s" %(s)s %(b)s "%(f)s" "%(a)s"')
+
+	def load(self):
+		database = main.connect_db(self._cfg)
+		app = main.create_app(self._cfg, database)
+		# Workers open their own connections after the fork
+		database.dispose()
+		return app
+
+
+def serve():
+	Server(core.config.Config(sys.path[0], "config")).run()
+
+
+if __name__ == "__main__":
+	serve()
@@ -3,8 +3,10 @@ import typing
 if typing.TYPE_CHECKING:
 	from core.auth.action import Action as th_Action
 	from core.auth.user import User as th_User
+	from models.rooms import RoomAccess as th_RoomAccess
 
 from core import responses
+from core.auth.action import Action
 from core.auth.user import Registered
 
 
@@ -16,10 +18,8 @@ class Auth:
 			user: 'th_User',
 			allowed_ids: typing.Union[int, typing.List[int]] = None
 		) -> responses.Response:
-		if not isinstance(actions, list):
-			actions = [actions]
 		# Can the user execute the given actions?
-		if all([action in user.role.actions for action in actions]):
+		if user.role.allows(actions):
 			return responses.OKEmpty()
 		# The action can now be only executed by allowed user ids
 		# Does this user have a user id?
@@ -33,3 +33,24 @@ class Auth:
 			if user.user_id in allowed_ids:
 				return responses.OKEmpty()
 		return responses.Forbidden()
+
+	# noinspection PyMethodMayBeStatic
+	def exclusions(self, user: 'th_User', actions: typing.List['th_Action']) -> typing.List[bool]:
+		"""
+		For each action, whether the user's role lacks it
+		Listings exclude what the user can't access, instead of being forbidden
+		"""
+		mask = user.role.mask
+		return [mask & action.bit == 0 for action in actions]
+
+	def authorize_room_access(self, user: 'th_User', access: 'th_RoomAccess') -> responses.Response:
+		""" Can the user view the room, and so its users and posts """
+		if access.is_banned:
+			# Can the user view banned room
+			auth_response = self.authorize(Action.ROOMS_ACCESS_BANNED, user, access.room.user_id)
+			if not isinstance(auth_response, responses.OKEmpty): return auth_response
+		return self.authorize(
+			Action.ROOMS_ACCESS_PUBLIC if access.room.is_public else Action.ROOMS_ACCESS_PRIVATE,
+			user,
+			access.allowed_ids
+		)
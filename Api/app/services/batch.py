@@ -0,0 +1,191 @@
+import typing
+if typing.TYPE_CHECKING:
+	from core.request import Request as th_Request
+
+import os
+import json
+import threading
+import concurrent.futures
+
+import flask
+import werkzeug.exceptions
+
+from core import responses, validation, serialization, context
+from core.request import BODY_ITEMS
+
+METHODS = ["GET", "POST", "PATCH", "DELETE"]
+# Headers of a sub-response which are kept in its result
+_HEADERS = ("ETag", "Last-Modified", "Next-Cursor", "Retry-After")
+# Every sub-request has its own body, the rest of what's memoized is shared
+_OWN_NAMESPACES = ("request_body",)
+# Threads have their own database sessions, only the authenticated user is shared with them
+_THREAD_NAMESPACES = ("request_users",)
+
+
+class Batch:
+	"""
+	Sub-requests, {"method", "path", "body"}, dispatched through the app's routes within one HTTP request
+	They're authenticated once with the batch's token, and share its database session and memoized queries
+	With parallel, consecutive GET sub-requests run side by side on threads of their own, the others run one at a time in order
+	Each sub-request's result is at its position, {"status", "headers", "body"}
+	"""
+
+	def __init__(self, items_max: int, threads: int, strict_requests: bool):
+		"""
+		Parameters
+		----------
+		items_max Max amount of sub-requests in a batch
+		threads Threads shared by the parallel sub-requests of every batch, 0 runs them one at a time
+		"""
+		self._threads = threads
+		self._executor: typing.Optional[concurrent.futures.ThreadPoolExecutor] = None
+		self._executor_pid: typing.Optional[int] = None
+		self._executor_lock = threading.Lock()
+		self._stats_lock = threading.Lock()
+		self._batches = 0
+		self._requests = 0
+		self._requests_parallel = 0
+
+		# Validators, built once
+		self._validator = validation.Dict({
+			BODY_ITEMS: validation.List(length_min=1, length_max=items_max),
+			"parallel": validation.Boolean(allow_none=True),
+		}, allow_undefined_keys=not strict_requests)
+		# Any JSON is a sub-request's body, it's checked by its route
+		self._item_validator = validation.Dict({
+			"method": validation.Choice(METHODS),
+			"path": validation.String(length_min=1),
+		}, allow_undefined_keys=True)
+
+	def run(self, request: 'th_Request') -> responses.Response:
+		# Validation
+		try: self._validator.validate(request.body)
+		except validation.Error as ve: return responses.Unprocessable(ve.errors)
+		items = request.body[BODY_ITEMS]
+		errors = {}
+		for index, item in enumerate(items):
+			try:
+				self._item_validator.validate(item)
+				if item["method"] == "GET" and item.get("body") is not None:
+					if not isinstance(item["body"], dict):
+						raise validation.Error({"body": ["A GET's body is its query, expected dict"]})
+					if "?" in item["path"]:
+						raise validation.Error({"body": ["The path already has a query"]})
+			except validation.Error as ve:
+				# JSON's keys are strings, orjson doesn't convert them
+				errors[str(index)] = ve.errors
+		if len(errors) > 0: return responses.Unprocessable({BODY_ITEMS: errors})
+
+		parallel = request.body.get("parallel") is True and self._threads > 0
+		app = flask.current_app._get_current_object()
+		base_url = flask.request.url_root
+		headers = {} if flask.request.headers.get("token") is None else {"token": flask.request.headers["token"]}
+		# Nested batches could multiply a request's work without bound
+		endpoint = flask.request.url_rule.endpoint
+		namespaces = context.shared(_OWN_NAMESPACES)
+
+		results: typing.List[typing.Optional[dict]] = [None] * len(items)
+		gets: typing.List[int] = []
+		for index, item in enumerate(items + [None]):
+			if parallel and item is not None and item["method"] == "GET":
+				gets.append(index)
+				continue
+			# Reads are independent of each other, they run once every write before them is done
+			if len(gets) == 1:
+				results[gets[0]] = self._dispatch(app, base_url, headers, endpoint, namespaces, items[gets[0]])
+			elif len(gets) > 1:
+				thread_namespaces = {namespace: namespaces[namespace] for namespace in _THREAD_NAMESPACES if namespace in namespaces}
+				futures = [
+					(i, self._get_executor().submit(self._dispatch, app, base_url, headers, endpoint, dict(thread_namespaces), items[i]))
+					for i in gets
+				]
+				for i, future in futures:
+					results[i] = future.result()
+				with self._stats_lock:
+					self._requests_parallel += len(gets)
+			gets = []
+			if item is not None:
+				results[index] = self._dispatch(app, base_url, headers, endpoint, namespaces, item)
+
+		with self._stats_lock:
+			self._batches += 1
+			self._requests += len(items)
+		return responses.OK(results)
+
+	def stats(self) -> dict:
+		with self._stats_lock:
+			return {
+				"threads": self._threads,
+				"batches": self._batches,
+				"requests": self._requests,
+				"requests_parallel": self._requests_parallel,
+			}
+
+	# region Internal
+	def _dispatch(self, app: flask.Flask, base_url: str, headers: dict, endpoint: str, namespaces: dict, item: dict) -> dict:
+		""" Runs in a request context of its own, a thread's first one also gets an app context, which closes its session """
+		method = item["method"]
+		body = item.get("body")
+		if body is None:
+			arguments = {}
+		elif method == "GET":
+			arguments = {"query_string": body}
+		else:
+			arguments = {"data": serialization.dumps(body), "content_type": serialization.MIMETYPE}
+		# The body's memo is the only one which the sub-requests of a batch don't share
+		for namespace in _OWN_NAMESPACES:
+			namespaces.pop(namespace, None)
+		with app.test_request_context(
+				item["path"], base_url=base_url, method=method, headers=headers,
+				environ_overrides=context.environ(namespaces), **arguments
+		):
+			response = app.make_response(_view(app, endpoint))
+			try:
+				# Event streams never end, their subscription is closed right away
+				if response.mimetype == responses.OKEvents.MIMETYPE:
+					response.close()
+					response = app.make_response(responses.Unprocessable({"path": ["Event streams can't be batched"]}).to_flask())
+				# A streamed listing would be buffered whole in the batch's body, its paged form is batched instead
+				elif response.is_streamed:
+					response.close()
+					response = app.make_response(responses.Unprocessable({"stream": ["Streamed listings can't be batched"]}).to_flask())
+				return _result(response)
+			finally:
+				response.close()
+
+	def _get_executor(self) -> concurrent.futures.ThreadPoolExecutor:
+		# Created on first use in each app process, threads don't survive a fork
+		with self._executor_lock:
+			if self._executor is None or self._executor_pid != os.getpid():
+				self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=self._threads, thread_name_prefix="batch")
+				self._executor_pid = os.getpid()
+			return self._executor
+	# endregion Internal
+
+
+# region Internal
+def _view(app: flask.Flask, batch_endpoint: str) -> typing.Any:
+	""" The matched view's return value, errors are returned as responses like the app's error handler does """
+	try:
+		if flask.request.routing_exception is not None:
+			raise flask.request.routing_exception
+		if flask.request.url_rule.endpoint == batch_endpoint:
+			return responses.Unprocessable({"path": ["Batches can't be nested"]}).to_flask()
+		return app.view_functions[flask.request.url_rule.endpoint](**flask.request.view_args)
+	except werkzeug.exceptions.HTTPException as exception:
+		return responses.Errors(exception.code, {"description": exception.description}).to_flask()
+	except Exception as exception:
+		# One failed sub-request doesn't fail the others
+		return responses.InternalException(exception, {"server": ["error"]}).to_flask()
+
+
+def _result(response: flask.Response) -> dict:
+	result = {"status": response.status_code}
+	headers = {name: response.headers[name] for name in _HEADERS if name in response.headers}
+	if len(headers) > 0:
+		result["headers"] = headers
+	data = response.get_data()
+	if len(data) > 0:
+		result["body"] = json.loads(data) if response.is_json else data.decode("utf-8")
+	return result
+# endregion Internal
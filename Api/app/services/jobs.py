@@ -0,0 +1,131 @@
+import typing
+if typing.TYPE_CHECKING:
+	from core.database import Database as th_Database
+	from models.jobs import Jobs as th_m_Jobs
+	from models.users import Users as th_m_Users
+	from models.rooms import Rooms as th_m_Rooms
+	from models.posts import Posts as th_m_Posts
+
+import time
+import logging
+import datetime
+import threading
+
+from models import orm
+
+
+class Worker:
+	"""
+	Runs the jobs table's jobs, any amount of workers can run side by side
+	A job runs in batches of a transaction each, its lease is extended after every batch
+	A failed job is retried with an exponential backoff, until it runs out of attempts
+	Post tombstones are purged by a job an idle worker enqueues once a day, within the off-peak hours
+	"""
+
+	def __init__(
+			self, database: 'th_Database', m_jobs: 'th_m_Jobs', m_users: 'th_m_Users', m_rooms: 'th_m_Rooms', m_posts: 'th_m_Posts',
+			batch_size: int, batch_pause: float, lease: float, attempts_max: int, retry_delay: float, poll_interval: float,
+			posts_retention: float, posts_purge_hours: typing.Tuple[int, int]
+	):
+		"""
+		Parameters
+		----------
+		batch_size Max amount of rows deleted per transaction
+		batch_pause Seconds between a job's batches
+		lease Seconds a job stays claimed without progress, before another worker may take it over
+		attempts_max Attempts before a job is marked as failed
+		retry_delay Seconds before the first retry, doubled on each one after
+		poll_interval Seconds between polls of an empty queue
+		posts_retention Seconds a deleted post is kept as a tombstone
+		posts_purge_hours Local hours from the first, and up to the second, within which post tombstones are purged
+		"""
+		self._database = database
+		self._m_jobs = m_jobs
+		self._batch_size = batch_size
+		self._batch_pause = batch_pause
+		self._lease = datetime.timedelta(seconds=lease)
+		self._attempts_max = attempts_max
+		self._retry_delay = retry_delay
+		self._poll_interval = poll_interval
+		self._posts_purge_hours = posts_purge_hours
+		# The day this process last enqueued the posts' purge
+		self._posts_purge_day: typing.Optional[datetime.date] = None
+		posts_retention = datetime.timedelta(seconds=posts_retention)
+		# A batch of a job, returns the amount of processed rows, 0 once done
+		self._handlers: typing.Dict[str, typing.Callable[[int, int], int]] = {
+			orm.Jobs.KIND_USERS_PURGE: m_users.purge,
+			orm.Jobs.KIND_ROOMS_PURGE: m_rooms.purge,
+			orm.Jobs.KIND_POSTS_PURGE: lambda _, batch_size: m_posts.purge(posts_retention, batch_size),
+		}
+
+	def run(self, stop: threading.Event = None) -> None:
+		""" Runs jobs until stopped, failures to reach the database are waited out """
+		while stop is None or not stop.is_set():
+			try:
+				ran = self.run_once()
+				if not ran:
+					self._schedule()
+			except Exception as exception:
+				logging.exception(exception)
+				ran = False
+			finally:
+				self._database.close_session()
+			if not ran:
+				time.sleep(self._poll_interval)
+
+	def run_once(self) -> bool:
+		"""
+		Claims and runs one job
+
+		Returns
+		-------
+		Whether there was a job to run
+
+		Raises
+		-------
+		sqlalchemy.exc.SQLAlchemyError
+			The job couldn't be claimed
+		"""
+		job = self._m_jobs.claim(self._lease)
+		if job is None:
+			return False
+		try:
+			handler = self._handlers[job.kind]
+			while True:
+				count = handler(job.target_id, self._batch_size)
+				if count < 1:
+					break
+				if not self._m_jobs.progress(job.id, job.attempts, count, self._lease):
+					# Taken over by another worker after the lease ran out
+					return True
+				if self._batch_pause > 0:
+					time.sleep(self._batch_pause)
+			self._m_jobs.finish(job.id, job.attempts)
+		except Exception as exception:
+			logging.exception(exception)
+			retry_after = None
+			if job.attempts < self._attempts_max:
+				retry_after = datetime.timedelta(seconds=self._retry_delay * 2 ** (job.attempts - 1))
+			self._m_jobs.fail(job.id, job.attempts, f"{type(exception).__name__}: {exception}", retry_after)
+		return True
+
+	# region Internal
+	def _schedule(self) -> None:
+		"""
+		Enqueues the posts' purge, once a day
+		Skipped if any worker has created one since midnight, even if it has already run
+		"""
+		now = datetime.datetime.now()
+		if now.date() == self._posts_purge_day or not _within(now.hour, *self._posts_purge_hours):
+			return
+		midnight = datetime.datetime.combine(now.date(), datetime.time()).astimezone()
+		self._m_jobs.enqueue(orm.Jobs.KIND_POSTS_PURGE, created_since=midnight)
+		self._posts_purge_day = now.date()
+	# endregion Internal
+
+
+def _within(hour: int, start: int, end: int) -> bool:
+	""" Whether hour is in [start, end), which may wrap past midnight """
+	if start <= end:
+		return start <= hour < end
+	return hour >= start or hour < end
@@ -0,0 +1,142 @@
+import typing
+
+import os
+import threading
+import concurrent.futures
+import concurrent.futures.process
+
+# External
+import argon2
+
+# Hasher of the pool's worker process
+_worker_hasher: typing.Optional[argon2.PasswordHasher] = None
+
+
+def _get_worker_hasher() -> argon2.PasswordHasher:
+	global _worker_hasher
+	if _worker_hasher is None:
+		_worker_hasher = argon2.PasswordHasher()
+	return _worker_hasher
+
+
+def _worker_hash(password: str) -> str:
+	return _get_worker_hasher().hash(password)
+
+
+def _worker_verify(passhash: str, password: str) -> bool:
+	return _get_worker_hasher().verify(passhash, password)
+
+
+class Busy(Exception):
+	""" Too many passwords are waiting to be hashed """
+
+
+class Passwords:
+	"""
+	Hashes and verifies passwords in a bounded process pool, so that login bursts don't starve other requests
+	At most queue_limit passwords are hashed or waiting at once, any more fail with Busy
+	"""
+
+	def __init__(self, workers: int, queue_limit: int, timeout: float):
+		"""
+		Parameters
+		----------
+		workers Hashing processes per app process
+		queue_limit Max amount of passwords hashed or waiting at once
+		timeout Max seconds to wait for a result
+		"""
+		self._workers = workers
+		self._queue_limit = queue_limit
+		self._timeout = timeout
+		self._password_hasher = argon2.PasswordHasher()
+		self._executor: typing.Optional[concurrent.futures.ProcessPoolExecutor] = None
+		self._executor_pid: typing.Optional[int] = None
+		self._executor_lock = threading.Lock()
+		self._slots = threading.BoundedSemaphore(queue_limit)
+		self._pending = 0
+		self._pending_lock = threading.Lock()
+		self.rejected = 0
+
+	def hash(self, password: str) -> str:
+		"""
+		Raises
+		-------
+		Busy
+		argon2.exceptions.HashingError
+		"""
+		return self._run(_worker_hash, password)
+
+	def verify(self, passhash: str, password: str) -> bool:
+		"""
+		Raises
+		-------
+		Busy
+		argon2.exceptions.VerifyMismatchError
+		argon2.exceptions.VerificationError
+		argon2.exceptions.InvalidHash
+		"""
+		return self._run(_worker_verify, passhash, password)
+
+	def check_needs_rehash(self, passhash: str) -> bool:
+		# Only parses the hash's parameters, cheap enough to run inline
+		return self._password_hasher.check_needs_rehash(passhash)
+
+	def stats(self) -> dict:
+		return {
+			"workers": self._workers,
+			"queue_limit": self._queue_limit,
+			"pending": self._pending,
+			"rejected": self.rejected,
+		}
+
+	# region Internal
+	def _run(self, function: typing.Callable, *args) -> typing.Any:
+		if not self._slots.acquire(blocking=False):
+			with self._pending_lock:
+				self.rejected += 1
+			raise Busy()
+		with self._pending_lock:
+			self._pending += 1
+		executor = None
+		try:
+			executor = self._get_executor()
+			future = executor.submit(function, *args)
+		except concurrent.futures.process.BrokenProcessPool:
+			self._release()
+			self._drop_executor(executor)
+			raise Busy()
+		except BaseException:
+			self._release()
+			raise
+		# The slot is freed once the work is done, even if we've stopped waiting for it
+		future.add_done_callback(lambda _: self._release())
+		try:
+			return future.result(timeout=self._timeout)
+		except concurrent.futures.TimeoutError:
+			raise Busy()
+		except concurrent.futures.process.BrokenProcessPool:
+			# A worker died, the pool fails every call from now on, the next one gets a new pool
+			self._drop_executor(executor)
+			raise Busy()
+
+	def _release(self) -> None:
+		with self._pending_lock:
+			self._pending -= 1
+		self._slots.release()
+
+	def _get_executor(self) -> concurrent.futures.ProcessPoolExecutor:
+		# Created on first use in each app process, a pool can't be inherited through a fork
+		with self._executor_lock:
+			if self._executor is None or self._executor_pid != os.getpid():
+				self._executor = concurrent.futures.ProcessPoolExecutor(max_workers=self._workers)
+				self._executor_pid = os.getpid()
+			return self._executor
+
+	def _drop_executor(self, executor: typing.Optional[concurrent.futures.ProcessPoolExecutor]) -> None:
+		with self._executor_lock:
+			# Another thread may have replaced it already
+			if executor is None or self._executor is not executor:
+				return
+			self._executor = None
+		executor.shutdown(wait=False)
+	# endregion Internal
@@ -0,0 +1,181 @@
+import typing
+if typing.TYPE_CHECKING:
+	from core.database import Database as th_Database
+	from models.posts import Posts as th_m_Posts
+
+import os
+import json
+import time
+import queue
+import select
+import logging
+import threading
+
+from sqlalchemy.orm.exc import NoResultFound
+
+from core import serialization
+from models import posts
+
+# Seconds between waits for notifications, and before reconnecting after a failure
+_POLL_INTERVAL = 5.0
+_RETRY_DELAY = 1.0
+
+
+class Full(Exception):
+	""" Too many event streams are open in this process """
+
+
+class Subscription:
+	""" A room's events for one stream, the stream ends once it's closed """
+
+	def __init__(self, room_id: int, queue_size: int):
+		self.room_id = room_id
+		self.closed = False
+		self._events: queue.Queue = queue.Queue(queue_size)
+
+	def get(self, timeout: float) -> typing.Optional[bytes]:
+		""" The next event, None if there was none for timeout seconds or it has been closed """
+		if self.closed:
+			return None
+		try:
+			return self._events.get(timeout=timeout)
+		except queue.Empty:
+			return None
+
+	def put(self, event: bytes) -> None:
+		""" Called by the listener, never blocks it """
+		if self.closed:
+			return
+		try:
+			self._events.put_nowait(event)
+		except queue.Full:
+			# Too far behind, it reconnects and fetches the posts again instead of getting them late
+			self.closed = True
+
+
+class PostEvents:
+	"""
+	Created, updated and deleted posts as Server-Sent Events
+	Each process LISTENs on one connection of its own, and fans the notifications out to its subscriptions
+	Posts are fetched and serialized once per event, not once per subscription
+	"""
+
+	def __init__(self, database: 'th_Database', m_posts: 'th_m_Posts', subscriptions_max: int, queue_size: int):
+		"""
+		Parameters
+		----------
+		subscriptions_max Max amount of open streams per process, each one holds a thread for as long as it's open
+		queue_size Max amount of events waiting to be sent to a stream
+		"""
+		self._database = database
+		self._m_posts = m_posts
+		self._subscriptions_max = subscriptions_max
+		self._queue_size = queue_size
+		self._rooms: typing.Dict[int, typing.List[Subscription]] = {}
+		self._count = 0
+		self._lock = threading.Lock()
+		self._listener: typing.Optional[threading.Thread] = None
+		self._listener_pid: typing.Optional[int] = None
+		# Set while the listener's connection LISTENs
+		self.listening = threading.Event()
+		self.events = 0
+		self.rejected = 0
+
+	def subscribe(self, room_id: int) -> Subscription:
+		"""
+		Raises
+		-------
+		Full
+		"""
+		with self._lock:
+			if self._count >= self._subscriptions_max:
+				self.rejected += 1
+				raise Full()
+			subscription = Subscription(room_id, self._queue_size)
+			self._rooms.setdefault(room_id, []).append(subscription)
+			self._count += 1
+			self._start_listener()
+		return subscription
+
+	def unsubscribe(self, subscription: Subscription) -> None:
+		subscription.closed = True
+		with self._lock:
+			subscriptions = self._rooms.get(subscription.room_id, [])
+			if subscription in subscriptions:
+				subscriptions.remove(subscription)
+				self._count -= 1
+			if len(subscriptions) < 1:
+				self._rooms.pop(subscription.room_id, None)
+
+	def stats(self) -> dict:
+		with self._lock:
+			return {
+				"subscriptions": self._count,
+				"subscriptions_max": self._subscriptions_max,
+				"rooms": len(self._rooms),
+				"listening": self.listening.is_set(),
+				"events": self.events,
+				"rejected": self.rejected,
+			}
+
+	# region Internal
+	def _start_listener(self) -> None:
+		""" Lock must be held. Started on first use in each app process, a thread isn't inherited through a fork """
+		if self._listener is not None and self._listener_pid == os.getpid() and self._listener.is_alive():
+			return
+		self._listener = threading.Thread(target=self._listen, name="post-events", daemon=True)
+		self._listener_pid = os.getpid()
+		self._listener.start()
+
+	def _listen(self) -> None:
+		while True:
+			try:
+				connection = self._database.connect_listener(posts.CHANNEL)
+				self.listening.set()
+				try:
+					while True:
+						if select.select([connection], [], [], _POLL_INTERVAL) == ([], [], []):
+							continue
+						connection.poll()
+						while connection.notifies:
+							self._dispatch(connection.notifies.pop(0).payload)
+				finally:
+					self.listening.clear()
+					connection.close()
+			except Exception as exception:
+				logging.exception(exception)
+			# Notifications were missed while disconnected, streams are ended so their clients fetch the posts again
+			self._close_all()
+			time.sleep(_RETRY_DELAY)
+
+	def _dispatch(self, payload: str) -> None:
+		notification = json.loads(payload)
+		with self._lock:
+			subscriptions = list(self._rooms.get(notification["room_id"], []))
+		if len(subscriptions) < 1:
+			return
+
+		event = notification["event"]
+		if event == posts.EVENT_DELETED:
+			data = {"id": notification["id"], "room_id": notification["room_id"]}
+		else:
+			try:
+				data = self._m_posts.get(notification["id"])
+			except NoResultFound:
+				# Deleted since, its own event follows
+				return
+			finally:
+				self._database.close_session()
+		message = b"event: " + event.encode("utf-8") + b"\ndata: " + serialization.dumps(data) + b"\n\n"
+
+		with self._lock:
+			self.events += 1
+		for subscription in subscriptions:
+			subscription.put(message)
+
+	def _close_all(self) -> None:
+		with self._lock:
+			for subscriptions in self._rooms.values():
+				for subscription in subscriptions:
+					subscription.closed = True
+	# endregion Internal
@@ -3,9 +3,11 @@ if typing.TYPE_CHECKING:
 	from flask import request as th_flask_request
 	from services.users import Users as th_s_Users
 
+import copy
 import json
 
 from core import request
+from core import context
 from core import responses
 
 
@@ -15,15 +17,41 @@ class Request:
 		self._strict_requests = strict_requests
 
 	def from_flask(self, flask_request: 'th_flask_request', additional_json: dict = None) -> responses.Response:
+		# Nested routes resolve the request more than once, the token and the body are only processed once
 		token = flask_request.headers.get("token")
+		ticket = flask_request.args.get("ticket") if token is None and _is_event_stream(flask_request) else None
 
-		users_response = self._s_users.from_token_string(token)
+		if ticket is not None:
+			users_response = context.memoized("request_users", ticket, lambda: self._s_users.from_ticket_string(ticket, flask_request.path))
+		else:
+			users_response = context.memoized("request_users", token, lambda: self._s_users.from_token_string(token))
 		if not isinstance(users_response, responses.OK):
 			return users_response
 		user = users_response.object
 
+		body_response = context.memoized("request_body", None, lambda: self._body_from_flask(flask_request))
+		if not isinstance(body_response, responses.OK):
+			return body_response
+		# Callers insert/replace keys, the memoized body must stay as it was sent
+		body = copy.copy(body_response.object)
+		if isinstance(body, list):
+			body = {request.BODY_ITEMS: body}
+
+		if additional_json is not None:
+			if body is None:
+				body = {}
+			for key in additional_json:
+				body[key] = additional_json[key]
+
+		result = request.Request(user, body, flask_request.headers.get("If-None-Match"))
+		return responses.OK(result)
+
+	# region Internal
+	def _body_from_flask(self, flask_request: 'th_flask_request') -> responses.Response:
 		if flask_request.method == "GET":
 			body = flask_request.args.to_dict()
+			if _is_event_stream(flask_request):
+				body.pop("ticket", None)
 			# Convert str to int, if int
 			for key in body:
 				try:
@@ -34,6 +62,8 @@ class Request:
 			data = flask_request.get_data()
 			if len(data) < 1:
 				body = None
+			elif flask_request.mimetype == responses.OKStream.MIMETYPE_NDJSON:
+				return self._lines_from_flask(data)
 			else:
 				try:
 					body = json.loads(data.decode("utf-8"))
@@ -42,12 +72,27 @@ class Request:
 						return responses.Unprocessable({"json": "Corrupt"})
 					else:
 						body = None
+		return responses.OK(body)
 
-		if additional_json is not None:
-			if body is None:
-				body = {}
-			for key in additional_json:
-				body[key] = additional_json[key]
+	def _lines_from_flask(self, data: bytes) -> responses.Response:
+		""" NDJSON, a list of its lines' values, blank lines are skipped """
+		body = []
+		for number, line in enumerate(data.decode("utf-8").splitlines(), 1):
+			if len(line.strip()) < 1:
+				continue
+			try:
+				body.append(json.loads(line))
+			except json.JSONDecodeError:
+				if self._strict_requests:
+					return responses.Unprocessable({"json": f"Corrupt line {number}"})
+				# Keeps the items' positions, the corrupt one fails its validation
+				body.append(None)
+		return responses.OK(body)
+	# endregion Internal
 
-		result = request.Request(user, body)
-		return responses.OK(result)
+
+# region Internal
+def _is_event_stream(flask_request: 'th_flask_request') -> bool:
+	""" EventSource can't send headers, it authenticates with a ticket in the query, see controllers.login.Login.ticket """
+	return flask_request.accept_mimetypes.best == responses.OKEvents.MIMETYPE
+# endregion Internal
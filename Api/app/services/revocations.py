@@ -0,0 +1,62 @@
+import typing
+if typing.TYPE_CHECKING:
+	from models.users import Users as th_m_Users
+	from models.users_bans import UsersBans as th_m_UsersBans
+	from datetime import timedelta as th_timedelta
+
+import time
+import threading
+
+
+class Revocations:
+	"""
+	In-process view of revoked stateless tokens, refreshed from the database every refresh_interval seconds
+	A password or role change, ban or deletion takes up to refresh_interval seconds to reach every process
+	Only revocations younger than the tokens' lifetime are kept, older tokens have expired anyway
+	"""
+
+	def __init__(self, m_users: 'th_m_Users', m_users_bans: 'th_m_UsersBans', tokens_lifetime: 'th_timedelta', refresh_interval: float):
+		self._m_users = m_users
+		self._m_users_bans = m_users_bans
+		self._tokens_lifetime = tokens_lifetime
+		self._refresh_interval = refresh_interval
+		self._cred_versions: typing.Dict[int, int] = {}
+		self._banned_ids: typing.Set[int] = set()
+		self._refreshed_at: typing.Optional[float] = None
+		self._lock = threading.Lock()
+
+	def is_revoked(self, user_id: int, cred_version: int) -> bool:
+		"""
+		Raises
+		-------
+		sqlalchemy.exc.SQLAlchemyError
+			Could not be refreshed
+		"""
+		self._refresh()
+		return user_id in self._banned_ids or cred_version < self._cred_versions.get(user_id, 0)
+
+	def stats(self) -> dict:
+		return {
+			"revoked": len(self._cred_versions),
+			"banned": len(self._banned_ids),
+			"age": None if self._refreshed_at is None else time.monotonic() - self._refreshed_at,
+		}
+
+	# region Internal
+	def _refresh(self) -> None:
+		if self._refreshed_at is not None and time.monotonic() - self._refreshed_at < self._refresh_interval:
+			return
+		# Only the first load makes everyone wait, later on the stale view is used while one thread refreshes
+		if not self._lock.acquire(blocking=self._refreshed_at is None):
+			return
+		try:
+			if self._refreshed_at is not None and time.monotonic() - self._refreshed_at < self._refresh_interval:
+				return
+			cred_versions = dict(self._m_users.get_revocations(self._tokens_lifetime))
+			banned_ids = self._m_users_bans.get_all_user_ids()
+			# Swapped whole, readers never see a half built view
+			self._cred_versions, self._banned_ids = cred_versions, banned_ids
+			self._refreshed_at = time.monotonic()
+		finally:
+			self._lock.release()
+	# endregion Internal
@@ -1,7 +1,9 @@
 import typing
 if typing.TYPE_CHECKING:
 	from models.users import Users as th_m_Users
-	from cryptography.hazmat.primitives.asymmetric.rsa import RSAPublicKey as th_RSAPublicKey
+	from core.auth.tokens_cache import TokensCache as th_TokensCache
+	from core.auth.jwt import Keys as th_Keys
+	from services.revocations import Revocations as th_s_Revocations
 	from datetime import timedelta as th_timedelta
 
 from sqlalchemy.exc import SQLAlchemyError
@@ -14,21 +16,40 @@ from core.auth import roles
 
 
 class Users:
-	def __init__(self, m_users: 'th_m_Users', public_key: 'th_RSAPublicKey', tokens_lifetime: 'th_timedelta'):
+	def __init__(self, m_users: 'th_m_Users', token_keys: 'th_Keys', tokens_lifetime: 'th_timedelta', tickets_lifetime: 'th_timedelta',
+					tokens_cache: 'th_TokensCache', s_revocations: 'th_s_Revocations'):
 		self._m_users = m_users
-		self._public_key = public_key
+		self._token_keys = token_keys
 		self._tokens_lifetime = tokens_lifetime
+		self._tickets_lifetime = tickets_lifetime
+		self._tokens_cache = tokens_cache
+		self._s_revocations = s_revocations
 
 	def from_token_string(self, token: str = None) -> responses.Response:
 		if token is None:
 			return responses.OK(user.Guest(role=roles.Roles.GUEST))
 
+		# Already verified?
+		cached_user = self._tokens_cache.get(token)
+		if cached_user is not None:
+			return responses.OK(cached_user)
+
 		# Validate token
 		try:
 			token_valid = jwt.Token.from_string(token)
 		except jwt.Error as jwte:
 			return responses.Unauthorized({"token": jwte.errors})
 
+		# A ticket is only valid for its scope, and for a shorter time
+		if token_valid.claims.scope is not None:
+			return responses.Unauthorized({"token": ["Is a ticket"]})
+
+		if token_valid.stateless:
+			return self._from_stateless_token(token_valid, self._tokens_lifetime, "token")
+
+		# Invalidations from here on make the user loaded below stale
+		generation = self._tokens_cache.generation(token_valid.claims.user_id)
+
 		# Query for token verification
 		try:
 			orm_user = self._m_users.get(token_valid.claims.user_id)
@@ -41,7 +62,7 @@ class Users:
 
 		# Verify token
 		try:
-			token_valid.verify(self._public_key, orm_user.passhash, self._tokens_lifetime)
+			token_valid.verify(self._token_keys, orm_user.passhash, self._tokens_lifetime)
 		except jwt.Error as jwte:
 			return responses.Unauthorized({"token": jwte.errors})
 
@@ -51,4 +72,54 @@ class Users:
 		except KeyError as ke:
 			return responses.InternalException(ke, {"role": ["Does not exist"]})
 
-		return responses.OK(user.Registered(role=role, user_id=orm_user.id))
+		result = user.Registered(role=role, user_id=orm_user.id)
+		self._tokens_cache.put(token, result, token_valid.issued_at + self._tokens_lifetime, generation)
+		return responses.OK(result)
+
+	def from_ticket_string(self, ticket: str, scope: str) -> responses.Response:
+		"""
+		Tickets stand in for tokens where they would end up in URLs, see controllers.login.Login.ticket
+
+		Parameters
+		----------
+		scope The request's path
+		"""
+		try:
+			ticket_valid = jwt.Token.from_string(ticket)
+		except jwt.Error as jwte:
+			return responses.Unauthorized({"ticket": jwte.errors})
+		if not ticket_valid.stateless or ticket_valid.claims.scope != scope:
+			return responses.Unauthorized({"ticket": ["Wrong scope"]})
+		return self._from_stateless_token(ticket_valid, self._tickets_lifetime, "ticket")
+
+	# region Internal
+	def _from_stateless_token(self, token_valid: jwt.Token, lifetime: 'th_timedelta', key: str) -> responses.Response:
+		"""
+		Verifies the token without querying for its user
+
+		Parameters
+		----------
+		key The errors' key
+		"""
+		# Verify token
+		try:
+			token_valid.verify(self._token_keys, None, lifetime)
+		except jwt.Error as jwte:
+			return responses.Unauthorized({key: jwte.errors})
+
+		# Check if the user's credentials have changed or the user has been banned or deleted since
+		claims = token_valid.claims
+		try:
+			if self._s_revocations.is_revoked(claims.user_id, claims.cred_version):
+				return responses.Unauthorized({key: ["Revoked"]})
+		except SQLAlchemyError as sqlae:
+			return responses.DatabaseException(sqlae)
+
+		# Validate user's role
+		try:
+			role = roles.Roles.id_to_role(claims.role)
+		except (KeyError, IndexError, TypeError):
+			return responses.Unauthorized({key: ["Invalid role"]})
+
+		return responses.OK(user.Registered(role=role, user_id=claims.user_id))
+	# endregion Internal
@@ -0,0 +1,50 @@
+import multiprocessing
+import sys
+
+import core.config
+import main
+import models.jobs
+import models.posts
+import models.rooms
+import models.rooms_bans
+import models.rooms_users
+import models.users
+import models.users_bans
+import services.jobs
+
+
+def work():
+	"""
+	Runs background jobs, see services.jobs
+	Forks [Jobs] workers processes, the database's password is only prompted for once
+	"""
+	cfg = core.config.Config(sys.path[0], "config")
+	database = main.connect_db(cfg)
+	# Models
+	m_jobs			= models.jobs.			Jobs(database)
+	m_rooms_bans	= models.rooms_bans.	RoomsBans(database)
+	m_rooms_users	= models.rooms_users.	RoomsUsers(database)
+	m_posts			= models.posts.			Posts(database)
+	m_rooms			= models.rooms.			Rooms(database, m_rooms_users, m_rooms_bans, m_posts, m_jobs)
+	m_users_bans	= models.users_bans.	UsersBans(database)
+	m_users			= models.users.			Users(database, m_users_bans, m_rooms, m_rooms_users, m_rooms_bans, m_posts, m_jobs)
+	# Services
+	purge_start, purge_end = map(int, cfg[cfg.JOBS_POSTS_PURGE_HOURS].split("-", 1))
+	worker = services.jobs.Worker(
+		database, m_jobs, m_users, m_rooms, m_posts,
+		cfg[cfg.JOBS_BATCH_SIZE], cfg[cfg.JOBS_BATCH_PAUSE], cfg[cfg.JOBS_LEASE], cfg[cfg.JOBS_ATTEMPTS_MAX],
+		cfg[cfg.JOBS_RETRY_DELAY], cfg[cfg.JOBS_POLL_INTERVAL], cfg[cfg.JOBS_POSTS_RETENTION], (purge_start, purge_end)
+	)
+	# Workers open their own connections after the fork
+	database.dispose()
+	# Forked, the worker and its database are inherited rather than pickled
+	fork = multiprocessing.get_context("fork")
+	processes = [fork.Process(target=worker.run, daemon=True) for _ in range(max(cfg[cfg.JOBS_WORKERS], 1))]
+	for process in processes:
+		process.start()
+	for process in processes:
+		process.join()
+
+
+if __name__ == "__main__":
+	work()
@@ -0,0 +1,126 @@
+"""
+Shared by the benchmarks, run them from Api/ as scripts, e.g. python bench/compression.py
+The app's modules are imported from Api/app
+Benchmarks of the database run against STPP_BENCH_DSN's server (a libpq connection string),
+or a throwaway one started with pgserver if it's installed, each in a schema of its own
+"""
+import os
+import sys
+import time
+import uuid
+import shutil
+import typing
+import pathlib
+import datetime
+import tempfile
+import contextlib
+import statistics
+
+APP = pathlib.Path(__file__).resolve().parents[1] / "app"
+SCHEMA_SQL = pathlib.Path(__file__).resolve().parents[2] / "Database" / "Database.psql"
+sys.path.insert(0, str(APP))
+
+
+def timed(function, repeat: int = 5, number: int = 1) -> float:
+	""" Median seconds of one call, out of repeat runs of number calls """
+	runs = []
+	for _ in range(repeat):
+		start = time.perf_counter()
+		for _ in range(number):
+			function()
+		runs.append((time.perf_counter() - start) / number)
+	return statistics.median(runs)
+
+
+def posts(count: int) -> list:
+	""" Post-like ORM rows, as a listing loads them """
+	from models import orm
+	now = datetime.datetime.now(datetime.timezone.utc)
+	return [
+		orm.Posts(
+			id=i, date_created=now, date_updated=now, room_id=i % 50, user_id=i % 500,
+			content=f"Post number {i}, with a sentence or two of content like the ones users write"
+		)
+		for i in range(count)
+	]
+
+
+@contextlib.contextmanager
+def postgres() -> typing.Iterator[dict]:
+	""" psycopg2 connection arguments of the server """
+	import psycopg2
+	dsn = os.environ.get("STPP_BENCH_DSN")
+	if dsn is not None:
+		yield psycopg2.extensions.parse_dsn(dsn)
+		return
+	import pgserver
+	directory = tempfile.mkdtemp(prefix="stpp_bench_")
+	server = pgserver.get_server(directory, cleanup_mode="stop")
+	try:
+		yield {"host": directory, "port": "5432", "dbname": "postgres", "user": "postgres", "password": ""}
+	finally:
+		server.cleanup()
+		shutil.rmtree(directory, ignore_errors=True)
+
+
+@contextlib.contextmanager
+def schema(arguments: dict) -> typing.Iterator[str]:
+	""" A schema built from Database/Database.psql, dropped afterwards """
+	import psycopg2
+	name = f"bench_{uuid.uuid4().hex[:12]}"
+	connection = psycopg2.connect(**arguments)
+	connection.autocommit = True
+	try:
+		with connection.cursor() as cursor:
+			cursor.execute(f"CREATE SCHEMA {name}")
+			cursor.execute(f"SET search_path = {name}")
+			cursor.execute(SCHEMA_SQL.read_text())
+		yield name
+	finally:
+		with connection.cursor() as cursor:
+			cursor.execute(f"DROP SCHEMA {name} CASCADE")
+		connection.close()
+
+
+def config(arguments: dict, schema_name: str, directory: pathlib.Path):
+	""" The shipped config.ini, copied to directory, pointed at the schema, with an HS256 secret so no key files are needed """
+	import core.config
+	shutil.copy(APP / "config.ini", directory / "config.ini")
+	(directory / "secret").write_bytes(os.urandom(32))
+	cfg = core.config.Config(str(directory), "config")
+	cfg[cfg.TOKENS_ALGORITHM] = "HS256"
+	cfg[cfg.TOKENS_PRIVATE_KEY_PATH] = str(directory / "secret")
+	cfg[cfg.DB_HOST] = arguments.get("host", "localhost")
+	cfg[cfg.DB_PORT] = str(arguments.get("port", "5432"))
+	cfg[cfg.DB_NAME] = arguments.get("dbname", "postgres")
+	cfg[cfg.DB_USER] = arguments.get("user", "postgres")
+	cfg[cfg.DB_SCHEMA] = schema_name
+	return cfg
+
+
+def database(cfg, arguments: dict):
+	import core.database
+	return core.database.Database(
+		cfg[cfg.DB_HOST], cfg[cfg.DB_PORT], cfg[cfg.DB_NAME], cfg[cfg.DB_SCHEMA], cfg[cfg.DB_USER], arguments.get("password", ""),
+		cfg[cfg.DB_POOL_SIZE], cfg[cfg.DB_MAX_OVERFLOW], cfg[cfg.DB_POOL_TIMEOUT], cfg[cfg.DB_POOL_PRE_PING], cfg[cfg.DB_POOL_RECYCLE]
+	)
+
+
+def execute(database, statement: str, **parameters) -> None:
+	""" Runs a statement in a transaction of its own, for seeding """
+	from sqlalchemy import text
+	with database.scope as scope:
+		scope.execute(text(statement), parameters)
+	database.close_session()
+
+
+def size(count: int) -> str:
+	for unit in ("B", "KB", "MB"):
+		if count < 1024:
+			return f"{count:.0f}{unit}" if unit == "B" else f"{count:.1f}{unit}"
+		count /= 1024
+	return f"{count:.1f}GB"
+
+
+def ms(seconds: float) -> str:
+	return f"{seconds * 1000:.2f}ms"
@@ -0,0 +1,69 @@
+"""
+Calls per second of the roles' precompiled bitmask checks, next to the same checks as scans of a list of
+the role's actions, as roles were before. Then of services.auth.Auth's calls, which build their responses
+
+python bench/authorize.py [--number 100000]
+"""
+import argparse
+
+import _common
+
+from models import orm
+from models.rooms import RoomAccess
+from services.auth import Auth
+from core.auth.roles import Roles
+from core.auth.action import Action
+from core.auth.user import Registered
+
+# Posts.get_all's exclusions
+EXCLUSIONS = [Action.ROOMS_ACCESS_BANNED, Action.ROOMS_ACCESS_PUBLIC, Action.ROOMS_ACCESS_PRIVATE]
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--number", type=int, default=100000, help="Calls per run")
+	arguments = parser.parse_args()
+
+	auth = Auth()
+	user = Registered(Roles.USER, 2)
+	actions_list = list(Roles.USER.actions)
+	roles_list = list(Roles._ROLE_ORDER)
+	access = RoomAccess(orm.Rooms(id=1, user_id=1, is_public=False), False, True)
+	access.user_id = user.user_id
+
+	# The role's check alone, next to a scan of a list of its actions
+	checks = {
+		"one action": (
+			lambda: user.role.allows(Action.ROOMS_CREATE),
+			lambda: all([action in actions_list for action in [Action.ROOMS_CREATE]]),
+		),
+		"three actions": (
+			lambda: user.role.allows(EXCLUSIONS),
+			lambda: all([action in actions_list for action in EXCLUSIONS]),
+		),
+		"exclusions": (
+			lambda: auth.exclusions(user, EXCLUSIONS),
+			lambda: [not all([action in actions_list for action in [excluded]]) for excluded in EXCLUSIONS],
+		),
+		"role to id": (
+			lambda: Roles.role_to_id(Roles.ADMIN),
+			lambda: roles_list.index(Roles.ADMIN),
+		),
+	}
+	print("check".ljust(16) + "calls/s".ljust(14) + "list scan calls/s")
+	for name, (check, scan) in checks.items():
+		print(name.ljust(16) + f"{1 / _common.timed(check, number=arguments.number):.0f}".ljust(14) + f"{1 / _common.timed(scan, number=arguments.number):.0f}")
+
+	# What the controllers call, responses included
+	calls = {
+		"authorize": lambda: auth.authorize(Action.ROOMS_CREATE, user),
+		"allowed ids": lambda: auth.authorize(Action.ROOMS_UPDATE_TITLE, user, [1, 2]),
+		"room access": lambda: auth.authorize_room_access(user, access),
+	}
+	print()
+	print("call".ljust(16) + "calls/s")
+	for name, call in calls.items():
+		print(name.ljust(16) + f"{1 / _common.timed(call, number=arguments.number):.0f}")
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,88 @@
+"""
+Statements and wall time of deleting a user with many rooms, with models.cascade
+Next to them, a room at a time, as Rooms.delete_all did before: the room is loaded, then its rows are deleted
+Each run starts from the same generated dataset: user 1 owns the rooms, user 2 has joined and posted in each of them
+
+python bench/cascade.py [--rooms 10 100 1000] [--posts 20]
+"""
+import time
+import pathlib
+import argparse
+import tempfile
+
+import sqlalchemy
+
+import _common
+
+from models import orm, cascade
+
+TABLES = "users, users_bans, rooms, rooms_bans, rooms_users, posts, users_revocations"
+
+
+def seed(database, rooms: int, posts: int) -> None:
+	_common.execute(database, f"TRUNCATE {TABLES} RESTART IDENTITY")
+	_common.execute(database, "INSERT INTO users (role, login, name, passhash) VALUES (1, 'owner', 'owner', 'x'), (1, 'member', 'member', 'x')")
+	_common.execute(database, "INSERT INTO rooms (user_id, is_public, title) SELECT 1, true, 'room' FROM generate_series(1, :count)", count=rooms)
+	_common.execute(database, "INSERT INTO rooms_users (room_id, user_id) SELECT id, 2 FROM rooms")
+	_common.execute(database, "INSERT INTO rooms_bans (room_id, banner_id, reason) SELECT id, 1, 'bench' FROM rooms WHERE id % 10 = 0")
+	_common.execute(
+		database, "INSERT INTO posts (room_id, user_id, content) SELECT rooms.id, 1 + i % 2, 'post' FROM rooms, generate_series(1, :count) AS i", count=posts
+	)
+	_common.execute(database, "ANALYZE")
+
+
+def set_based(scope, user_id: int) -> None:
+	cascade.delete(scope, cascade.user_steps(orm.Users.id == user_id))
+
+
+def per_room(scope, user_id: int) -> None:
+	for room_id, in scope.query(orm.Rooms.id).filter(orm.Rooms.user_id == user_id).all():
+		scope.query(orm.Rooms).filter(orm.Rooms.id == room_id).one()
+		cascade.delete(scope, cascade.room_steps(orm.Rooms.id == room_id))
+	# The user's steps, without the ones of their rooms
+	steps = cascade.user_steps(orm.Users.id == user_id)
+	cascade.delete(scope, steps[:4] + steps[-1:])
+
+
+def measure(database, strategy) -> tuple:
+	""" Statements and seconds of deleting user 1 in one transaction """
+	statements = []
+
+	def count(*_args):
+		statements.append(None)
+
+	sqlalchemy.event.listen(sqlalchemy.engine.Engine, "before_cursor_execute", count)
+	try:
+		start = time.perf_counter()
+		with database.scope as scope:
+			strategy(scope, 1)
+		seconds = time.perf_counter() - start
+	finally:
+		sqlalchemy.event.remove(sqlalchemy.engine.Engine, "before_cursor_execute", count)
+	database.close_session()
+	return len(statements), seconds
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--rooms", type=int, nargs="+", default=[10, 100, 1000])
+	parser.add_argument("--posts", type=int, default=20, help="Per room")
+	arguments = parser.parse_args()
+
+	with _common.postgres() as postgres, _common.schema(postgres) as schema, tempfile.TemporaryDirectory() as directory:
+		cfg = _common.config(postgres, schema, pathlib.Path(directory))
+		database = _common.database(cfg, postgres)
+		print(f"{arguments.posts} posts per room")
+		print("rooms".ljust(8) + "set based".ljust(30) + "per room")
+		for rooms in arguments.rooms:
+			line = str(rooms).ljust(8)
+			for strategy in (set_based, per_room):
+				seed(database, rooms, arguments.posts)
+				statements, seconds = measure(database, strategy)
+				line += f"{statements} statements {_common.ms(seconds)}".ljust(30)
+			print(line)
+		database.dispose()
+
+
+if __name__ == "__main__":
+	main()
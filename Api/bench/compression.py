@@ -0,0 +1,43 @@
+"""
+Bytes on the wire and CPU per response of core.compression, by listing size and level
+Brotli is measured when it's installed
+
+python bench/compression.py [--rows 10 100 1000 10000] [--levels 1 6 9]
+"""
+import gzip
+import argparse
+
+import _common
+
+from core import serialization, compression
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--rows", type=int, nargs="+", default=[10, 100, 1000, 10000])
+	parser.add_argument("--levels", type=int, nargs="+", default=[1, 6, 9])
+	arguments = parser.parse_args()
+
+	encoders = {f"gzip-{level}": (lambda body, level=level: gzip.compress(body, compresslevel=level)) for level in arguments.levels}
+	if compression.brotli is not None:
+		encoders.update({f"br-{level}": (lambda body, level=level: compression.brotli.compress(body, quality=level)) for level in arguments.levels})
+
+	print("rows".ljust(8) + "body".ljust(10) + "".join(name.ljust(20) for name in encoders))
+	for rows in arguments.rows:
+		body = serialization.dumps(_common.posts(rows))
+		line = str(rows).ljust(8) + _common.size(len(body)).ljust(10)
+		for encode in encoders.values():
+			seconds = _common.timed(lambda: encode(body))
+			line += f"{_common.size(len(encode(body)))} {_common.ms(seconds)}".ljust(20)
+		print(line)
+
+	# A cached body costs its digest and a lookup
+	body = serialization.dumps(_common.posts(arguments.rows[-1]))
+	cache = compression.Compression(0, arguments.levels[0], 1)
+	cache._compress(compression.GZIP, body, '"etag"')
+	seconds = _common.timed(lambda: cache._compress(compression.GZIP, body, '"etag"'), number=10)
+	print(f"cache hit, {_common.size(len(body))}: {_common.ms(seconds)}")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,96 @@
+"""
+Latency and Python memory of models.posts.Posts.get_all as the posts table grows
+The dataset is generated once and grown to each size: USERS users, ROOMS rooms (every other one private,
+every tenth one banned), memberships, and posts spread over the rooms and users
+Pages are read as a user who is neither the rooms' owner nor a member, the visibility filters have to decide every row
+No index covers the order of the "all" listing across rooms, its latency grows with the table while its memory doesn't
+
+python bench/posts.py [--posts 10000 100000 1000000] [--limit 100]
+"""
+import argparse
+import pathlib
+import tempfile
+import tracemalloc
+
+import _common
+
+import models.posts
+from core import pagination
+
+USERS = 1000
+ROOMS = 1000
+READER = 2
+ROOM = 2
+
+
+def seed(database) -> None:
+	""" Users, rooms, bans and memberships, user 1 owns every room, READER has joined every fifth one """
+	_common.execute(database, "INSERT INTO users (role, login, name, passhash) SELECT 1, 'user_' || i, 'user', 'x' FROM generate_series(1, :count) AS i", count=USERS)
+	_common.execute(database, "INSERT INTO rooms (user_id, is_public, title) SELECT 1, i % 2 = 0, 'room' FROM generate_series(1, :count) AS i", count=ROOMS)
+	_common.execute(database, "INSERT INTO rooms_bans (room_id, banner_id, reason) SELECT id, 1, 'bench' FROM rooms WHERE id % 10 = 0")
+	_common.execute(database, "INSERT INTO rooms_users (room_id, user_id) SELECT id, :user_id FROM rooms WHERE id % 5 = 0", user_id=READER)
+	_common.execute(database, "INSERT INTO rooms_users (room_id, user_id) SELECT id, (id % :users) + 3 FROM rooms", users=USERS - 2)
+
+
+def grow(database, count: int, size: int) -> None:
+	""" Adds posts up to size, from count """
+	_common.execute(
+		database,
+		"INSERT INTO posts (room_id, user_id, content) SELECT (i % :rooms) + 1, (i % :users) + 1, 'post ' || i FROM generate_series(:start, :end) AS i",
+		rooms=ROOMS, users=USERS, start=count + 1, end=size
+	)
+	_common.execute(database, "ANALYZE")
+
+
+def measure(database, function) -> tuple:
+	""" Median seconds, and peak bytes allocated by Python, of a call """
+	def call():
+		function()
+		database.close_session()
+
+	call()
+	seconds = _common.timed(call)
+	tracemalloc.start()
+	call()
+	peak = tracemalloc.get_traced_memory()[1]
+	tracemalloc.stop()
+	return seconds, peak
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--posts", type=int, nargs="+", default=[10000, 100000, 1000000])
+	parser.add_argument("--limit", type=int, default=100)
+	arguments = parser.parse_args()
+
+	with _common.postgres() as postgres, _common.schema(postgres) as schema, tempfile.TemporaryDirectory() as directory:
+		cfg = _common.config(postgres, schema, pathlib.Path(directory))
+		database = _common.database(cfg, postgres)
+		seed(database)
+
+		m_posts = models.posts.Posts(database)
+		listings = {
+			# A public room's timeline
+			"room": lambda: m_posts.get_all(True, False, True, READER, room_id_filter=ROOM, page=pagination.Page(arguments.limit)),
+			# Every visible post of a user, across rooms
+			"user": lambda: m_posts.get_all(True, False, True, READER, user_id_filter=READER + 1, page=pagination.Page(arguments.limit)),
+			# Every visible post
+			"all": lambda: m_posts.get_all(True, False, True, READER, page=pagination.Page(arguments.limit)),
+		}
+
+		print(f"pages of {arguments.limit}, median latency and peak Python memory")
+		print("posts".ljust(10) + "".join(name.ljust(22) for name in listings))
+		count = 0
+		for size in sorted(arguments.posts):
+			grow(database, count, size)
+			count = size
+			line = str(size).ljust(10)
+			for listing in listings.values():
+				seconds, peak = measure(database, listing)
+				line += f"{_common.ms(seconds)} {_common.size(peak)}".ljust(22)
+			print(line)
+		database.dispose()
+
+
+if __name__ == "__main__":
+	main()
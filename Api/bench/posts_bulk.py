@@ -0,0 +1,91 @@
+"""
+Posts inserted per second by POST /rooms/<room_id>/posts/bulk and models.posts.Posts.create_all, by batch size
+Next to them, POST /rooms/<room_id>/posts and Posts.create, a post and a transaction at a time
+Requests go through the app's test client, so they include validation, authorization and serialization, without HTTP
+
+python bench/posts_bulk.py [--sizes 100 1000 10000] [--single 500]
+"""
+import io
+import json
+import time
+import contextlib
+import pathlib
+import argparse
+import tempfile
+
+import _common
+
+import models.posts
+from main import create_app
+
+
+def _ok(response, status: int = 200) -> None:
+	if response.status_code != status:
+		raise RuntimeError(response.get_data(as_text=True))
+
+
+def _rate(count: int, function) -> str:
+	start = time.perf_counter()
+	function()
+	return f"{count / (time.perf_counter() - start):.0f}"
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+	parser.add_argument("--single", type=int, default=500, help="Posts created one at a time")
+	arguments = parser.parse_args()
+
+	with _common.postgres() as postgres, _common.schema(postgres) as schema, tempfile.TemporaryDirectory() as directory:
+		cfg = _common.config(postgres, schema, pathlib.Path(directory))
+		cfg[cfg.APP_BULK_SIZE_MAX] = str(max(arguments.sizes))
+		cfg[cfg.PASSWORDS_WORKERS] = "1"
+		database = _common.database(cfg, postgres)
+		client = create_app(cfg, database).test_client()
+		assert client.post("/users", json={"name": "bench", "login": "bench", "password": "password"}).status_code == 201
+		headers = {"token": client.post("/login", json={"login": "bench", "password": "password"}).get_json()["token"]}
+		assert client.post("/rooms", json={"is_public": True, "title": "bench"}, headers=headers).status_code == 201
+		room_id = client.get("/rooms", headers=headers).get_json()[0]["id"]
+		user_id = 1
+		path = f"/rooms/{room_id}/posts"
+		m_posts = models.posts.Posts(database)
+
+		def bulk(size: int, ndjson: bool):
+			items = [{"content": f"Post number {i}, imported from another chat"} for i in range(size)]
+			if ndjson:
+				data = "\n".join(json.dumps(item) for item in items)
+				return lambda: _ok(client.post(path + "/bulk", data=data, content_type="application/x-ndjson", headers=headers))
+			return lambda: _ok(client.post(path + "/bulk", json=items, headers=headers))
+
+		def model(size: int):
+			contents = [f"Post number {i}, imported from another chat" for i in range(size)]
+
+			def create_all():
+				m_posts.create_all(room_id, user_id, contents)
+				database.close_session()
+			return create_all
+
+		def single_requests():
+			# Posts.create prints its bodies
+			with contextlib.redirect_stdout(io.StringIO()):
+				for i in range(arguments.single):
+					_ok(client.post(path, json={"content": f"Post number {i}"}, headers=headers), 201)
+
+		def single_model():
+			for i in range(arguments.single):
+				m_posts.create(room_id, user_id, f"Post number {i}")
+				database.close_session()
+
+		print("posts/s")
+		print("batch".ljust(10) + "bulk, JSON".ljust(14) + "bulk, NDJSON".ljust(14) + "create_all")
+		for size in arguments.sizes:
+			print(str(size).ljust(10) + _rate(size, bulk(size, False)).ljust(14) + _rate(size, bulk(size, True)).ljust(14) + _rate(size, model(size)))
+		print(
+			"1".ljust(10) + _rate(arguments.single, single_requests).ljust(14) + "".ljust(14) + _rate(arguments.single, single_model)
+			+ f" (POST {path} and create, {arguments.single} times)"
+		)
+		database.dispose()
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,38 @@
+"""
+Rows per second of core.serialization's backends on a listing of posts
+Next to them, flask.json with main.AppJsonEncoder, which responses went through before
+
+python bench/serialization.py [--rows 10000]
+"""
+import argparse
+
+import _common
+
+import flask
+
+from core import serialization
+from main import AppJsonEncoder
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--rows", type=int, default=10000)
+	arguments = parser.parse_args()
+
+	rows = _common.posts(arguments.rows)
+	app = flask.Flask(__name__)
+	app.json_encoder = AppJsonEncoder
+
+	encoders = {f"core.serialization {name}": backend for name, backend in serialization.BACKENDS.items()}
+	encoders["flask.json"] = lambda obj: flask.json.dumps(obj).encode("utf-8")
+
+	print(f"{arguments.rows} posts")
+	print("encoder".ljust(32) + "rows/s".ljust(12) + "body")
+	with app.app_context():
+		for name, encode in encoders.items():
+			seconds = _common.timed(lambda: encode(rows))
+			print(name.ljust(32) + f"{arguments.rows / seconds:.0f}".ljust(12) + _common.size(len(encode(rows))))
+
+
+if __name__ == "__main__":
+	main()
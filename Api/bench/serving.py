@@ -0,0 +1,114 @@
+"""
+Requests per second of serve.py by amount of worker processes, up to one per core
+Client processes keep their connections alive and GET a page of public rooms as guests
+The client processes share the cores with the server, keep them fewer than the cores for meaningful numbers
+
+python bench/serving.py [--workers 1 2 4] [--clients 8] [--seconds 5] [--port 4290]
+"""
+import os
+import time
+import socket
+import pathlib
+import argparse
+import tempfile
+import http.client
+import multiprocessing
+
+import _common
+
+from main import create_app
+import serve
+
+PATH = "/rooms?limit=20"
+
+
+class _Server(serve.Server):
+	""" serve.Server, with the database's password passed in instead of prompted for """
+
+	def __init__(self, cfg, password: str):
+		self._password = password
+		super().__init__(cfg)
+
+	def load(self):
+		database = _common.database(self._cfg, {"password": self._password})
+		app = create_app(self._cfg, database)
+		database.dispose()
+		return app
+
+
+def _serve(cfg, password: str) -> None:
+	_Server(cfg, password).run()
+
+
+def _client(port: int, seconds: float, counts: multiprocessing.Queue) -> None:
+	connection = http.client.HTTPConnection("127.0.0.1", port)
+	count = 0
+	end = time.perf_counter() + seconds
+	while time.perf_counter() < end:
+		connection.request("GET", PATH)
+		response = connection.getresponse()
+		response.read()
+		if response.status != 200:
+			raise RuntimeError(f"{response.status} {PATH}")
+		count += 1
+	counts.put(count)
+
+
+def _wait_for(port: int) -> None:
+	for _ in range(300):
+		try:
+			socket.create_connection(("127.0.0.1", port), 1).close()
+			return
+		except OSError:
+			time.sleep(0.1)
+	raise RuntimeError("The server didn't start")
+
+
+def _run(cfg, password: str, workers: int, clients: int, seconds: float) -> float:
+	cfg[cfg.APP_WORKERS] = str(workers)
+	server = multiprocessing.Process(target=_serve, args=(cfg, password))
+	server.start()
+	try:
+		_wait_for(cfg[cfg.APP_PORT])
+		# Warms up every worker's pool and caches
+		_client(cfg[cfg.APP_PORT], 1, multiprocessing.Queue())
+		counts = multiprocessing.Queue()
+		processes = [multiprocessing.Process(target=_client, args=(cfg[cfg.APP_PORT], seconds, counts)) for _ in range(clients)]
+		for process in processes:
+			process.start()
+		total = sum(counts.get() for _ in processes)
+		for process in processes:
+			process.join()
+		return total / seconds
+	finally:
+		server.terminate()
+		server.join()
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--workers", type=int, nargs="+", default=[w for w in (1, 2, 4, 8, 16) if w <= os.cpu_count()])
+	parser.add_argument("--clients", type=int, default=8)
+	parser.add_argument("--seconds", type=float, default=5)
+	parser.add_argument("--port", type=int, default=4290)
+	arguments = parser.parse_args()
+
+	with _common.postgres() as postgres, _common.schema(postgres) as schema, tempfile.TemporaryDirectory() as directory:
+		cfg = _common.config(postgres, schema, pathlib.Path(directory))
+		cfg[cfg.APP_PORT] = str(arguments.port)
+		# Enough connections for every thread of a worker
+		cfg[cfg.DB_POOL_SIZE] = str(max(cfg[cfg.APP_THREADS], cfg[cfg.DB_POOL_SIZE]))
+		database = _common.database(cfg, postgres)
+		_common.execute(database, "INSERT INTO users (role, login, name, passhash) VALUES (1, 'bench', 'bench', 'x')")
+		_common.execute(database, "INSERT INTO rooms (user_id, is_public, title) SELECT 1, true, 'room ' || i FROM generate_series(1, 100) AS i")
+		database.dispose()
+
+		print(f"{os.cpu_count()} cores, {arguments.clients} clients, {cfg[cfg.APP_THREADS]} threads per worker, GET {PATH}")
+		print("workers".ljust(10) + "requests/s")
+		for workers in arguments.workers:
+			rate = _run(cfg, postgres.get("password", ""), workers, arguments.clients, arguments.seconds)
+			print(str(workers).ljust(10) + f"{rate:.0f}")
+
+
+if __name__ == "__main__":
+	main()
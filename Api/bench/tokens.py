@@ -0,0 +1,46 @@
+"""
+Tokens signed and verified per second by core.auth.jwt, per algorithm
+Keys are generated in memory, RS256 with the usual 2048 bits
+
+python bench/tokens.py [--number 1000]
+"""
+import os
+import argparse
+import datetime
+
+import _common
+
+from cryptography.hazmat.primitives.asymmetric import rsa, ed25519
+
+from core.auth import jwt
+
+
+def _algorithms() -> dict:
+	return {
+		jwt.RS256.NAME: jwt.RS256(rsa.generate_private_key(public_exponent=65537, key_size=2048)),
+		jwt.HS256.NAME: jwt.HS256(os.urandom(32)),
+		jwt.EdDSA.NAME: jwt.EdDSA(ed25519.Ed25519PrivateKey.generate()),
+	}
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--number", type=int, default=1000, help="Calls per run")
+	arguments = parser.parse_args()
+
+	lifetime = datetime.timedelta(hours=1)
+	claims = jwt.Claims(1, 1, 1)
+	print("algorithm".ljust(12) + "sign/s".ljust(12) + "verify/s".ljust(12) + "parse+verify/s")
+	for name, algorithm in _algorithms().items():
+		keys = jwt.Keys("bench", algorithm)
+		token = jwt.Token.generate(claims, keys)
+		string = token.to_string()
+		sign = _common.timed(lambda: jwt.Token.generate(claims, keys), number=arguments.number)
+		verify = _common.timed(lambda: token.verify(keys, None, lifetime), number=arguments.number)
+		# What a request pays, without the tokens cache
+		parse_verify = _common.timed(lambda: jwt.Token.from_string(string).verify(keys, None, lifetime), number=arguments.number)
+		print(name.ljust(12) + f"{1 / sign:.0f}".ljust(12) + f"{1 / verify:.0f}".ljust(12) + f"{1 / parse_verify:.0f}")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,95 @@
+"""
+Validations per second of core.validation, against the implementation before validators were compiled
+The previous implementation is read from the git history, its rows are left out if it can't be
+
+python bench/validation.py [--number 20000]
+"""
+import types
+import argparse
+import subprocess
+
+import _common
+
+from models import orm
+from core import validation
+
+PATH = "Api/app/core/validation.py"
+
+
+def _previous() -> types.ModuleType:
+	"""
+	core.validation as of the commit before the first one which compiled validators
+
+	Raises
+	-------
+	subprocess.CalledProcessError
+	OSError
+	"""
+	def git(*arguments: str) -> str:
+		return subprocess.run(["git", *arguments], cwd=_common.APP, check=True, capture_output=True, text=True).stdout
+
+	revision = git("log", "--reverse", "--format=%H", "-S", "def _compile", "--", f":/{PATH}").split()[0]
+	module = types.ModuleType("validation_previous")
+	exec(compile(git("show", f"{revision}^:{PATH}"), PATH, "exec"), module.__dict__)
+	return module
+
+
+# Users' schemas, built from either implementation
+def _create(module: types.ModuleType):
+	return module.Dict({
+		"name": module.String(length_min=orm.Users.NAME_LEN_MIN, length_max=orm.Users.NAME_LEN_MAX),
+		"login": module.String(length_min=orm.Users.LOGIN_LEN_MIN, length_max=orm.Users.LOGIN_LEN_MAX),
+		"password": module.String(length_min=orm.Users.PASSWORD_LEN_MIN, length_max=orm.Users.PASSWORD_LEN_MAX)
+	}, allow_undefined_keys=False)
+
+
+def _update(module: types.ModuleType):
+	return module.Dict({
+		"user_id": module.Integer(),
+		"role": module.Integer(allow_none=True),
+		"login": module.String(allow_none=True, length_min=orm.Users.LOGIN_LEN_MIN, length_max=orm.Users.LOGIN_LEN_MAX),
+		"name": module.String(allow_none=True, length_min=orm.Users.NAME_LEN_MIN, length_max=orm.Users.NAME_LEN_MAX),
+		"password": module.String(allow_none=True, length_min=orm.Users.PASSWORD_LEN_MIN, length_max=orm.Users.PASSWORD_LEN_MAX)
+	}, allow_undefined_keys=False)
+
+
+CASES = {
+	"create, valid": (_create, {"name": "name", "login": "login", "password": "password"}),
+	"create, invalid": (_create, {"name": "", "login": 1, "other": None}),
+	"update, valid": (_update, {"user_id": 1, "name": "name"}),
+	"update, invalid": (_update, {"user_id": "1", "role": None, "name": ""}),
+}
+
+
+def _validate(validator, body: dict) -> None:
+	try:
+		validator.validate(body)
+	except Exception as exception:
+		if type(exception).__name__ != "Error":
+			raise
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--number", type=int, default=20000, help="Calls per run")
+	arguments = parser.parse_args()
+
+	implementations = {"compiled": validation}
+	try:
+		implementations["previous"] = _previous()
+	except (subprocess.CalledProcessError, OSError, IndexError) as exception:
+		print(f"No previous implementation: {exception}")
+
+	print("case".ljust(18) + "".join(f"{name}, {built}".ljust(28) for name in implementations for built in ("built once", "built per call")))
+	for name, (schema, body) in CASES.items():
+		line = name.ljust(18)
+		for module in implementations.values():
+			validator = schema(module)
+			once = _common.timed(lambda: _validate(validator, body), number=arguments.number)
+			per_call = _common.timed(lambda: _validate(schema(module), body), number=arguments.number)
+			line += f"{1 / once:.0f}/s".ljust(28) + f"{1 / per_call:.0f}/s".ljust(28)
+		print(line)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,136 @@
+"""
+Tests run against a real PostgreSQL, each test gets a schema of its own built from Database/Database.psql
+The server is STPP_TEST_DSN's (a libpq connection string), or a throwaway one started with pgserver if it's installed
+Tests are skipped when neither is available
+"""
+import os
+import typing
+import sys
+import uuid
+import shutil
+import pathlib
+import tempfile
+import contextlib
+
+import pytest
+import sqlalchemy
+from sqlalchemy import text
+
+APP = pathlib.Path(__file__).resolve().parents[1] / "app"
+SCHEMA_SQL = pathlib.Path(__file__).resolve().parents[2] / "Database" / "Database.psql"
+sys.path.insert(0, str(APP))
+
+
+@pytest.fixture(scope="session")
+def postgres() -> dict:
+	""" psycopg2 connection arguments of the server """
+	psycopg2 = pytest.importorskip("psycopg2")
+	dsn = os.environ.get("STPP_TEST_DSN")
+	if dsn is not None:
+		arguments = psycopg2.extensions.parse_dsn(dsn)
+		yield arguments
+		return
+	pgserver = pytest.importorskip("pgserver")
+	directory = tempfile.mkdtemp(prefix="stpp_pg_")
+	server = pgserver.get_server(directory, cleanup_mode="stop")
+	yield {"host": directory, "port": "5432", "dbname": "postgres", "user": "postgres", "password": ""}
+	server.cleanup()
+	shutil.rmtree(directory, ignore_errors=True)
+
+
+@pytest.fixture
+def schema(postgres: dict) -> str:
+	import psycopg2
+	name = f"test_{uuid.uuid4().hex[:12]}"
+	connection = psycopg2.connect(**postgres)
+	connection.autocommit = True
+	with connection.cursor() as cursor:
+		cursor.execute(f"CREATE SCHEMA {name}")
+		cursor.execute(f"SET search_path = {name}")
+		cursor.execute(SCHEMA_SQL.read_text())
+	yield name
+	with connection.cursor() as cursor:
+		cursor.execute(f"DROP SCHEMA {name} CASCADE")
+	connection.close()
+
+
+@pytest.fixture
+def cfg(postgres: dict, schema: str, tmp_path: pathlib.Path):
+	""" The shipped config.ini, pointed at the test schema, with an HS256 secret so no key files are needed """
+	import core.config
+	shutil.copy(APP / "config.ini", tmp_path / "config.ini")
+	(tmp_path / "secret").write_bytes(os.urandom(32))
+	cfg = core.config.Config(str(tmp_path), "config")
+	cfg[cfg.TOKENS_ALGORITHM] = "HS256"
+	cfg[cfg.TOKENS_PRIVATE_KEY_PATH] = str(tmp_path / "secret")
+	cfg[cfg.DB_HOST] = postgres.get("host", "localhost")
+	cfg[cfg.DB_PORT] = str(postgres.get("port", "5432"))
+	cfg[cfg.DB_NAME] = postgres.get("dbname", "postgres")
+	cfg[cfg.DB_USER] = postgres.get("user", "postgres")
+	cfg[cfg.DB_SCHEMA] = schema
+	# One fast hashing process, a test may create a few users
+	cfg[cfg.PASSWORDS_WORKERS] = "1"
+	return cfg
+
+
+@pytest.fixture
+def database(cfg, postgres: dict):
+	import core.database
+	database = core.database.Database(
+		cfg[cfg.DB_HOST], cfg[cfg.DB_PORT], cfg[cfg.DB_NAME], cfg[cfg.DB_SCHEMA], cfg[cfg.DB_USER], postgres.get("password", ""),
+		cfg[cfg.DB_POOL_SIZE], cfg[cfg.DB_MAX_OVERFLOW], cfg[cfg.DB_POOL_TIMEOUT], cfg[cfg.DB_POOL_PRE_PING], cfg[cfg.DB_POOL_RECYCLE]
+	)
+	yield database
+	# A failed test may leave its transaction open, it would block dropping the schema
+	database.close_session()
+	database.dispose()
+
+
+@pytest.fixture
+def app(cfg, database):
+	import main
+	app = main.create_app(cfg, database)
+	app.testing = True
+	return app
+
+
+@pytest.fixture
+def client(app):
+	return app.test_client()
+
+
+def sign_up(client, login: str, password: str = "password") -> dict:
+	""" Creates a user and logs in, returns the headers of its requests """
+	response = client.post("/users", json={"name": login, "login": login, "password": password})
+	assert response.status_code in (200, 201), response.get_data(as_text=True)
+	response = client.post("/login", json={"login": login, "password": password})
+	assert response.status_code == 200, response.get_data(as_text=True)
+	return {"token": response.get_json()["token"]}
+
+
+def sign_up_admin(client, database, login: str, password: str = "password") -> dict:
+	""" Like sign_up, the user is made an admin in the database before logging in """
+	from core.auth.roles import Roles
+	response = client.post("/users", json={"name": login, "login": login, "password": password})
+	assert response.status_code in (200, 201), response.get_data(as_text=True)
+	with database.scope as scope:
+		scope.execute(text("UPDATE users SET role = :role WHERE login = :login"), {"role": Roles.role_to_id(Roles.ADMIN), "login": login})
+	database.close_session()
+	response = client.post("/login", json={"login": login, "password": password})
+	assert response.status_code == 200, response.get_data(as_text=True)
+	return {"token": response.get_json()["token"]}
+
+
+@contextlib.contextmanager
+def statements() -> typing.Iterator[typing.List[str]]:
+	""" The SQL statements executed within """
+	executed = []
+
+	def before_cursor_execute(_conn, _cursor, statement, *_args):
+		executed.append(statement)
+
+	sqlalchemy.event.listen(sqlalchemy.engine.Engine, "before_cursor_execute", before_cursor_execute)
+	try:
+		yield executed
+	finally:
+		sqlalchemy.event.remove(sqlalchemy.engine.Engine, "before_cursor_execute", before_cursor_execute)
@@ -0,0 +1,87 @@
+import pytest
+
+from conftest import sign_up, sign_up_admin
+
+
+def _batch(client, headers: dict, items: list, parallel: bool = False) -> list:
+	response = client.post("/batch", json={"items": items, "parallel": parallel}, headers=headers)
+	assert response.status_code == 200, response.get_data(as_text=True)
+	return response.get_json()
+
+
+def _titles(result: dict) -> list:
+	assert result["status"] == 200, result
+	return sorted(room["title"] for room in result["body"])
+
+
+@pytest.fixture
+def room_id(client) -> int:
+	headers = sign_up(client, "owner")
+	assert client.post("/rooms", json={"is_public": True, "title": "first"}, headers=headers).status_code == 201
+	return client.get("/rooms", headers=headers).get_json()[0]["id"]
+
+
+@pytest.mark.parametrize("parallel", [False, True])
+def test_gets(client, database, room_id, parallel):
+	admin = sign_up_admin(client, database, "admin")
+	results = _batch(client, admin, [
+		{"method": "GET", "path": "/rooms"},
+		{"method": "GET", "path": f"/rooms/{room_id}"},
+		{"method": "GET", "path": "/rooms", "body": {"limit": 1}},
+	], parallel)
+	assert _titles(results[0]) == ["first"]
+	assert (results[1]["status"], results[1]["body"]["title"]) == (200, "first")
+	assert len(results[2]["body"]) == 1
+
+	batch = client.get("/stats", headers=admin).get_json()["batch"]
+	assert (batch["batches"], batch["requests"], batch["requests_parallel"]) == (1, 3, 3 if parallel else 0)
+
+
+@pytest.mark.parametrize("parallel", [False, True])
+def test_writes_are_barriers(client, room_id, parallel):
+	headers = sign_up(client, "writer")
+	results = _batch(client, headers, [
+		{"method": "GET", "path": "/rooms"},
+		{"method": "GET", "path": "/rooms"},
+		{"method": "POST", "path": "/rooms", "body": {"is_public": True, "title": "second"}},
+		{"method": "GET", "path": "/rooms"},
+	], parallel)
+	assert _titles(results[0]) == _titles(results[1]) == ["first"]
+	assert results[2]["status"] == 201
+	assert _titles(results[3]) == ["first", "second"]
+
+
+def test_auth_is_shared_and_statuses_are_per_item(client, room_id):
+	items = [
+		{"method": "POST", "path": "/rooms", "body": {"is_public": True, "title": "second"}},
+		{"method": "GET", "path": "/rooms/0"},
+		{"method": "GET", "path": "/nowhere"},
+		{"method": "GET", "path": "/rooms"},
+	]
+	# Guests can't create rooms
+	results = _batch(client, {}, items)
+	assert [result["status"] for result in results] == [401, 404, 404, 200]
+
+	results = _batch(client, sign_up(client, "member"), items)
+	assert [result["status"] for result in results] == [201, 404, 404, 200]
+	assert _titles(results[3]) == ["first", "second"]
+
+
+def test_refused_sub_requests(client, room_id):
+	headers = sign_up(client, "member")
+	results = _batch(client, headers, [
+		{"method": "POST", "path": "/batch", "body": {"items": [{"method": "GET", "path": "/rooms"}]}},
+		{"method": "GET", "path": f"/rooms/{room_id}/posts/stream"},
+		{"method": "GET", "path": "/rooms", "body": {"stream": "json"}},
+		{"method": "GET", "path": "/rooms?stream=ndjson"},
+	])
+	assert [result["status"] for result in results] == [422] * 4
+	assert list(results[0]["body"]["errors"]) == ["path"]
+	assert list(results[1]["body"]["errors"]) == ["path"]
+	assert list(results[2]["body"]["errors"]) == list(results[3]["body"]["errors"]) == ["stream"]
+
+
+def test_invalid_items(client):
+	response = client.post("/batch", json={"items": [{"method": "PUT", "path": "/rooms"}, {"method": "GET"}]})
+	assert response.status_code == 422
+	assert set(response.get_json()["errors"]["items"]) == {"0", "1"}
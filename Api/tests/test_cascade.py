@@ -0,0 +1,81 @@
+import pytest
+from sqlalchemy import text
+
+import models.users
+from models import orm, cascade
+from conftest import statements as _statements
+
+ROOMS = 5
+POSTS = 4
+TABLES = ("users", "users_bans", "rooms", "rooms_bans", "rooms_users", "posts")
+
+
+@pytest.fixture
+def owner(database) -> int:
+	"""
+	User 1 owns ROOMS rooms, with POSTS posts by 1 and by 2 each, users 1 and 2, and a ban by 2
+	User 2 owns a room with a post by 1, which 1 has banned, and has been banned by 1
+	User 3 has banned 1, and owns a room with a post by 3
+	"""
+	with database.scope as scope:
+		def execute(statement: str, **parameters) -> int:
+			result = scope.execute(text(statement), parameters)
+			return result.scalar() if result.returns_rows else None
+
+		for login in ("a", "b", "c"):
+			execute("INSERT INTO users (role, login, name, passhash) VALUES (1, :login, :login, 'x') RETURNING id", login=login)
+		for _ in range(ROOMS):
+			room_id = execute("INSERT INTO rooms (user_id, is_public, title) VALUES (1, false, 'room') RETURNING id")
+			for user_id in (1, 2):
+				execute("INSERT INTO rooms_users (room_id, user_id) VALUES (:room_id, :user_id)", room_id=room_id, user_id=user_id)
+				for _ in range(POSTS):
+					execute("INSERT INTO posts (room_id, user_id, content) VALUES (:room_id, :user_id, 'post')", room_id=room_id, user_id=user_id)
+			execute("INSERT INTO rooms_bans (room_id, banner_id, reason) VALUES (:room_id, 2, 'reason')", room_id=room_id)
+		for user_id, poster_id in ((2, 1), (3, 3)):
+			room_id = execute("INSERT INTO rooms (user_id, is_public, title) VALUES (:user_id, true, 'room') RETURNING id", user_id=user_id)
+			execute("INSERT INTO posts (room_id, user_id, content) VALUES (:room_id, :user_id, 'post')", room_id=room_id, user_id=poster_id)
+			if user_id == 2:
+				execute("INSERT INTO rooms_bans (room_id, banner_id, reason) VALUES (:room_id, 1, 'reason')", room_id=room_id)
+		execute("INSERT INTO users_bans (user_id, banner_id, reason) VALUES (2, 1, 'reason')")
+		execute("INSERT INTO users_bans (user_id, banner_id, reason) VALUES (1, 3, 'reason')")
+	database.close_session()
+	return 1
+
+
+def _counts(database) -> dict:
+	with database.scope as scope:
+		counts = {table: scope.execute(text(f"SELECT count(*) FROM {table}")).scalar() for table in TABLES}
+	database.close_session()
+	return counts
+
+
+# What's left once user 1 is gone, users 2 and 3 and their rooms, with user 3's post
+_LEFT = {"users": 2, "users_bans": 0, "rooms": 2, "rooms_bans": 0, "rooms_users": 0, "posts": 1}
+
+
+def test_delete(database, owner):
+	with database.scope as scope:
+		with _statements() as statements:
+			cascade.delete(scope, cascade.user_steps(orm.Users.id == owner))
+	database.close_session()
+	# One statement per step, however many rooms the user owns
+	assert len(statements) == len(cascade.user_steps(orm.Users.id == owner)) == 9
+	assert _counts(database) == _LEFT
+
+
+def test_purge(database, owner):
+	with database.scope as scope:
+		scope.execute(text("UPDATE users SET date_deleted = now() WHERE id = :id"), {"id": owner})
+	database.close_session()
+	m_users = models.users.Users(database, None, None, None, None, None, None)
+
+	batches = 0
+	with _statements() as statements:
+		while m_users.purge(owner, 3) > 0:
+			batches += 1
+	# Rows of user 1: 2 users bans, 1 + ROOMS rooms bans, ROOMS * 2 memberships, ROOMS * POSTS * 2 + 1 posts, ROOMS rooms and the user
+	rows = 2 + 1 + ROOMS + ROOMS * 2 + ROOMS * POSTS * 2 + 1 + ROOMS + 1
+	assert rows / 3 <= batches <= rows
+	# A batch is one statement per step up to the first one which has rows left, the last call finds none
+	assert len(statements) <= (batches + 1) * 9
+	assert _counts(database) == _LEFT
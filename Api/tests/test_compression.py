@@ -0,0 +1,33 @@
+import gzip
+
+import flask
+
+import core.compression
+
+
+def _app(compression: core.compression.Compression) -> flask.Flask:
+	""" Two paths with bodies of the same length and the same ETag """
+	app = flask.Flask(__name__)
+	for path in ("a", "b"):
+		app.add_url_rule(f"/{path}", path, lambda path=path: flask.Response(path * 2048, headers={"ETag": 'W/"same"'}))
+	app.after_request(compression.after_request)
+	return app
+
+
+def test_cache_is_keyed_by_body():
+	compression = core.compression.Compression(1024, 6, 16)
+	client = _app(compression).test_client()
+	for _ in range(2):
+		for path in ("a", "b"):
+			response = client.get(f"/{path}", headers={"Accept-Encoding": "gzip"})
+			assert response.headers["Content-Encoding"] == "gzip"
+			assert gzip.decompress(response.get_data()) == (path * 2048).encode("utf-8")
+	stats = compression.stats()
+	assert (stats["compressed"], stats["cache_hits"], stats["cache_size"]) == (2, 2, 2)
+
+
+def test_small_bodies_are_not_compressed():
+	compression = core.compression.Compression(1024 * 1024, 6, 16)
+	response = _app(compression).test_client().get("/a", headers={"Accept-Encoding": "gzip"})
+	assert "Content-Encoding" not in response.headers
+	assert response.get_data() == b"a" * 2048
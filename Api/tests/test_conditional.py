@@ -0,0 +1,62 @@
+from conftest import sign_up, sign_up_admin
+
+
+def _rooms(client, headers: dict) -> dict:
+	response = client.get("/rooms", headers=headers)
+	assert response.status_code == 200, response.get_data(as_text=True)
+	return {room["title"]: room["id"] for room in response.get_json()}
+
+
+def test_posts_etags_are_versioned_per_room(client):
+	owner = sign_up(client, "owner")
+	member = sign_up(client, "member")
+	for title in ("a", "b"):
+		assert client.post("/rooms", json={"is_public": True, "title": title}, headers=owner).status_code == 201
+	rooms = _rooms(client, owner)
+	for room_id in rooms.values():
+		assert client.post(f"/rooms/{room_id}/posts", json={"content": "hello"}, headers=owner).status_code == 201
+
+	etags = {}
+	for title, room_id in rooms.items():
+		response = client.get(f"/rooms/{room_id}/posts", headers=owner)
+		assert response.status_code == 200
+		etags[title] = response.headers["ETag"]
+		# Nothing has changed
+		response = client.get(f"/rooms/{room_id}/posts", headers={**owner, "If-None-Match": etags[title]})
+		assert response.status_code == 304
+
+	# Joining a room changes its posts' ETag only
+	member_id = next(user["id"] for user in client.get("/users", headers=owner).get_json() if user["name"] == "member")
+	response = client.post(f"/rooms/{rooms['a']}/users", json={"user_id": member_id}, headers=owner)
+	assert response.status_code == 201, response.get_data(as_text=True)
+
+	response = client.get(f"/rooms/{rooms['a']}/posts", headers={**owner, "If-None-Match": etags["a"]})
+	assert response.status_code == 200
+	assert response.headers["ETag"] != etags["a"]
+	response = client.get(f"/rooms/{rooms['b']}/posts", headers={**owner, "If-None-Match": etags["b"]})
+	assert response.status_code == 304
+
+
+def test_rooms_etag_changes_when_rows_are_swapped(client, database):
+	admin = sign_up_admin(client, database, "admin")
+	for title in ("a", "b", "c"):
+		assert client.post("/rooms", json={"is_public": True, "title": title}, headers=admin).status_code == 201
+	rooms = _rooms(client, admin)
+	# a's version is 2, the one b has once it's been banned and unbanned
+	for title in ("a1", "a"):
+		assert client.patch(f"/rooms/{rooms['a']}", json={"title": title}, headers=admin).status_code == 204
+	assert client.post(f"/rooms/{rooms['b']}/bans", json={"reason": "reason"}, headers=admin).status_code == 201
+
+	# Guests don't see banned rooms
+	response = client.get("/rooms")
+	assert sorted(room["title"] for room in response.get_json()) == ["a", "c"]
+	etag = response.headers["ETag"]
+
+	# Same count, newest room, latest creation and sum of versions, one row left and another entered
+	assert client.post(f"/rooms/{rooms['a']}/bans", json={"reason": "reason"}, headers=admin).status_code == 201
+	assert client.delete(f"/rooms/{rooms['b']}/bans", headers=admin).status_code == 204
+	response = client.get("/rooms", headers={"If-None-Match": etag})
+	assert response.status_code == 200
+	assert sorted(room["title"] for room in response.get_json()) == ["b", "c"]
+	assert response.headers["ETag"] != etag
+	assert client.get("/rooms", headers={"If-None-Match": response.headers["ETag"]}).status_code == 304
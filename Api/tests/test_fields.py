@@ -0,0 +1,39 @@
+import json
+
+import pytest
+
+from conftest import sign_up
+
+# Always selected, they're the listing's keys
+POSTS_KEYS = {"id", "room_id", "date_created", "date_updated"}
+
+
+@pytest.fixture
+def room(client) -> tuple:
+	""" A public room with 3 posts, and the headers of its owner """
+	headers = sign_up(client, "owner")
+	assert client.post("/rooms", json={"is_public": True, "title": "room"}, headers=headers).status_code == 201
+	room_id = client.get("/rooms", headers=headers).get_json()[0]["id"]
+	for i in range(3):
+		assert client.post(f"/rooms/{room_id}/posts", json={"content": f"post {i}"}, headers=headers).status_code == 201
+	return room_id, headers
+
+
+def test_page(client, room):
+	room_id, headers = room
+	response = client.get(f"/rooms/{room_id}/posts", query_string={"fields": "content"}, headers=headers)
+	assert response.status_code == 200
+	posts = response.get_json()
+	assert sorted(post["content"] for post in posts) == ["post 0", "post 1", "post 2"]
+	assert all(set(post) == POSTS_KEYS | {"content"} for post in posts)
+
+
+@pytest.mark.parametrize("stream", ["json", "ndjson"])
+def test_stream(client, room, stream):
+	room_id, headers = room
+	response = client.get(f"/rooms/{room_id}/posts", query_string={"fields": "content", "stream": stream}, headers=headers)
+	assert response.status_code == 200
+	data = response.get_data(as_text=True)
+	posts = json.loads(data) if stream == "json" else [json.loads(line) for line in data.splitlines() if line]
+	assert sorted(post["content"] for post in posts) == ["post 0", "post 1", "post 2"]
+	assert all(set(post) == POSTS_KEYS | {"content"} for post in posts)
@@ -0,0 +1,100 @@
+"""
+The filtered queries of models/ are served by indexes
+A dataset is seeded into a schema of the module's, then each query is EXPLAINed with sequential scans disabled
+The planner still picks one when no index can serve the query, so any left in a plan fails the test
+Small tables, like the bans, would otherwise be scanned whichever indexes they have
+Unfiltered listings read whole tables by design and aren't checked
+"""
+import json
+import uuid
+
+import pytest
+
+from conftest import SCHEMA_SQL
+
+SEED = """
+INSERT INTO users (id, role, login, name, passhash) OVERRIDING SYSTEM VALUE
+	SELECT g, 1, 'seed_' || g, 'seed', 'x' FROM generate_series(1, 20000) g;
+INSERT INTO users_bans (user_id, banner_id, reason)
+	SELECT g, 1, 'seed' FROM generate_series(2, 20000, 50) g;
+INSERT INTO rooms (id, user_id, is_public, title) OVERRIDING SYSTEM VALUE
+	SELECT g, (g % 20000) + 1, g % 2 = 0, 'seed' FROM generate_series(1, 20000) g;
+INSERT INTO rooms_bans (room_id, banner_id, reason)
+	SELECT g, 1, 'seed' FROM generate_series(1, 20000, 50) g;
+INSERT INTO rooms_users (room_id, user_id)
+	SELECT (g % 20000) + 1, ((g * 7) % 20000) + 1 FROM generate_series(1, 100000) g
+	ON CONFLICT DO NOTHING;
+INSERT INTO posts (room_id, user_id, content)
+	SELECT (g % 20000) + 1, ((g * 13) % 20000) + 1, 'seed' FROM generate_series(1, 400000) g;
+ANALYZE users, users_bans, rooms, rooms_bans, rooms_users, posts;
+"""
+
+QUERIES = {
+	# models.users
+	"users.id": "SELECT * FROM users WHERE id = 42",
+	"users.login": "SELECT * FROM users WHERE login = 'seed_42'",
+	# models.users_bans
+	"users_bans.user_id": "SELECT * FROM users_bans WHERE user_id = 52",
+	"users_bans.banner_id": "SELECT * FROM users_bans WHERE banner_id = 42",
+	"users_bans.either": "SELECT * FROM users_bans WHERE user_id = 42 OR banner_id = 42",
+	# models.rooms
+	"rooms.id": "SELECT * FROM rooms WHERE id = 42",
+	"rooms.user_id": "SELECT * FROM rooms WHERE user_id = 42",
+	# models.rooms_bans
+	"rooms_bans.room_id": "SELECT * FROM rooms_bans WHERE room_id = 51",
+	"rooms_bans.banner_id": "SELECT * FROM rooms_bans WHERE banner_id = 42",
+	# models.rooms_users
+	"rooms_users.pk": "SELECT * FROM rooms_users WHERE room_id = 42 AND user_id = 42",
+	"rooms_users.room_id": "SELECT * FROM rooms_users WHERE room_id = 42",
+	"rooms_users.user_id": "SELECT * FROM rooms_users WHERE user_id = 42",
+	# models.posts
+	"posts.id": "SELECT * FROM posts WHERE id = 42",
+	"posts.room_id": "SELECT * FROM posts WHERE room_id = 42 ORDER BY id",
+	"posts.user_id": "SELECT * FROM posts WHERE user_id = 42",
+	# models.visibility, as used by Posts.get_all for a room's timeline
+	"posts.visible": """SELECT * FROM posts WHERE room_id = 42 AND (
+		NOT EXISTS (SELECT * FROM rooms_bans b WHERE b.room_id = posts.room_id)
+		OR posts.user_id = 42
+		OR EXISTS (SELECT * FROM rooms r WHERE r.id = posts.room_id AND r.user_id = 42)
+		OR EXISTS (SELECT * FROM rooms_users ru WHERE ru.room_id = posts.room_id AND ru.user_id = 42)
+	)""",
+	# RoomsUsers.get_all_visible
+	"rooms_users.visible": """SELECT * FROM rooms_users WHERE user_id = 42 AND (
+		EXISTS (SELECT * FROM rooms_users ru WHERE ru.room_id = rooms_users.room_id AND ru.user_id = 42)
+		OR EXISTS (SELECT * FROM rooms r WHERE r.id = rooms_users.room_id AND r.user_id = 42)
+	)""",
+}
+
+
+@pytest.fixture(scope="module")
+def seeded(postgres: dict):
+	""" A cursor on a seeded schema, shared by the module's tests as seeding takes a few seconds """
+	import psycopg2
+	name = f"test_{uuid.uuid4().hex[:12]}"
+	connection = psycopg2.connect(**postgres)
+	connection.autocommit = True
+	with connection.cursor() as cursor:
+		cursor.execute(f"CREATE SCHEMA {name}")
+		cursor.execute(f"SET search_path = {name}")
+		cursor.execute(SCHEMA_SQL.read_text())
+		cursor.execute(SEED)
+		cursor.execute("SET enable_seqscan = off")
+		yield cursor
+		cursor.execute(f"DROP SCHEMA {name} CASCADE")
+	connection.close()
+
+
+def _nodes(plan: dict):
+	yield plan
+	for child in plan.get("Plans", ()):
+		yield from _nodes(child)
+
+
+@pytest.mark.parametrize("query", QUERIES.values(), ids=QUERIES.keys())
+def test_uses_indexes(seeded, query):
+	seeded.execute(f"EXPLAIN (FORMAT JSON) {query}")
+	plan = seeded.fetchone()[0]
+	if isinstance(plan, str):
+		plan = json.loads(plan)
+	scans = [node.get("Relation Name") for node in _nodes(plan[0]["Plan"]) if node["Node Type"] == "Seq Scan"]
+	assert scans == [], f"Sequential scans of {scans}"
@@ -0,0 +1,30 @@
+import datetime
+
+from sqlalchemy import text
+
+import models.jobs
+from models import orm
+
+
+def _count(database) -> int:
+	with database.scope as scope:
+		count = scope.execute(text("SELECT count(*) FROM jobs WHERE kind = :kind"), {"kind": orm.Jobs.KIND_POSTS_PURGE}).scalar()
+	database.close_session()
+	return count
+
+
+def test_enqueue_created_since(database):
+	m_jobs = models.jobs.Jobs(database)
+	since = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(hours=1)
+	assert m_jobs.enqueue(orm.Jobs.KIND_POSTS_PURGE, created_since=since)
+	# Pending
+	assert not m_jobs.enqueue(orm.Jobs.KIND_POSTS_PURGE, created_since=since)
+	with database.scope as scope:
+		scope.execute(text("UPDATE jobs SET status = 'done'"))
+	database.close_session()
+	# Done, but created since then
+	assert not m_jobs.enqueue(orm.Jobs.KIND_POSTS_PURGE, created_since=since)
+	assert _count(database) == 1
+	# Created before then
+	assert m_jobs.enqueue(orm.Jobs.KIND_POSTS_PURGE, created_since=since + datetime.timedelta(hours=2))
+	assert _count(database) == 2
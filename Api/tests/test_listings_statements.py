@@ -0,0 +1,103 @@
+import pytest
+from sqlalchemy import text
+
+import models.posts
+import models.rooms_users
+from core import pagination, projection
+from conftest import statements as _statements
+
+PUBLIC_ROOMS = 10
+
+
+@pytest.fixture
+def rooms(database):
+	"""
+	Users 1, 2 and 3
+	Public rooms owned by 1 with 2 posts by 3 each, and one deleted post in the first of them
+	Private room "joined" owned by 1, with users 1 and 2, and 3 posts by 2
+	Private room "private" owned by 3, with user 3, and 4 posts by 3
+	"""
+	with database.scope as scope:
+		for login in ("a", "b", "c"):
+			scope.execute(text("INSERT INTO users (role, login, name, passhash) VALUES (1, :login, :login, 'x')"), {"login": login})
+		room_ids = {}
+		for title, user_id, is_public in [(f"public{i}", 1, True) for i in range(PUBLIC_ROOMS)] + [("joined", 1, False), ("private", 3, False)]:
+			room_ids[title] = scope.execute(
+				text("INSERT INTO rooms (user_id, is_public, title) VALUES (:user_id, :is_public, :title) RETURNING id"),
+				{"user_id": user_id, "is_public": is_public, "title": title}
+			).scalar()
+		for title, user_id in [("joined", 1), ("joined", 2), ("private", 3)]:
+			scope.execute(text("INSERT INTO rooms_users (room_id, user_id) VALUES (:room_id, :user_id)"), {"room_id": room_ids[title], "user_id": user_id})
+		posts = [(f"public{i}", 3) for i in range(PUBLIC_ROOMS) for _ in range(2)] + [("joined", 2)] * 3 + [("private", 3)] * 4
+		for title, user_id in posts:
+			scope.execute(text("INSERT INTO posts (room_id, user_id, content) VALUES (:room_id, :user_id, 'post')"), {"room_id": room_ids[title], "user_id": user_id})
+		scope.execute(
+			text("INSERT INTO posts (room_id, user_id, content, date_deleted) VALUES (:room_id, 3, 'deleted', now())"),
+			{"room_id": room_ids["public0"]}
+		)
+	database.close_session()
+	return room_ids
+
+
+def test_posts_get_all_public(database, rooms):
+	m_posts = models.posts.Posts(database)
+	with _statements() as statements:
+		orm_posts = m_posts.get_all_public()
+	assert len(statements) == 1
+	assert len(orm_posts) == PUBLIC_ROOMS * 2
+
+
+def test_posts_get_all_visible(database, rooms):
+	m_posts = models.posts.Posts(database)
+	with _statements() as statements:
+		orm_posts_2 = m_posts.get_all_visible(2)
+		orm_posts_3 = m_posts.get_all_visible(3)
+	assert len(statements) == 2
+	assert len(orm_posts_2) == PUBLIC_ROOMS * 2 + 3
+	assert len(orm_posts_3) == PUBLIC_ROOMS * 2 + 4
+
+
+def test_posts_get_all_pages(database, rooms):
+	""" Every page is one statement, however many rooms and memberships its visibility depends on """
+	m_posts = models.posts.Posts(database)
+	post_ids = []
+	after = None
+	with _statements() as statements:
+		while True:
+			page = pagination.Page(5, after)
+			orm_posts, after = page.split(m_posts.get_all(False, False, True, user_id=2, page=page))
+			post_ids += [orm_post.id for orm_post in orm_posts]
+			if after is None:
+				break
+	# Public rooms' posts and the joined room's ones
+	visible = PUBLIC_ROOMS * 2 + 3
+	assert len(post_ids) == len(set(post_ids)) == visible
+	assert len(statements) == -(-visible // 5)
+
+
+def test_posts_get_all_guest_fields(database, rooms):
+	m_posts = models.posts.Posts(database)
+	with _statements() as statements:
+		posts = list(m_posts.get_all(True, False, True, fields=projection.Fields(["content"])))
+	assert len(statements) == 1
+	assert len(posts) == PUBLIC_ROOMS * 2
+	assert set(posts[0]) == {"id", "room_id", "date_created", "date_updated", "content"}
+
+
+def test_rooms_users_get_all_visible(database, rooms):
+	m_rooms_users = models.rooms_users.RoomsUsers(database)
+	with _statements() as statements:
+		orm_rooms_users = m_rooms_users.get_all_visible(2)
+	assert len(statements) == 1
+	assert {(orm_room_user.room_id, orm_room_user.user_id) for orm_room_user in orm_rooms_users} == {(rooms["joined"], 1), (rooms["joined"], 2)}
+
+
+def test_rooms_users_get_all(database, rooms):
+	m_rooms_users = models.rooms_users.RoomsUsers(database)
+	with _statements() as statements:
+		orm_rooms_users = m_rooms_users.get_all(False, False, False, user_id=2)
+		orm_rooms_users_not_private = m_rooms_users.get_all(False, False, True, user_id=3)
+	assert len(statements) == 2
+	assert len(orm_rooms_users) == 3
+	# Only the rooms user 3 sees, every room with users is private
+	assert [orm_room_user.room_id for orm_room_user in orm_rooms_users_not_private] == [rooms["private"]]
@@ -0,0 +1,80 @@
+import base64
+import datetime
+
+import pytest
+from sqlalchemy import text
+
+from conftest import sign_up
+from core import pagination
+
+POSTS = 11
+
+
+@pytest.fixture
+def room(client, database) -> tuple:
+	"""
+	A public room with POSTS posts, and the headers of its owner
+	The first 6 posts share their date_created, they're inserted in one transaction
+	"""
+	headers = sign_up(client, "owner")
+	assert client.post("/rooms", json={"is_public": True, "title": "room"}, headers=headers).status_code == 201
+	room_id = client.get("/rooms", headers=headers).get_json()[0]["id"]
+	with database.scope as scope:
+		for i in range(6):
+			scope.execute(text("INSERT INTO posts (room_id, user_id, content) SELECT id, user_id, :content FROM rooms WHERE id = :room_id"), {"room_id": room_id, "content": f"{i}"})
+	database.close_session()
+	for i in range(6, POSTS):
+		assert client.post(f"/rooms/{room_id}/posts", json={"content": f"{i}"}, headers=headers).status_code == 201
+	return room_id, headers
+
+
+def test_cursor_round_trip():
+	key = (datetime.datetime(2020, 1, 2, 3, 4, 5, 6, tzinfo=datetime.timezone.utc), 7, 8)
+	assert pagination.decode_cursor(pagination.encode_cursor(key)) == key
+
+
+@pytest.mark.parametrize("limit", [1, 4, POSTS - 1, POSTS, POSTS + 1])
+def test_walk(client, room, limit):
+	room_id, headers = room
+	contents = []
+	after = None
+	pages = 0
+	while True:
+		query = {"limit": limit} if after is None else {"limit": limit, "after": after}
+		response = client.get(f"/rooms/{room_id}/posts", query_string=query, headers=headers)
+		assert response.status_code == 200, response.get_data(as_text=True)
+		posts = response.get_json()
+		assert len(posts) <= limit
+		contents += [post["content"] for post in posts]
+		pages += 1
+		after = response.headers.get("Next-Cursor")
+		if after is None:
+			break
+	# In order, every post once, equal dates are ordered by id
+	assert contents == [f"{i}" for i in range(POSTS)]
+	assert pages == max(1, -(-POSTS // limit))
+
+
+def test_cursor_of_another_collection(client, room):
+	""" A rooms_users cursor has one more key than the posts' ones, it matches no post """
+	room_id, headers = room
+	after = pagination.encode_cursor((datetime.datetime.now(datetime.timezone.utc), 1, 1))
+	response = client.get(f"/rooms/{room_id}/posts", query_string={"after": after}, headers=headers)
+	assert response.status_code == 200
+	assert response.get_json() == []
+
+
+@pytest.mark.parametrize("after", [
+	"garbage",
+	base64.urlsafe_b64encode(b"not json").decode(),
+	base64.urlsafe_b64encode(b'{"date": 1}').decode(),
+	base64.urlsafe_b64encode(b'["2020-01-01"]').decode(),
+	base64.urlsafe_b64encode(b'["2020-01-01", "1"]').decode(),
+	base64.urlsafe_b64encode(b'["yesterday", 1]').decode(),
+])
+def test_corrupt_cursor(client, room, after):
+	room_id, headers = room
+	for path in (f"/rooms/{room_id}/posts", "/rooms", "/users"):
+		response = client.get(path, query_string={"after": after}, headers=headers)
+		assert response.status_code == 400, (path, response.get_data(as_text=True))
+		assert response.get_json()["errors"] == {"keys": {"after": "Corrupt cursor"}}
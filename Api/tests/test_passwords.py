@@ -0,0 +1,17 @@
+import os
+
+import pytest
+
+from services.passwords import Passwords, Busy
+
+
+def test_broken_pool_is_replaced():
+	passwords = Passwords(1, 4, 30)
+	passhash = passwords.hash("password")
+	# The worker dies, the pool is broken
+	with pytest.raises(Busy):
+		passwords._run(os._exit, 1)
+	assert passwords.stats()["pending"] == 0
+	# The next call gets a new pool
+	assert passwords.verify(passhash, "password")
+	assert passwords.stats()["pending"] == 0
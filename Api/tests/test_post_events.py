@@ -0,0 +1,33 @@
+import json
+
+from sqlalchemy import text
+
+import models.posts
+import services.post_events
+
+
+def test_created_post_reaches_subscriber(cfg, database):
+	# The shipped config pings pooled connections, the listener's connection is checked out through it
+	assert cfg[cfg.DB_POOL_PRE_PING]
+	with database.scope as scope:
+		scope.execute(text("INSERT INTO users (role, login, name, passhash) VALUES (1, 'alice', 'alice', 'x')"))
+		scope.execute(text("INSERT INTO rooms (user_id, is_public, title) VALUES (1, true, 'room')"))
+	database.close_session()
+	m_posts = models.posts.Posts(database)
+	s_post_events = services.post_events.PostEvents(database, m_posts, 2, 8)
+
+	subscription = s_post_events.subscribe(1)
+	try:
+		assert s_post_events.listening.wait(10)
+		m_posts.create(1, 1, "hello")
+		database.close_session()
+
+		event = subscription.get(10)
+		assert event is not None and not subscription.closed
+		name, data = event.decode("utf-8").strip().split("\n")
+		assert name == "event: created"
+		post = json.loads(data[len("data: "):])
+		assert (post["room_id"], post["user_id"], post["content"]) == (1, 1, "hello")
+		assert s_post_events.stats()["events"] == 1
+	finally:
+		s_post_events.unsubscribe(subscription)
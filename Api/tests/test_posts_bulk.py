@@ -0,0 +1,69 @@
+import pytest
+
+from conftest import sign_up
+
+
+@pytest.fixture
+def owner(client) -> dict:
+	return sign_up(client, "owner")
+
+
+def _room(client, headers: dict, is_public: bool = True) -> int:
+	assert client.post("/rooms", json={"is_public": is_public, "title": "room"}, headers=headers).status_code == 201
+	return max(room["id"] for room in client.get("/rooms", headers=headers).get_json())
+
+
+def _contents(client, headers: dict, room_id: int) -> list:
+	response = client.get(f"/rooms/{room_id}/posts", headers=headers)
+	assert response.status_code == 200, response.get_data(as_text=True)
+	return sorted(post["content"] for post in response.get_json())
+
+
+def test_json_array(client, owner):
+	room_id = _room(client, owner)
+	response = client.post(f"/rooms/{room_id}/posts/bulk", json=[{"content": "a"}, {"content": "b"}], headers=owner)
+	assert response.status_code == 200, response.get_data(as_text=True)
+	results = response.get_json()
+	assert [list(result) for result in results] == [["post_id"], ["post_id"]]
+	assert _contents(client, owner, room_id) == ["a", "b"]
+
+
+def test_ndjson(client, owner):
+	room_id = _room(client, owner)
+	response = client.post(
+		f"/rooms/{room_id}/posts/bulk", data='{"content": "a"}\n\n{"content": "b"}\n\n', content_type="application/x-ndjson", headers=owner
+	)
+	assert response.status_code == 200, response.get_data(as_text=True)
+	assert len(response.get_json()) == 2
+	assert _contents(client, owner, room_id) == ["a", "b"]
+
+
+def test_invalid_ndjson(client, owner):
+	room_id = _room(client, owner)
+	response = client.post(f"/rooms/{room_id}/posts/bulk", data='{"content": "a"}\n{"content"\n', content_type="application/x-ndjson", headers=owner)
+	# Same as a corrupt JSON body, with strict requests
+	assert response.status_code == 422
+	assert response.get_json()["errors"] == {"json": "Corrupt line 2"}
+	assert _contents(client, owner, room_id) == []
+
+
+def test_invalid_items_are_reported_next_to_created_ones(client, owner):
+	room_id = _room(client, owner)
+	items = [{"content": "a"}, {"content": ""}, {"text": "b"}, {"content": "c"}]
+	response = client.post(f"/rooms/{room_id}/posts/bulk", json=items, headers=owner)
+	assert response.status_code == 200, response.get_data(as_text=True)
+	results = response.get_json()
+	assert [list(result) for result in results] == [["post_id"], ["errors"], ["errors"], ["post_id"]]
+	assert results[0]["post_id"] < results[3]["post_id"]
+	assert _contents(client, owner, room_id) == ["a", "c"]
+
+
+def test_room_not_allowed(client, owner):
+	room_id = _room(client, owner, is_public=False)
+	other = sign_up(client, "other")
+	response = client.post(f"/rooms/{room_id}/posts/bulk", json=[{"content": "a"}], headers=other)
+	assert response.status_code == 403, response.get_data(as_text=True)
+	# Guests aren't logged in
+	assert client.post(f"/rooms/{room_id}/posts/bulk", json=[{"content": "a"}]).status_code == 401
+	assert client.post("/rooms/0/posts/bulk", json=[{"content": "a"}], headers=owner).status_code == 404
+	assert _contents(client, owner, room_id) == []
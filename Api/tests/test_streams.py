@@ -0,0 +1,59 @@
+import json
+
+import pytest
+from sqlalchemy import text
+
+from conftest import sign_up
+from core import pagination
+
+# More than a batch of the server side cursor, the last one is partial
+POSTS = pagination.Stream.BATCH_SIZE * 2 + 150
+
+
+@pytest.fixture
+def room(client, database) -> tuple:
+	""" A public room with POSTS posts, and the headers of its owner """
+	headers = sign_up(client, "owner")
+	assert client.post("/rooms", json={"is_public": True, "title": "room"}, headers=headers).status_code == 201
+	room_id = client.get("/rooms", headers=headers).get_json()[0]["id"]
+	with database.scope as scope:
+		scope.execute(text(
+			"INSERT INTO posts (room_id, user_id, content) SELECT :room_id, rooms.user_id, 'post ' || i FROM rooms, generate_series(1, :count) AS i WHERE rooms.id = :room_id"
+		), {"room_id": room_id, "count": POSTS})
+	database.close_session()
+	return room_id, headers
+
+
+def _read(response, stream: str) -> list:
+	assert response.status_code == 200, response.get_data(as_text=True)
+	assert response.is_streamed
+	data = response.get_data(as_text=True)
+	if stream == "json":
+		assert response.mimetype == "application/json"
+		return json.loads(data)
+	assert response.mimetype == "application/x-ndjson"
+	return [json.loads(line) for line in data.splitlines()]
+
+
+@pytest.mark.parametrize("stream", ["json", "ndjson"])
+@pytest.mark.parametrize("fields", [None, "content"])
+def test_stream(client, room, stream, fields):
+	room_id, headers = room
+	query = {"stream": stream} if fields is None else {"stream": stream, "fields": fields}
+	posts = _read(client.get(f"/rooms/{room_id}/posts", query_string=query, headers=headers), stream)
+	assert len(posts) == POSTS
+	# In the keyset's order, every post once
+	assert [post["id"] for post in posts] == sorted({post["id"] for post in posts})
+	assert posts[0]["content"] == "post 1"
+	if fields is not None:
+		assert set(posts[0]) == {"id", "room_id", "date_created", "date_updated", "content"}
+
+
+def test_stream_after_page(client, room):
+	""" A stream continues from a page's cursor """
+	room_id, headers = room
+	response = client.get(f"/rooms/{room_id}/posts", query_string={"limit": 10}, headers=headers)
+	first = response.get_json()
+	posts = _read(client.get(f"/rooms/{room_id}/posts", query_string={"stream": "ndjson", "after": response.headers["Next-Cursor"]}, headers=headers), "ndjson")
+	assert len(first) + len(posts) == POSTS
+	assert first[-1]["id"] < posts[0]["id"]
@@ -0,0 +1,51 @@
+import pytest
+
+from conftest import sign_up
+
+EVENTS = {"Accept": "text/event-stream"}
+
+
+@pytest.fixture
+def room(client) -> tuple:
+	""" A private room, its stream's path, and the headers of its owner """
+	headers = sign_up(client, "owner")
+	assert client.post("/rooms", json={"is_public": False, "title": "room"}, headers=headers).status_code == 201
+	room_id = client.get("/rooms", headers=headers).get_json()[0]["id"]
+	return f"/rooms/{room_id}/posts/stream", headers
+
+
+def _ticket(client, headers: dict, path: str) -> str:
+	response = client.post("/login/ticket", json={"path": path}, headers=headers)
+	assert response.status_code == 200, response.get_data(as_text=True)
+	return response.get_json()["ticket"]
+
+
+def _open(client, path: str, query: dict):
+	response = client.get(path, query_string=query, headers=EVENTS, buffered=False)
+	status = response.status_code
+	if status == 200:
+		assert next(iter(response.response)) == b"retry: 3000\n\n"
+	response.close()
+	return status
+
+
+def test_stream_with_ticket(client, room):
+	path, headers = room
+	assert _open(client, path, {"ticket": _ticket(client, headers, path)}) == 200
+
+
+def test_ticket_of_another_path(client, room):
+	path, headers = room
+	assert _open(client, path, {"ticket": _ticket(client, headers, "/rooms/0/posts/stream")}) == 401
+
+
+def test_token_not_in_urls(client, room):
+	path, headers = room
+	# Read as a guest's request, the room is private
+	assert _open(client, path, {"token": headers["token"]}) != 200
+	# Nor is a ticket a token
+	assert client.get("/rooms", headers={"token": _ticket(client, headers, "/rooms")}).status_code == 401
+
+
+def test_guests_get_no_ticket(client):
+	assert client.post("/login/ticket", json={"path": "/rooms"}).status_code == 401
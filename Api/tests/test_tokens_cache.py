@@ -0,0 +1,33 @@
+import datetime
+
+from core.auth.roles import Roles
+from core.auth.tokens_cache import TokensCache
+from core.auth.user import Registered
+
+
+def _expires_at() -> datetime.datetime:
+	return datetime.datetime.utcnow() + datetime.timedelta(hours=1)
+
+
+def test_put_and_invalidate():
+	cache = TokensCache(16, 60)
+	user = Registered(role=Roles.USER, user_id=1)
+	cache.put("token", user, _expires_at(), cache.generation(1))
+	assert cache.get("token") is user
+	cache.invalidate_user(1)
+	assert cache.get("token") is None
+
+
+def test_put_after_invalidation_is_skipped():
+	""" The user was loaded before an invalidation, the token's verification is stale """
+	cache = TokensCache(16, 60)
+	generation = cache.generation(1)
+	cache.invalidate_user(1)
+	cache.put("token", Registered(role=Roles.USER, user_id=1), _expires_at(), generation)
+	assert cache.get("token") is None
+
+	# Other users aren't affected, and a verification from after the invalidation is cached
+	cache.put("other", Registered(role=Roles.USER, user_id=2), _expires_at(), cache.generation(2))
+	assert cache.get("other") is not None
+	cache.put("token", Registered(role=Roles.USER, user_id=1), _expires_at(), cache.generation(1))
+	assert cache.get("token") is not None
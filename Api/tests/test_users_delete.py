@@ -0,0 +1,25 @@
+from conftest import sign_up
+
+
+def test_deleted_users_rooms_and_posts_are_hidden(client):
+	owner = sign_up(client, "owner")
+	reader = sign_up(client, "reader")
+	assert client.post("/rooms", json={"is_public": True, "title": "owned"}, headers=owner).status_code == 201
+	assert client.post("/rooms", json={"is_public": True, "title": "other"}, headers=reader).status_code == 201
+	rooms = {room["title"]: room["id"] for room in client.get("/rooms", headers=reader).get_json()}
+	owner_id = next(user["id"] for user in client.get("/users", headers=reader).get_json() if user["name"] == "owner")
+	response = client.post(f"/rooms/{rooms['other']}/users", json={"user_id": owner_id}, headers=reader)
+	assert response.status_code == 201, response.get_data(as_text=True)
+	for room_id in rooms.values():
+		assert client.post(f"/rooms/{room_id}/posts", json={"content": "hello"}, headers=owner).status_code == 201
+
+	response = client.delete(f"/users/{owner_id}", headers=owner)
+	assert response.status_code == 202, response.get_data(as_text=True)
+
+	# Hidden right away, before the purge job has run
+	assert [room["title"] for room in client.get("/rooms", headers=reader).get_json()] == ["other"]
+	assert client.get(f"/rooms/{rooms['owned']}", headers=reader).status_code == 404
+	assert client.get(f"/rooms/{rooms['owned']}/posts", headers=reader).status_code == 404
+	response = client.get(f"/rooms/{rooms['other']}/posts", headers=reader)
+	assert response.status_code == 200
+	assert response.get_json() == []
@@ -0,0 +1,29 @@
+import threading
+
+from sqlalchemy import text
+
+import models.orm
+import models.users
+
+
+def test_cred_version_is_incremented_by_the_database(database):
+	with database.scope as scope:
+		scope.execute(text("INSERT INTO users (role, login, name, passhash) VALUES (1, 'alice', 'alice', 'x')"))
+	database.close_session()
+	m_users = models.users.Users(database, None, None, None, None, None, None)
+
+	with database.scope:
+		# Loaded before a concurrent update, it's stale once that one's committed
+		orm_user = m_users.get(1)
+		assert orm_user.cred_version == 0
+		thread = threading.Thread(target=lambda: (m_users.update(1, passhash="y"), database.close_session()))
+		thread.start()
+		thread.join()
+		m_users.update(1, passhash="z")
+	database.close_session()
+
+	with database.scope as scope:
+		assert scope.query(models.orm.Users.cred_version).filter(models.orm.Users.id == 1).scalar() == 2
+		revocation = scope.query(models.orm.UsersRevocations).filter(models.orm.UsersRevocations.user_id == 1).one()
+		assert revocation.cred_version == 2
+	database.close_session()
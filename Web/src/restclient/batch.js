@@ -0,0 +1,16 @@
+import Client from "@/restclient/client"
+
+const END_POINT = "/batch"
+
+export default class Batch {
+	// requests: [{method, path, body}], with parallel the GETs may run side by side
+	// Resolves to each request's {status, headers, data}, in the same order
+	static post(requests, parallel = true) {
+		return Client.Api().post(END_POINT, {items: requests, parallel})
+			.then(response => response.data.map(result => ({
+				status: result.status,
+				headers: result.headers === undefined ? {} : result.headers,
+				data: result.body
+			})))
+	}
+}
@@ -6,4 +6,7 @@ export default class Login {
 	static login(login, password) {
 		return  Client.Api().post(END_POINT, {login, password})
 	}
+	static ticket(path) {
+		return Client.Api().post(`${END_POINT}/ticket`, {path})
+	}
 }
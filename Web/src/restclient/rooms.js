@@ -1,4 +1,5 @@
 import Client from "@/restclient/client"
+import Login from "@/restclient/login"
 
 const END_POINT = "/rooms"
 
@@ -51,6 +52,20 @@ export default class Rooms {
 	static id_posts_post(room_id, data) {
 		return Client.Api().post(`${END_POINT}/${room_id}/posts`, data)
 	}
+	// Created, updated and deleted posts, as "created", "updated" and "deleted" events
+	// EventSource can't send headers, a short lived ticket for the stream's path goes in the query instead of the token
+	// Resolves to the EventSource, which is closed for good once its ticket has expired
+	static id_posts_stream(room_id) {
+		let path = `${END_POINT}/${room_id}/posts/stream`
+		let url = new URL(path, Client.Api().defaults.baseURL)
+		if( localStorage.getItem("token") === null ) {
+			return Promise.resolve(new EventSource(url.toString()))
+		}
+		return Login.ticket(path).then(response => {
+			url.searchParams.set("ticket", response.data["ticket"])
+			return new EventSource(url.toString())
+		})
+	}
 	static id_posts_id_get(room_id, post_id) {
 		return Client.Api().get(`${END_POINT}/${room_id}/posts/${post_id}`)
 	}